@@ -0,0 +1,217 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Batch.py
+
+Validate and fix a whole directory (or a manifest) of XBRL Taxonomy
+Packages on a pool of worker processes.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from colorama import Fore
+from TPMisc import print_color_msg
+from TPCache import CACHE_DIR, CACHE_FILE, ResultCache
+from TPReport import ConsoleRenderer, Report, REPORT_WRITERS
+from TPStore import STORE_DIR, MemberStore
+from TPZip import COMPRESSION_METHODS, DEFAULT_COMPRESSION, get_compression
+
+class BatchJob:
+    """A single package to process in batch mode."""
+    def __init__(self, provider: str, package: str, destination_folder: str) -> None:
+        """class constructor"""
+        self.provider = provider
+        self.package = package
+        self.destination_folder = destination_folder
+        return None
+
+class BatchResult:
+    """The outcome of a single batch job, including the console output of the run."""
+    def __init__(self, job: BatchJob, success: bool, log: str, duration: float, error: str | None = None, report: dict | None = None) -> None:
+        """class constructor"""
+        self.job = job
+        self.success = success
+        self.log = log
+        self.duration = duration
+        self.error = error
+        self.report = report
+        return None
+
+def read_jobs(source: str, output_folder: str, provider: str | None = None) -> list[BatchJob]:
+    """Collect the packages to process. The source is either a directory, in which case
+    all *.zip files below it are processed with the given provider, or a manifest file
+    with one 'PROVIDER PATH' pair per line (relative paths are relative to the manifest)."""
+    pairs: list[tuple[str, str]] = []
+    if os.path.isdir(source):
+        if provider is None:
+            raise ValueError("A provider is required when processing a directory of packages.")
+        root: str
+        files: list[str]
+        for root, _, files in sorted(os.walk(source)):
+            file: str
+            for file in sorted(files):
+                if file.endswith(".zip"):
+                    pairs.append((provider, os.path.join(root, file)))
+    else:
+        manifest_dir: str = os.path.dirname(os.path.abspath(source))
+        with open(source, "r", encoding="utf-8") as manifest_file:
+            line: str
+            for line in manifest_file:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                fields: list[str] = line.split(maxsplit=1)
+                if len(fields) != 2:
+                    raise ValueError(f"Invalid manifest line: '{line}'. Expected 'PROVIDER PATH'.")
+                pairs.append((fields[0], os.path.join(manifest_dir, fields[1].strip("'\""))))
+    # every package gets its own destination folder, even if names repeat
+    jobs: list[BatchJob] = []
+    used_names: set[str] = set()
+    package_provider: str
+    package: str
+    for package_provider, package in pairs:
+        name: str = os.path.basename(package).replace(".zip", "")
+        unique_name: str = name
+        counter: int = 1
+        while unique_name in used_names:
+            unique_name = f"{name}_{counter}"
+            counter += 1
+        used_names.add(unique_name)
+        jobs.append(BatchJob(package_provider, os.path.abspath(package), os.path.join(os.path.abspath(output_folder), unique_name)))
+    return jobs
+
+def run_job(job: BatchJob, check_only: bool = False, extract: bool = False, compression: str = DEFAULT_COMPRESSION,
+            compression_level: int | None = None, cache_path: str | None = None, verify_crc: bool = False, store_path: str | None = None) -> BatchResult:
+    """Process a single package in a worker process. If the package is extracted, it is
+    copied into its own scratch directory first, so the input is left untouched and runs
+    do not interfere. If a cache path is passed, unchanged packages are taken from the
+    result cache (shared by all workers). If a store path is passed, extracted packages
+    are deduplicated in the member store (shared by all workers, see TPStore.py)."""
+    from app import open_cache, run_package
+    start_time: float = time.perf_counter()
+    log: io.StringIO = io.StringIO()
+    scratch_dir: str = tempfile.mkdtemp(prefix="tp-batch-")
+    report: Report = Report(job.provider, job.package)
+    cache: ResultCache | None = open_cache(cache_path) if cache_path is not None else None
+    store: MemberStore | None = None
+    try:
+        package: str = job.package
+        if extract and not check_only:
+            package = shutil.copy2(job.package, os.path.join(scratch_dir, os.path.basename(job.package)))
+            if store_path is not None:
+                store = MemberStore(store_path)
+        with contextlib.redirect_stdout(log):
+            report.renderer = ConsoleRenderer()
+            report.renderer.render_header(report)
+            success: bool = run_package(job.provider, package, job.destination_folder, check_only, report, extract, compression, compression_level, cache,
+                                        verify_crc=verify_crc, store=store)
+        return BatchResult(job, success, log.getvalue(), time.perf_counter() - start_time, report=report.to_dict())
+    except Exception as e:
+        error: str = f"{type(e).__name__}: {e}"
+        report.renderer = None
+        report.finish(error, success=False)
+        return BatchResult(job, False, log.getvalue(), time.perf_counter() - start_time, error, report.to_dict())
+    finally:
+        if cache is not None:
+            cache.close()
+        if store is not None:
+            store.close()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+def run_batch(jobs: list[BatchJob], workers: int | None = None, check_only: bool = False, verbose: bool = False, extract: bool = False,
+              compression: str = DEFAULT_COMPRESSION, compression_level: int | None = None, cache_path: str | None = None,
+              verify_crc: bool = False, store_path: str | None = None) -> list[BatchResult]:
+    """Process all jobs on a process pool and return the results in input order."""
+    results: dict[int, BatchResult] = {}
+    executor: ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures: dict[Future, int] = {executor.submit(run_job, job, check_only, extract, compression, compression_level, cache_path, verify_crc,
+                                                         store_path): position for position, job in enumerate(jobs)}
+        future: Future
+        for future in as_completed(futures):
+            result: BatchResult = future.result()
+            results[futures[future]] = result
+            if verbose:
+                print(result.log, end="")
+            if result.success:
+                cached: str = ", cached" if result.report is not None and result.report["cached"] else ""
+                print_color_msg(f"    DONE: {os.path.basename(result.job.package)} ({result.duration:.2f}s{cached})",Fore.GREEN)
+            else:
+                print_color_msg(f"    ERROR: {os.path.basename(result.job.package)} {result.error or 'could not be processed'}",Fore.RED)
+    return [results[position] for position in range(len(jobs))]
+
+def print_summary(results: list[BatchResult], duration: float) -> None:
+    """Print the aggregated result of a batch run."""
+    failed: list[BatchResult] = [result for result in results if not result.success]
+    print_color_msg(f"\nBatch result:",Fore.BLUE)
+    print_color_msg(f"-"*13,Fore.BLUE)
+    print_color_msg(f"    Packages  -> {len(results)}",Fore.BLUE)
+    print_color_msg(f"    Succeeded -> {len(results) - len(failed)}",Fore.BLUE)
+    print_color_msg(f"    Failed    -> {len(failed)}",Fore.BLUE)
+    print_color_msg(f"    Duration  -> {duration:.2f}s",Fore.BLUE)
+    result: BatchResult
+    for result in failed:
+        print_color_msg(f"    ERROR: {result.job.package}",Fore.RED)
+    return None
+
+def main(argv: list[str]) -> None:
+    """driver code of the batch subcommand"""
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog="app.py batch", description="Check and fix many XBRL Taxonomy Packages at once.")
+    parser.add_argument("source", help="Directory containing taxonomy packages (zip) or manifest file with one 'PROVIDER PATH' pair per line.")
+    parser.add_argument("--provider", help="Abbreveation of the provider for all packages in a directory (e.g. EBA, EDINET, etc.).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes (default: number of cpus).")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "output"), help="Folder for the fixed taxonomy packages.")
+    parser.add_argument("--check-only", action="store_true", help="Only validate the packages straight from the ZIP, without fixing them.")
+    parser.add_argument("--extract", action="store_true", help="Fix the packages by extracting them instead of rewriting the ZIP archives.")
+    parser.add_argument("--store", nargs="?", const=STORE_DIR, metavar="DIR", help="Extract the packages as links into a content-addressed member store shared by all versions "
+                                                                              f"(requires --extract, default DIR: {STORE_DIR}).")
+    parser.add_argument("--compression", choices=list(COMPRESSION_METHODS), default=DEFAULT_COMPRESSION, help=f"Compression method of the fixed packages (default: {DEFAULT_COMPRESSION}).")
+    parser.add_argument("--compression-level", type=int, help="Compression level (deflate: 0-9, bzip2: 1-9).")
+    parser.add_argument("--verify-crc", action="store_true", help="Decompress all members and verify their CRC-32 (the central directory is always checked).")
+    parser.add_argument("--no-cache", action="store_true", help="Check and fix all packages, even those which did not change since the last run.")
+    parser.add_argument("--verbose", action="store_true", help="Print the full output of every package.")
+    parser.add_argument("--report", choices=sorted(REPORT_WRITERS), help="Write a machine-readable report of all packages as JSON or JSON Lines.")
+    parser.add_argument("--report-file", help="File for the report (default: stdout, which disables the console output).")
+    args = parser.parse_args(argv)
+
+    try:
+        get_compression(args.compression, args.compression_level)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.store is not None and not args.extract:
+        parser.error("--store requires --extract")
+
+    try:
+        jobs: list[BatchJob] = read_jobs(args.source, args.output, args.provider.upper() if args.provider else None)
+    except (OSError, ValueError) as e:
+        print_color_msg(f"Error: {e}",Fore.RED)
+        sys.exit(2)
+
+    cache_path: str | None = None if args.no_cache else os.path.join(CACHE_DIR, CACHE_FILE)
+
+    # the console output is suppressed if the report goes to stdout
+    console: bool = not args.report or bool(args.report_file)
+    start_time: float = time.perf_counter()
+    results: list[BatchResult]
+    if console:
+        print_color_msg(f"Processing {len(jobs)} packages with {args.workers} workers...",Fore.YELLOW)
+        results = run_batch(jobs, args.workers, args.check_only, args.verbose, args.extract, args.compression, args.compression_level, cache_path,
+                              args.verify_crc, args.store)
+        print_summary(results, time.perf_counter() - start_time)
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = run_batch(jobs, args.workers, args.check_only, False, args.extract, args.compression, args.compression_level, cache_path,
+                                  args.verify_crc, args.store)
+    if args.report:
+        from app import write_report
+        write_report(args.report, args.report_file, [result.report for result in results])
+
+    # the exit status is only successful if every package succeeded
+    sys.exit(0 if all(result.success for result in results) else 1)
@@ -0,0 +1,387 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Benchmark.py
+
+Measure the checks and fixers on synthetic XBRL Taxonomy Packages.
+The generator synthesizes conformant and deliberately broken packages
+at configurable scales and shapes. Every measurement runs in a fresh
+process, so the peak memory is that of a single run. The results
+(wall time, throughput, peak memory and the time of every stage) can
+be saved as JSON baseline, later runs fail if they regress beyond a
+threshold.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable
+from colorama import Fore
+from TPMisc import gen_zip_archive, print_color_msg
+from TPProfile import collect_stages, get_peak_rss
+from TPReport import Report
+
+# number of members of the synthetic packages
+SCALES: dict[str, int] = {
+    "1k": 1_000,
+    "50k": 50_000,
+    "500k": 500_000,
+}
+# wide trees have many members per directory, deep trees few members in many nested directories
+SHAPES: tuple[str, ...] = ("wide", "deep")
+WIDE_FANOUT: int = 1000
+DEEP_FANOUT: int = 4
+# defects of broken packages, each makes at least one check fail
+DEFECTS: tuple[str, ...] = (
+    "topLevelDirs",           # a second top-level entry
+    "caseCollisions",         # members whose paths differ in case only
+    "duplicateRewriteUris",   # catalog.xml maps a start string twice
+    "invalidMetadata",        # taxonomyPackage.xml is not valid against its schema
+    "entryPointOutside",      # an entry point which is not part of the package
+    "missingDocuments",       # the DTS refers to a document missing in the package
+    "malformedDocuments",     # the DTS contains a document which is not well-formed
+)
+# defects of the broken packages of the suite, the structure defects are split off,
+# as the DTS is not discovered if the package structure is broken
+STRUCTURE_DEFECTS: tuple[str, ...] = ("topLevelDirs", "caseCollisions", "entryPointOutside")
+DTS_DEFECTS: tuple[str, ...] = ("duplicateRewriteUris", "invalidMetadata", "missingDocuments", "malformedDocuments")
+# measured runs: the read-only checks, the ZIP-to-ZIP fix and packing an extracted package
+MODES: tuple[str, ...] = ("check", "fix", "pack")
+BASELINE_VERSION: int = 1
+
+TAXONOMY_URL: str = "http://www.example.com/tax/"
+TAXONOMY_FOLDER: str = "www.example.com/tax/"
+XBRL_INSTANCE_XSD: str = "http://www.xbrl.org/2003/xbrl-instance-2003-12-31.xsd"
+
+class BenchmarkCase:
+    """A synthetic package to measure, see gen_package() for the parameters."""
+    def __init__(self, name: str, members: int, shape: str = "wide", entry_points: int = 4, catalog_entries: int = 1, dts_share: float = 0.1,
+                 defects: Iterable[str] = ()) -> None:
+        """class constructor"""
+        self.name = name
+        self.members = members
+        self.shape = shape
+        self.entry_points = entry_points
+        self.catalog_entries = catalog_entries
+        self.dts_share = dts_share
+        self.defects = tuple(defects)
+        return None
+
+    def gen_package(self, folder: str) -> str:
+        """Generate the package of the case into folder, unless it was generated before."""
+        package: str = os.path.join(folder, f"{self.name}.zip")
+        if not os.path.exists(package):
+            gen_package(package, self.members, self.shape, self.entry_points, self.catalog_entries, self.dts_share, self.defects)
+        return package
+
+def get_cases(scales: Iterable[str]) -> list[BenchmarkCase]:
+    """Return the benchmark suite for the given scales: conformant packages with a wide and a deep
+    tree, broken packages (see STRUCTURE_DEFECTS and DTS_DEFECTS) and a package with a large
+    catalog and many entry points."""
+    cases: list[BenchmarkCase] = []
+    scale: str
+    for scale in scales:
+        members: int = SCALES[scale]
+        cases.append(BenchmarkCase(f"conformant-wide-{scale}", members, "wide"))
+        cases.append(BenchmarkCase(f"conformant-deep-{scale}", members, "deep"))
+        cases.append(BenchmarkCase(f"broken-structure-{scale}", members, "wide", defects=STRUCTURE_DEFECTS))
+        cases.append(BenchmarkCase(f"broken-dts-{scale}", members, "wide", defects=DTS_DEFECTS))
+        cases.append(BenchmarkCase(f"metadata-{scale}", members, "wide", entry_points=max(4, members // 100), catalog_entries=max(1, members // 10)))
+    return cases
+
+def get_member_path(number: int, members: int, shape: str) -> str:
+    """Return the path of a generated member below the taxonomy folder."""
+    if shape == "wide":
+        return f"tab/t{number // WIDE_FANOUT:04d}/m{number}.xml"
+    # the digits of the number (base DEEP_FANOUT) are the nested directories
+    depth: int = 1
+    while DEEP_FANOUT ** depth < members:
+        depth += 1
+    digits: list[str] = []
+    value: int = number
+    for _ in range(depth):
+        digits.append(f"d{value % DEEP_FANOUT}")
+        value //= DEEP_FANOUT
+    return f"tab/{'/'.join(reversed(digits))}/m{number}.xml"
+
+def gen_linkbase(number: int) -> bytes:
+    """Return the content of a generated label linkbase."""
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+            f'  <link:labelLink xlink:type="extended" xlink:role="http://www.xbrl.org/2003/role/link">\n'
+            f'    <link:label xlink:type="resource" xlink:label="label_{number}" xml:lang="en">Synthetic label {number}</link:label>\n'
+            f'  </link:labelLink>\n'
+            f'</link:linkbase>\n').encode("utf-8")
+
+def gen_schema(target_namespace: str, imports: Iterable[str], linkbases: Iterable[str]) -> bytes:
+    """Return the content of a generated taxonomy schema importing and referring to the given URLs."""
+    linkbase_refs: str = "".join(f'      <link:linkbaseRef xlink:type="simple" xlink:href="{href}" '
+                                 f'xlink:arcrole="http://www.w3.org/1999/xlink/properties/linkbase"/>\n' for href in linkbases)
+    schema_imports: str = "".join(f'  <xs:import namespace="{href.rsplit(".", 1)[0]}" schemaLocation="{href}"/>\n' for href in imports)
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns:link="http://www.xbrl.org/2003/linkbase" '
+            f'xmlns:xlink="http://www.w3.org/1999/xlink" targetNamespace="{target_namespace}">\n'
+            f'  <xs:annotation>\n    <xs:appinfo>\n{linkbase_refs}    </xs:appinfo>\n  </xs:annotation>\n'
+            f'{schema_imports}</xs:schema>\n').encode("utf-8")
+
+def gen_catalog_xml(catalog_entries: int, duplicate: bool = False) -> bytes:
+    """Return the content of a generated catalog.xml file with catalog_entries rewriteURI elements."""
+    rewrite_uris: list[str] = [f'  <rewriteURI uriStartString="{TAXONOMY_URL}" rewritePrefix="../{TAXONOMY_FOLDER}"/>\n']
+    number: int
+    for number in range(1, catalog_entries):
+        rewrite_uris.append(f'  <rewriteURI uriStartString="http://www.example.com/ext{number}/" rewritePrefix="../www.example.com/ext{number}/"/>\n')
+    if duplicate:
+        rewrite_uris.append(rewrite_uris[0])
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">\n{"".join(rewrite_uris)}</catalog>\n').encode("utf-8")
+
+def gen_taxonomy_package_xml(entry_point_urls: Iterable[str], valid: bool = True) -> bytes:
+    """Return the content of a generated taxonomyPackage.xml file. If valid is not set, the
+    mandatory identifier is left out."""
+    identifier: str = "  <identifier>http://www.example.com/tax/package.zip</identifier>\n" if valid else ""
+    entry_points: str = "".join(f'    <entryPoint>\n      <name>Entry point {number}</name>\n'
+                                f'      <entryPointDocument href="{url}"/>\n    </entryPoint>\n' for number, url in enumerate(entry_point_urls))
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<taxonomyPackage xml:lang="en" xmlns="http://xbrl.org/2016/taxonomy-package">\n'
+            f'{identifier}  <name>Synthetic taxonomy package</name>\n  <version>1.0</version>\n'
+            f'  <publisher>Synthetic publisher</publisher>\n  <publicationDate>2024-01-01</publicationDate>\n'
+            f'  <entryPoints>\n{entry_points}  </entryPoints>\n</taxonomyPackage>\n').encode("utf-8")
+
+def gen_package(path: str, members: int = 1000, shape: str = "wide", entry_points: int = 4, catalog_entries: int = 1, dts_share: float = 0.1,
+                defects: Iterable[str] = ()) -> str:
+    """Generate a synthetic taxonomy package with about members members in a tree of the given shape
+    (see SHAPES). Each entry point schema imports a common schema and refers to its share of the
+    generated linkbases, so dts_share of the members are part of the DTS. The catalog.xml file has
+    catalog_entries rewriteURI elements. The package is conformant, unless defects (see DEFECTS) are
+    given. The archive is reproducible. Returns the path of the package."""
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape {shape}, expected one of {', '.join(SHAPES)}.")
+    defects = frozenset(defects)
+    if not defects <= frozenset(DEFECTS):
+        raise ValueError(f"Unknown defects {', '.join(sorted(defects - frozenset(DEFECTS)))}, expected any of {', '.join(DEFECTS)}.")
+    top_level_name: str = os.path.basename(path).replace(".zip", "")
+    linkbases: int = max(0, members - entry_points - 4)
+    dts_linkbases: int = min(linkbases, int(members * dts_share))
+
+    def write_member(zip_file: zipfile.ZipFile, name: str, data: bytes) -> None:
+        member_info: zipfile.ZipInfo = zipfile.ZipInfo(f"{top_level_name}/{name}", date_time=(1980, 1, 1, 0, 0, 0))
+        member_info.compress_type = zipfile.ZIP_DEFLATED
+        member_info.external_attr = 0o644 << 16
+        zip_file.writestr(member_info, data, compresslevel=1)
+        return None
+
+    zip_file: zipfile.ZipFile
+    with zipfile.ZipFile(f"{path}.part", "w") as zip_file:
+        # metadata files
+        entry_point_urls: list[str] = [f"{TAXONOMY_URL}ep{number}.xsd" for number in range(entry_points)]
+        if "entryPointOutside" in defects:
+            entry_point_urls.append("http://www.example.org/outside.xsd")
+        write_member(zip_file, "META-INF/catalog.xml", gen_catalog_xml(catalog_entries, "duplicateRewriteUris" in defects))
+        write_member(zip_file, "META-INF/taxonomyPackage.xml", gen_taxonomy_package_xml(entry_point_urls, "invalidMetadata" not in defects))
+
+        # schemas, the linkbases of the DTS are distributed over the entry points
+        core_imports: list[str] = [XBRL_INSTANCE_XSD]
+        if "missingDocuments" in defects:
+            core_imports.append(f"{TAXONOMY_URL}missing.xsd")
+        write_member(zip_file, f"{TAXONOMY_FOLDER}core.xsd", gen_schema(f"{TAXONOMY_URL}core", core_imports, ["core-lab.xml"]))
+        write_member(zip_file, f"{TAXONOMY_FOLDER}core-lab.xml", b"<link:linkbase" if "malformedDocuments" in defects else gen_linkbase(-1))
+        number: int
+        for number in range(entry_points):
+            dts_members: range = range(number * dts_linkbases // entry_points, (number + 1) * dts_linkbases // entry_points)
+            write_member(zip_file, f"{TAXONOMY_FOLDER}ep{number}.xsd",
+                         gen_schema(f"{TAXONOMY_URL}ep{number}", [f"{TAXONOMY_URL}core.xsd"],
+                                    [f"{TAXONOMY_URL}{get_member_path(member, linkbases, shape)}" for member in dts_members]))
+
+        # linkbases
+        for number in range(linkbases):
+            write_member(zip_file, f"{TAXONOMY_FOLDER}{get_member_path(number, linkbases, shape)}", gen_linkbase(number))
+        if "caseCollisions" in defects and linkbases:
+            member_folder: str
+            member_name: str
+            member_folder, _, member_name = get_member_path(0, linkbases, shape).rpartition("/")
+            write_member(zip_file, f"{TAXONOMY_FOLDER}{member_folder}/{member_name.upper()}", gen_linkbase(0))
+
+    if "topLevelDirs" in defects:
+        with zipfile.ZipFile(f"{path}.part", "a") as zip_file:
+            zip_file.writestr(zipfile.ZipInfo("README.txt", date_time=(1980, 1, 1, 0, 0, 0)), b"Synthetic taxonomy package\n")
+    os.replace(f"{path}.part", path)
+    return path
+
+def measure(package: str, mode: str, output_folder: str, provider: str = "EBA") -> dict[str, Any]:
+    """Measure a single run of the given mode (see MODES) on a package. The wall time and the time of
+    every stage (summed per stage name) are recorded, as well as the peak memory of the process."""
+    from app import run_package
+    # the modules imported on demand are imported up front, so the imports are not measured
+    import TPChecker, TPFixer, TPPipeline
+    os.makedirs(output_folder, exist_ok=True)
+    report: Report = Report(provider, package)
+    start_time: float
+    if mode == "pack":
+        # the package is extracted up front, only packing it is measured
+        extract_folder: str = os.path.join(output_folder, os.path.basename(package).replace(".zip", ""))
+        with zipfile.ZipFile(package) as zip_file:
+            zip_file.extractall(extract_folder)
+        start_time = time.perf_counter()
+        with collect_stages(report.stages):
+            gen_zip_archive(extract_folder, os.path.join(output_folder, os.path.basename(package)), report)
+        report.success = True
+    elif mode in ("check", "fix"):
+        start_time = time.perf_counter()
+        run_package(provider, package, output_folder, check_only=mode == "check", report=report)
+    else:
+        raise ValueError(f"Unknown mode {mode}, expected one of {', '.join(MODES)}.")
+    wall_time: float = time.perf_counter() - start_time
+    stages: dict[str, float] = {}
+    for stage_record in report.stages:
+        stages[stage_record.name] = round(stages.get(stage_record.name, 0.0) + stage_record.wall_time, 6)
+    with zipfile.ZipFile(package) as zip_file:
+        members: int = len(zip_file.infolist())
+    return {
+        "members": members,
+        "archiveSize": os.path.getsize(package),
+        "success": report.success,
+        "failedChecks": [entry.name for entry in report.entries if entry.status not in ("passed", "done")],
+        "wallTime": round(wall_time, 6),
+        "membersPerSecond": round(members / wall_time, 1) if wall_time else None,
+        "bytesPerSecond": round(os.path.getsize(package) / wall_time, 1) if wall_time else None,
+        "peakRss": get_peak_rss(),
+        "stages": stages,
+    }
+
+def run_benchmark(cases: list[BenchmarkCase], modes: Iterable[str], work_folder: str, repeat: int = 3) -> dict[str, dict[str, Any]]:
+    """Measure every mode on every case repeat times and return the best run of each, keyed by
+    'case/mode'. Every run is measured in a fresh process."""
+    results: dict[str, dict[str, Any]] = {}
+    context: multiprocessing.context.BaseContext = multiprocessing.get_context("spawn")
+    case: BenchmarkCase
+    for case in cases:
+        print_color_msg(f"    Generating {case.name}...", Fore.YELLOW)
+        package: str = case.gen_package(work_folder)
+        mode: str
+        for mode in modes:
+            runs: list[dict[str, Any]] = []
+            for _ in range(repeat):
+                output_folder: str = tempfile.mkdtemp(prefix="tp-benchmark-", dir=work_folder)
+                try:
+                    executor: ProcessPoolExecutor
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        runs.append(executor.submit(measure, package, mode, output_folder).result())
+                finally:
+                    shutil.rmtree(output_folder, ignore_errors=True)
+            result: dict[str, Any] = min(runs, key=lambda run: run["wallTime"])
+            result["peakRss"] = min((run["peakRss"] for run in runs if run["peakRss"] is not None), default=None)
+            results[f"{case.name}/{mode}"] = result
+            peak_rss: str = f", {result['peakRss'] / 2**20:.1f} MiB" if result["peakRss"] is not None else ""
+            print_color_msg(f"    DONE: {case.name}/{mode} {result['wallTime']:.3f}s ({result['membersPerSecond']:.0f} members/s{peak_rss})", Fore.GREEN)
+    return results
+
+def compare_results(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], threshold: float = 0.25,
+                    min_time: float = 0.05) -> list[str]:
+    """Return the regressions of the results against a baseline: runs and stages which are slower,
+    and runs which need more memory, than the baseline by more than threshold (a fraction), as well
+    as runs whose outcome changed. Time differences below min_time seconds are treated as noise."""
+    regressions: list[str] = []
+
+    def is_regression(value: float | None, baseline_value: float | None, min_difference: float) -> bool:
+        if value is None or baseline_value is None:
+            return False
+        return value > baseline_value * (1 + threshold) and value - baseline_value > min_difference
+
+    key: str
+    result: dict[str, Any]
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        baseline_result: dict[str, Any] = baseline[key]
+        if result["success"] != baseline_result["success"] or result["failedChecks"] != baseline_result["failedChecks"]:
+            regressions.append(f"{key}: failed checks changed from {baseline_result['failedChecks']} to {result['failedChecks']}")
+        if is_regression(result["wallTime"], baseline_result["wallTime"], min_time):
+            regressions.append(f"{key}: wall time {result['wallTime']:.3f}s, baseline {baseline_result['wallTime']:.3f}s")
+        if is_regression(result["peakRss"], baseline_result["peakRss"], 0):
+            regressions.append(f"{key}: peak memory {result['peakRss'] / 2**20:.1f} MiB, baseline {baseline_result['peakRss'] / 2**20:.1f} MiB")
+        name: str
+        wall_time: float
+        for name, wall_time in result["stages"].items():
+            if is_regression(wall_time, baseline_result["stages"].get(name), min_time):
+                regressions.append(f"{key}: stage {name} {wall_time:.3f}s, baseline {baseline_result['stages'][name]:.3f}s")
+    return regressions
+
+def load_baseline(baseline_file: str) -> dict[str, dict[str, Any]]:
+    """Load the results of a baseline file."""
+    with open(baseline_file, "r", encoding="utf-8") as baseline_stream:
+        baseline: dict[str, Any] = json.load(baseline_stream)
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Baseline {baseline_file} has version {baseline.get('version')}, expected {BASELINE_VERSION}.")
+    return baseline["results"]
+
+def save_baseline(baseline_file: str, results: dict[str, dict[str, Any]]) -> None:
+    """Save the results as baseline file, together with the platform they were measured on."""
+    baseline: dict[str, Any] = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    with open(f"{baseline_file}.part", "w", encoding="utf-8") as baseline_stream:
+        json.dump(baseline, baseline_stream, indent=2)
+    os.replace(f"{baseline_file}.part", baseline_file)
+    return None
+
+def main(argv: list[str]) -> None:
+    """driver code of the benchmark subcommand"""
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog="app.py benchmark", description="Measure the checks and fixers on synthetic XBRL Taxonomy Packages.")
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["1k"], help="Scales of the synthetic packages (default: 1k).")
+    parser.add_argument("--cases", nargs="+", help="Only measure the cases with these names (e.g. conformant-wide-1k).")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES), help="Measured runs (default: all).")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs of each measurement, the best run is kept (default: 3).")
+    parser.add_argument("--work-dir", help="Folder for the generated packages, which are reused by later runs (default: a temporary folder).")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare the results with this baseline and fail on regressions.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown and memory growth against the baseline as fraction (default: 0.25).")
+    parser.add_argument("--save", metavar="FILE", help="Save the results as baseline.")
+    args = parser.parse_args(argv)
+
+    cases: list[BenchmarkCase] = get_cases(args.scale)
+    if args.cases:
+        unknown_cases: set[str] = set(args.cases) - {case.name for case in cases}
+        if unknown_cases:
+            parser.error(f"unknown cases {', '.join(sorted(unknown_cases))} at scales {', '.join(args.scale)}")
+        cases = [case for case in cases if case.name in args.cases]
+    baseline: dict[str, dict[str, Any]] | None = None
+    if args.baseline:
+        try:
+            baseline = load_baseline(args.baseline)
+        except (OSError, ValueError, KeyError) as e:
+            print_color_msg(f"Error: {e}",Fore.RED)
+            sys.exit(2)
+
+    work_folder: str = args.work_dir or tempfile.mkdtemp(prefix="tp-benchmark-")
+    os.makedirs(work_folder, exist_ok=True)
+    try:
+        print_color_msg(f"Measuring {len(cases)} cases...",Fore.YELLOW)
+        results: dict[str, dict[str, Any]] = run_benchmark(cases, args.modes, work_folder, args.repeat)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_folder, ignore_errors=True)
+    if args.save:
+        save_baseline(args.save, results)
+
+    if baseline is not None:
+        regressions: list[str] = compare_results(results, baseline, args.threshold)
+        print_color_msg(f"\nBenchmark result:",Fore.BLUE)
+        print_color_msg(f"-"*17,Fore.BLUE)
+        regression: str
+        for regression in regressions:
+            print_color_msg(f"    ERROR: {regression}",Fore.RED)
+        if regressions:
+            sys.exit(1)
+        print_color_msg(f"    No regressions against {args.baseline}",Fore.GREEN)
+    return None
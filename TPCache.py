@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Cache.py
+
+Provides a persistent result cache, so packages which did not change
+since the last run are not checked and fixed again. The results are
+stored in a SQLite database (by default under ~/.cache).
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, IO
+
+# default location of the cache, see the XDG base directory specification
+CACHE_DIR: str = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "xbrl-taxonomy-package")
+CACHE_FILE: str = "results.sqlite"
+# size cap of the stored reports, the least recently used ones are evicted first
+DEFAULT_MAX_SIZE: int = 64 * 1024 * 1024
+# number of remembered archive hashes
+MAX_FILE_HASHES: int = 4096
+HASH_CHUNK_SIZE: int = 1024 * 1024
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    report TEXT NOT NULL,
+    output_path TEXT,
+    output_size INTEGER,
+    output_mtime_ns INTEGER,
+    output_sha256 TEXT,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+def get_tool_version() -> str:
+    """Return the version of the tool. There are no releases, so the version is
+    derived from the sources and bundled schemas: any change invalidates the cache."""
+    tool_hash = hashlib.sha256()
+    project_dir: str = os.path.dirname(os.path.abspath(__file__))
+    source_file: str
+    for source_file in sorted(glob.glob(os.path.join(project_dir, "*.py")) + glob.glob(os.path.join(project_dir, "schemas", "*"))):
+        tool_hash.update(os.path.basename(source_file).encode("utf-8"))
+        file: IO[bytes]
+        with open(source_file, "rb") as file:
+            tool_hash.update(file.read())
+    return tool_hash.hexdigest()[:16]
+
+def get_file_sha256(path: str) -> str:
+    """Return the SHA-256 of a file."""
+    file_hash = hashlib.sha256()
+    file: IO[bytes]
+    with open(path, "rb") as file:
+        chunk: bytes
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+class ResultCache:
+    """Persistent cache of package reports and fixed outputs. Entries are keyed by
+    the archive's SHA-256, size and mtime, the tool version and the run options."""
+    def __init__(self, path: str | None = None, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """class constructor"""
+        self.path = path or os.path.join(CACHE_DIR, CACHE_FILE)
+        self.max_size = max_size
+        self.tool_version: str = get_tool_version()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # batch workers share the database, so writers wait for each other
+        self.connection: sqlite3.Connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_SCHEMA)
+        return None
+
+    def close(self) -> None:
+        self.connection.close()
+        return None
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+        return None
+
+    def get_archive_sha256(self, path: str, size: int, mtime_ns: int) -> str:
+        """Return the SHA-256 of an archive. Hashes are remembered by path, size and
+        mtime, so unchanged archives are not read again."""
+        path = os.path.abspath(path)
+        row: tuple | None = self.connection.execute("SELECT sha256 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                                                    (path, size, mtime_ns)).fetchone()
+        sha256: str = row[0] if row is not None else get_file_sha256(path)
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?)", (path, size, mtime_ns, sha256, time.time()))
+            if row is None:
+                self.connection.execute("DELETE FROM file_hashes WHERE path NOT IN (SELECT path FROM file_hashes ORDER BY last_used DESC LIMIT ?)",
+                                        (MAX_FILE_HASHES,))
+        return sha256
+
+    def get_key(self, archive: str, **options: Any) -> str | None:
+        """Return the cache key of an archive and the options of the run, or None if
+        the archive does not exist."""
+        try:
+            archive_stat: os.stat_result = os.stat(archive)
+        except OSError:
+            return None
+        key: dict[str, Any] = {
+            "sha256": self.get_archive_sha256(archive, archive_stat.st_size, archive_stat.st_mtime_ns),
+            "size": archive_stat.st_size,
+            "mtime": archive_stat.st_mtime_ns,
+            "version": self.tool_version,
+            **options,
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the cached report, or None if there is none or the fixed output
+        it refers to was changed or removed in the meantime."""
+        row: tuple | None = self.connection.execute("SELECT report, output_path, output_size, output_mtime_ns FROM results WHERE key = ?",
+                                                    (key,)).fetchone()
+        if row is None:
+            return None
+        report: str
+        output_path: str | None
+        output_size: int | None
+        output_mtime_ns: int | None
+        report, output_path, output_size, output_mtime_ns = row
+        if output_path is not None:
+            try:
+                output_stat: os.stat_result = os.stat(output_path)
+            except OSError:
+                return None
+            if (output_stat.st_size, output_stat.st_mtime_ns) != (output_size, output_mtime_ns):
+                return None
+        with self.connection:
+            self.connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(report)
+
+    def put(self, key: str, report: dict[str, Any], output_path: str | None = None) -> None:
+        """Store a report and the hash of the fixed output, then evict the least
+        recently used entries beyond the size cap."""
+        report_json: str = json.dumps(report)
+        output: tuple[str | None, int | None, int | None, str | None] = (None, None, None, None)
+        if output_path is not None and os.path.isfile(output_path):
+            output_stat: os.stat_result = os.stat(output_path)
+            output = (os.path.abspath(output_path), output_stat.st_size, output_stat.st_mtime_ns, get_file_sha256(output_path))
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (key, report_json, *output, len(report_json), time.time()))
+        self.evict()
+        return None
+
+    def get_output_sha256(self, key: str) -> str | None:
+        """Return the SHA-256 of the fixed output stored with a report."""
+        row: tuple | None = self.connection.execute("SELECT output_sha256 FROM results WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def evict(self) -> None:
+        """Remove the least recently used reports until the cache fits into its size cap."""
+        with self.connection:
+            total_size: int = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total_size <= self.max_size:
+                return None
+            rows: list[tuple[str, int]] = self.connection.execute("SELECT key, size FROM results ORDER BY last_used").fetchall()
+            key: str
+            size: int
+            for key, size in rows:
+                if total_size <= self.max_size:
+                    break
+                self.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                total_size -= size
+        return None
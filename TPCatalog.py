@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Catalog.py
+
+Provides the resolution of URLs through the META-INF/catalog.xml file
+of an XBRL Taxonomy Package. The rewriteURI entries are indexed in a
+prefix trie, so each URL is remapped in O(length of the URL).
+"""
+
+import re
+from typing import IO
+from TPXmlBase import UrlTable, XmlBaseResolver
+
+CATALOG_NS: str = "urn:oasis:names:tc:entity:xmlns:xml:catalog"
+REWRITE_URI_TAGS: frozenset[str] = frozenset({f"{{{CATALOG_NS}}}rewriteURI"})
+
+# characters which are not allowed in URIs and are percent-encoded by the
+# URI normalization of the XML Catalogs specification (section 6.3)
+_UNRESERVED: frozenset[str] = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_DISALLOWED: frozenset[str] = frozenset(' <>"{}|\\^`')
+_PERCENT_ENCODED: re.Pattern = re.compile(r"%([0-9A-Fa-f]{2})")
+# key of the rewrite prefix stored in a trie node (a character key has length one)
+_VALUE: str = ""
+
+def normalize_uri(uri: str) -> str:
+    """URI normalization as prescribed by the XML Catalogs specification: disallowed and
+    non-ASCII characters are percent-encoded (as UTF-8), encoded unreserved characters
+    are decoded and the hex digits of all other encodings are upper-cased."""
+    if uri.isascii() and not any(char in _DISALLOWED or char < " " for char in uri) and "%" not in uri:
+        return uri
+    normalized: list[str] = []
+    char: str
+    for char in uri:
+        if char in _DISALLOWED or char < " " or char > "~":
+            normalized.extend(f"%{byte:02X}" for byte in char.encode("utf-8"))
+        else:
+            normalized.append(char)
+
+    def normalize_encoding(match: re.Match) -> str:
+        decoded: str = chr(int(match.group(1), 16))
+        return decoded if decoded in _UNRESERVED else f"%{match.group(1).upper()}"
+    return _PERCENT_ENCODED.sub(normalize_encoding, "".join(normalized))
+
+class CatalogResolver:
+    """Resolves URLs with the rewriteURI entries of a taxonomy package catalog. The
+    start strings are normalized and indexed in a prefix trie, duplicate start strings
+    (tpe:multipleRewriteURIsForStartString) are collected while building the index."""
+    def __init__(self, rewrite_uris: list[tuple[str, str]]) -> None:
+        """class constructor. The rewrite prefixes are expected to be resolved already."""
+        self.rewrite_uris: dict[str, str] = {}
+        self.duplicates: list[str] = []
+        self._trie: dict[str, dict] = {}
+        # the references of a DTS point to the same documents over and over again
+        self._resolved: dict[str, str] = {}
+        uri_start_string: str
+        rewrite_prefix: str
+        for uri_start_string, rewrite_prefix in rewrite_uris:
+            uri_start_string = normalize_uri(uri_start_string)
+            if uri_start_string in self.rewrite_uris:
+                self.duplicates.append(uri_start_string)
+                continue
+            self.rewrite_uris[uri_start_string] = rewrite_prefix
+            node: dict[str, dict] = self._trie
+            char: str
+            for char in uri_start_string:
+                node = node.setdefault(char, {})
+            node[_VALUE] = (uri_start_string, rewrite_prefix)
+        return None
+
+    def __len__(self) -> int:
+        return len(self.rewrite_uris)
+
+    @staticmethod
+    def from_stream(catalog_stream: IO[bytes], catalog_path: str = "META-INF/catalog.xml") -> "CatalogResolver":
+        """Parse a catalog file. Relative rewrite prefixes are resolved against the location
+        of the catalog in the package (and xml:base attributes), i.e. to package paths."""
+        url_table: UrlTable = XmlBaseResolver().resolve_document(catalog_stream, catalog_path, ("uriStartString", "rewritePrefix"))
+        # both attributes of a rewriteURI element by the number of the element
+        rewrite_uri_elements: dict[int, dict[str, int]] = {}
+        row: int
+        for row in url_table.rows(tags=REWRITE_URI_TAGS):
+            rewrite_uri_elements.setdefault(url_table.elements[row], {})[url_table.attributes[row]] = row
+        rewrite_uris: list[tuple[str, str]] = []
+        rows: dict[str, int]
+        for rows in rewrite_uri_elements.values():
+            uri_start_string: str = url_table.values[rows["uriStartString"]] if "uriStartString" in rows else ""
+            rewrite_prefix: str = url_table.urls[rows["rewritePrefix"]] if "rewritePrefix" in rows else url_table.document_url
+            rewrite_uris.append((uri_start_string, rewrite_prefix))
+        return CatalogResolver(rewrite_uris)
+
+    def match(self, url: str) -> tuple[str, str] | None:
+        """Return the longest start string matching the (normalized) url and its rewrite prefix."""
+        longest_match: tuple[str, str] | None = self._trie.get(_VALUE)
+        node: dict[str, dict] | None = self._trie
+        char: str
+        for char in url:
+            node = node.get(char)
+            if node is None:
+                break
+            longest_match = node.get(_VALUE, longest_match)
+        return longest_match
+
+    def resolve(self, url: str) -> str:
+        """Remap a url with the rewriteURI entry of the longest matching start string.
+        URLs without matching entry are returned (normalized) as they are."""
+        resolved_url: str | None = self._resolved.get(url)
+        if resolved_url is None:
+            normalized_url: str = normalize_uri(url)
+            longest_match: tuple[str, str] | None = self.match(normalized_url)
+            resolved_url = normalized_url if longest_match is None else longest_match[1] + normalized_url[len(longest_match[0]):]
+            self._resolved[url] = resolved_url
+        return resolved_url
@@ -7,116 +7,407 @@ Provides all sorts of classes and functions to
 analyze an XBRL Taxonomy Package.
 """
 
+import contextvars
+import copy
 import os
-import xml.etree.ElementTree as ET
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from colorama import Fore
 from lxml import etree
-from zipfile import ZipFile
+from typing import Callable, IO
 from urllib.parse import urljoin
+from zipfile import BadZipFile
+from TPCatalog import CatalogResolver
+from TPDTS import DTSGraph, DTSWalker, IN_PACKAGE, MISSING, OUTSIDE_PACKAGE
+from TPManifest import MemberManifest
 from TPMisc import print_color_msg
+from TPProfile import instrument
+from TPReader import PackageReader
+from TPPackage import ABSOLUTE_PATH, BACKSLASH, CASE_COLLISION, PARENT_TRAVERSAL, PackageIndex, PackageNode, get_archive_path, scan_member_paths
+from TPSchema import get_xml_schema
+from TPXmlBase import XmlBaseResolver
+from TPZip import check_limits, MAX_COMPRESSION_RATIO, MAX_ENTRY_COUNT, MAX_TOTAL_SIZE, verify_members
+
+TAXONOMY_PACKAGE_XSD: str = "http://www.xbrl.org/2016/taxonomy-package.xsd"
+TAXONOMY_PACKAGE_CATALOG_XSD: str = "http://www.xbrl.org/2016/taxonomy-package-catalog.xsd"
+TAXONOMY_PACKAGE_NS: str = "http://xbrl.org/2016/taxonomy-package"
+# root elements of the documents an entry point may consist of
+TAXONOMY_DOCUMENT_ROOTS: frozenset[str] = frozenset({
+    "{http://www.w3.org/2001/XMLSchema}schema",
+    "{http://www.xbrl.org/2003/linkbase}linkbase",
+})
+# number of bytes fed at once to find the root element of a document
+SNIFF_CHUNK_SIZE: int = 4096
+# messages of the problems found by check_member_paths()
+MEMBER_PATH_PROBLEMS: dict[str, str] = {
+    ABSOLUTE_PATH: "Member {name} has an absolute path",
+    PARENT_TRAVERSAL: "Member {name} refers to a parent directory ('..')",
+    BACKSLASH: "Member {name} uses backslashes as path separator",
+    CASE_COLLISION: "Member {name} differs from {other} in case only",
+}
+
+@instrument
+def sniff_root_element(document: IO[bytes]) -> str | None:
+    """Return the (namespace qualified) tag of the root element of a document. The document
+    is parsed incrementally and reading stops right after the first start tag."""
+    parser: etree.XMLPullParser = etree.XMLPullParser(events=("start",), no_network=True, resolve_entities=False)
+    chunk: bytes
+    for chunk in iter(lambda: document.read(SNIFF_CHUNK_SIZE), b""):
+        parser.feed(chunk)
+        element: etree._Element
+        for _, element in parser.read_events():
+            return element.tag
+    return None
 
 class TPChecker:
     """The class provides methods to check an xbrl taxonomy package based on the standard here:
     https://www.xbrl.org/Specification/taxonomy-package/REC-2016-04-19/taxonomy-package-REC-2016-04-19.html.
     """
-    def __init__(self) -> None:
-        """class constructor"""
+    def __init__(self, quiet: bool = False, manifest: MemberManifest | None = None) -> None:
+        """class constructor. Messages produced by the checks are collected in
+        self.messages and, unless quiet is set, printed on the console. If the
+        manifest of a previous version is passed, unchanged members inherit the
+        results of the document-level checks (see TPManifest.py)."""
+        self.quiet = quiet
+        self.manifest = manifest
+        self.messages: list[str] = []
+        # the members failed checks are about, reported with the messages (see Report.run_check())
+        self.members: list[str] = []
+        # indexes of already analyzed archives, so that all structural
+        # checks share one read of the central directory per archive
+        self._package_indexes: dict[tuple[str, int, int], PackageIndex] = {}
+        self._catalog_resolvers: dict[tuple[str, int, int], CatalogResolver | None] = {}
+        # memory-mapped readers, which serve all member reads of the checks
+        self._package_readers: dict[tuple[str, int, int], PackageReader] = {}
+        self._dts_graphs: dict[tuple[str, int, int], DTSGraph] = {}
+        # memoizes the resolved URLs for check_rel_url_base_resolution()
+        self.xml_base_resolver: XmlBaseResolver = XmlBaseResolver()
+        # guards the caches, as checks may run concurrently (see fork())
+        self._lock: threading.RLock = threading.RLock()
         return None
 
-    def check_case_sensitivity(self) -> None:
-        """Standard description: 'A Conformant Processor MUST treat all filenames prescribed by this
-        specification as being case-sensitive.'"""
-        # NOTE: Python treats uppercase and lowercase letters as distinct characters.
-        # This means that variable and Variable are different identifiers. There is
-        # no need for a separate function, to check case sensitivity.
+    def fork(self) -> "TPChecker":
+        """Return a checker sharing the caches and the manifest of this one, which collects
+        its own messages, e.g. to run a check concurrently with others (see TPPipeline.py)."""
+        tp_checker: TPChecker = copy.copy(self)
+        tp_checker.messages = []
+        tp_checker.members = []
+        return tp_checker
+
+    def release(self, archive_key: tuple[str, int, int]) -> None:
+        """Drop the cached index, reader, catalog and DTS graph of an archive (see get_archive_key()),
+        e.g. to bound the caches of a long-running process (see TPServe.py). The reader is not
+        closed, as concurrent checks may still use it, its mapping is released with the last reference.
+        The memoized URLs are not kept per archive, so they are dropped as well."""
+        with self._lock:
+            self._package_readers.pop(archive_key, None)
+            self._package_indexes.pop(archive_key, None)
+            self._catalog_resolvers.pop(archive_key, None)
+            self._dts_graphs.pop(archive_key, None)
+            self.xml_base_resolver = XmlBaseResolver()
+        return None
+
+    def close(self, archive: str | None = None) -> None:
+        """Close the readers of an archive (or of all archives) and drop everything built over them,
+        so the file can be moved or deleted, which fails on Windows while it is open or mapped. Unlike
+        release(), the readers are closed at once, so no check may still use them. The archive is
+        read again by the next check."""
+        with self._lock:
+            archive_keys: list[tuple[str, int, int]] = [self.get_archive_key(archive)] if archive is not None else list(self._package_readers)
+            archive_key: tuple[str, int, int]
+            for archive_key in archive_keys:
+                package_reader: PackageReader | None = self._package_readers.get(archive_key)
+                self.release(archive_key)
+                if package_reader is not None:
+                    package_reader.close()
+        return None
+
+    @instrument
+    def get_package_index(self, archive: str) -> PackageIndex:
+        """Return the index of the archive. The index is built once per archive
+        (identified by its path, size and modification time) over the member table
+        of its reader and reused by every check."""
+        key: tuple[str, int, int] = self.get_archive_key(archive)
+        package_index: PackageIndex | None = self._package_indexes.get(key)
+        if package_index is None:
+            with self._lock:
+                package_index = self._package_indexes.get(key)
+                if package_index is None:
+                    package_index = self._package_indexes[key] = PackageIndex(self.get_package_reader(archive))
+        return package_index
+
+    def get_package_reader(self, archive: str) -> PackageReader:
+        """Return the memory-mapped reader of the archive, which is opened once per archive
+        and shared by every check reading members (also from several threads)."""
+        key: tuple[str, int, int] = self.get_archive_key(archive)
+        package_reader: PackageReader | None = self._package_readers.get(key)
+        if package_reader is None:
+            with self._lock:
+                package_reader = self._package_readers.get(key)
+                if package_reader is None:
+                    package_reader = self._package_readers[key] = PackageReader(key[0])
+        return package_reader
+
+    def get_archive_key(self, archive: str) -> tuple[str, int, int]:
+        """Return path, size and modification time of the archive, which identify it in the caches of the checker."""
+        archive_path: str = get_archive_path(archive)
+        archive_stat: os.stat_result = os.stat(archive_path)
+        return archive_path, archive_stat.st_size, archive_stat.st_mtime_ns
+
+    def get_catalog_member(self, archive: str) -> str | None:
+        """Return the path of the META-INF/catalog.xml file of the archive, if there is one."""
+        top_level_node: PackageNode | None = self.get_package_index(archive).top_level_dir()
+        catalog_node: PackageNode | None = top_level_node.find("META-INF/catalog.xml") if top_level_node is not None else None
+        return catalog_node.path() if catalog_node is not None and not catalog_node.is_dir() else None
+
+    @instrument
+    def get_catalog_resolver(self, archive: str) -> CatalogResolver | None:
+        """Return the resolver of the META-INF/catalog.xml file of the archive (None if there is no
+        catalog). The catalog is parsed once per archive, its rewrite prefixes are package paths."""
+        key: tuple[str, int, int] = self.get_archive_key(archive)
+        if key not in self._catalog_resolvers:
+            with self._lock:
+                if key not in self._catalog_resolvers:
+                    catalog_member: str | None = self.get_catalog_member(archive)
+                    catalog_resolver: CatalogResolver | None = None
+                    if catalog_member is not None:
+                        catalog_resolver = self.check_member_stream(archive, catalog_member,
+                                                                    lambda catalog_stream: CatalogResolver.from_stream(catalog_stream, catalog_member))
+                    self._catalog_resolvers[key] = catalog_resolver
+        return self._catalog_resolvers[key]
+
+    def set_catalog_resolver(self, archive: str, catalog_resolver: CatalogResolver) -> CatalogResolver:
+        """Keep the resolver of the catalog of the archive for get_catalog_resolver(), unless
+        there is one already, and return the kept resolver."""
+        with self._lock:
+            return self._catalog_resolvers.setdefault(self.get_archive_key(archive), catalog_resolver)
+
+    def _message(self, msg: str, color: str = Fore.YELLOW) -> None:
+        """Collect a message of a check and print it unless the checker is quiet."""
+        self.messages.append(msg.strip())
+        if not self.quiet:
+            print_color_msg(msg,color)
         return None
 
-    def has_zip_format(self, archive: str) -> bool:
+    def _member(self, member: str | None) -> None:
+        """Collect the member a failing check is about, checks of the whole package collect none."""
+        if member is not None and member not in self.members:
+            self.members.append(member)
+        return None
+
+    def check_case_sensitivity(self, archive: str) -> bool:
+        """Standard description: 'A Conformant Processor MUST treat all filenames prescribed by this
+        specification as being case-sensitive.'
+
+        Members which differ in case only are distinct in the package, but overwrite each other
+        when the package is extracted on a case-insensitive volume (see check_member_paths())."""
+        return self.check_member_paths(archive, {CASE_COLLISION})
+
+    @instrument
+    def check_member_paths(self, archive: str, problems: set[str] | None = None) -> bool:
+        """Check the member names of the central directory in one pass: absolute paths, '..'
+        components, backslash separators, names differing in case only and names stored more than
+        once are reported (or only the given problems), before anything is extracted."""
+        package_index: PackageIndex = self.get_package_index(archive)
+        is_valid: bool = True
+        problem: str
+        name: str
+        other: str | None
+        for problem, name, other in scan_member_paths(package_index):
+            if problems is None or problem in problems:
+                self._message(f"    {MEMBER_PATH_PROBLEMS[problem].format(name=name, other=other)}")
+                self._member(name)
+                is_valid = False
+        if problems is None:
+            for name in package_index.duplicates:
+                self._message(f"    Member {name} is stored more than once")
+                self._member(name)
+                is_valid = False
+        return is_valid
+
+    @instrument
+    def has_zip_format(self, archive: str, verify_crc: bool = False, workers: int | None = None, max_total_size: int = MAX_TOTAL_SIZE,
+                       max_compression_ratio: int = MAX_COMPRESSION_RATIO, max_entry_count: int = MAX_ENTRY_COUNT) -> bool:
         """Standard description: 'A Taxonomy Package MUST conform to the .ZIP File Format
-        Specification [ZIP]'"""
-        if archive.endswith(".zip"):
-            return True
-        else:
+        Specification [ZIP]'
+
+        The end of central directory record and the central directory are read (without
+        touching the member data) and the declared sizes are checked against the limits,
+        so a corrupt or hostile package is rejected before it is extracted. If verify_crc
+        is set, the data of every member is decompressed and checked against its CRC-32."""
+        if not archive.endswith(".zip"):
             return False
+        try:
+            # the reader is kept, so the central directory is read only once for all checks
+            package_reader: PackageReader = self.get_package_reader(archive)
+        except BadZipFile as e:
+            self._message(f"    Archive {os.path.basename(archive)} cannot be read as ZIP: {e}")
+            return False
+        problems: list[tuple[str | None, str]] = check_limits(package_reader, max_total_size, max_compression_ratio, max_entry_count)
+        if verify_crc and not problems:
+            problems = verify_members(package_reader, workers)
+        member: str | None
+        problem: str
+        for member, problem in problems:
+            self._message(f"    {problem}")
+            self._member(member)
+        return not problems
 
+    @instrument
     def has_top_level_single_dir(self, archive: str) -> bool:
         """Standard description: 'A Taxonomy Package MUST contain a single top-level directory, with all other files being
         contained within that directory or descendant subdirectories (tpe:invalidDirectoryStructure).'"""
-        archive_res: str = os.path.dirname(os.path.abspath(__file__)) + os.path.abspath(archive.replace("\\", "/").replace("..",""))
-        zip_file: ZipFile
-        with ZipFile(archive_res, "r") as zip_file:
-            top_dir: set = {item.split('/')[0] for item in zip_file.namelist()}
-            if len(top_dir) == 1:
-                return True
-            else:
-                return False
-
-    def validate_xml(self, schemafile: str, example: ET.ElementTree) -> bool:
+        if self.get_package_index(archive).top_level_dir() is not None:
+            return True
+        else:
+            return False
+
+    @instrument
+    def validate_xml(self, schemafile: str, example: str | IO[bytes]) -> bool:
         """Standard description: 'The taxonomyPackage.xml MUST conform to the taxonomy-package.xsd
         schema (Appendix B.1) (tpe:invalidMetaDataFile).
         
         If present, the catalog.xml file MUST be a valid XML Catalog file, as defined by the XML Catalog specification
         [XML Catalogs] and MUST also conform to the restricted schema defined by this specification (see Appendix B.2)
-        (tpe:invalidCatalogFile).'"""
+        (tpe:invalidCatalogFile).'
+        
+        The document (a path or a binary stream, e.g. a ZIP member) is validated while it is parsed
+        incrementally, so memory is bounded by the depth of the document rather than its size."""
         try:
-            xml_document: ET.ElementTree = etree.parse(example)
-            xml_schema = etree.XMLSchema(file = schemafile)
-            if xml_schema.assertValid(xml_document):
-                return True
+            xml_schema: etree.XMLSchema = get_xml_schema(schemafile)
+            element: etree._Element
+            for _, element in etree.iterparse(example, events=("end",), schema=xml_schema):
+                # drop processed elements, they are not needed after validation
+                element.clear(keep_tail=True)
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+            return True
         except etree.XMLSchemaError as schema_error:
-            print_color_msg(f"    XML Schema Error: {schema_error}",Fore.YELLOW)
-        except etree.DocumentInvalid as document_invalid:
-            print_color_msg(f"    Document Invalid: {document_invalid}",Fore.YELLOW)
+            self._message(f"    XML Schema Error: {schema_error}")
+        except etree.XMLSyntaxError as document_invalid:
+            self._message(f"    Document Invalid: {document_invalid}")
         except Exception as e:
-            print_color_msg(f"    An error occurred: {e}",Fore.YELLOW)
-        return False         
+            self._message(f"    An error occurred: {e}")
+        return False
+
+    @instrument
+    def validate_package_member(self, archive: str, member: str, schemafile: str) -> bool:
+        """Validate a single member of the archive against a schema. The member
+        is streamed from the ZIP, nothing is extracted to disk."""
+        return self.check_member(archive, member, f"validateXml {schemafile}", lambda member_stream: self.validate_xml(schemafile, member_stream))
+
+    def check_member(self, archive: str, member: str, check_name: str, check: Callable[[IO[bytes]], bool]) -> bool:
+        """Run a document-level check on a member streamed from the archive. If the member
+        did not change since the previous version (same CRC-32 in the central directory),
+        the result of the previous version is inherited instead."""
+        result: bool | None = self.get_previous_result(archive, member, check_name)
+        if result is None:
+            first_message: int = len(self.messages)
+            result = self.check_member_stream(archive, member, check)
+            self.set_member_result(archive, member, check_name, result, self.messages[first_message:])
+        if not result:
+            self._member(member)
+        return result
+
+    def get_previous_result(self, archive: str, member: str, check_name: str) -> bool | None:
+        """Return the result of a check of the previous version (and emit its messages again),
+        or None if there is no manifest or the member changed (see check_member())."""
+        if self.manifest is None:
+            return None
+        package_index: PackageIndex = self.get_package_index(archive)
+        member_key: str = self.manifest.get_member_key(package_index, member)
+        previous_result: tuple[bool, list[str]] | None = self.manifest.get(member_key, package_index.entries[member].crc, check_name)
+        if previous_result is None:
+            return None
+        msg: str
+        for msg in previous_result[1]:
+            self._message(f"    {msg}")
+        self._message(f"    {member_key} is unchanged, result of the previous version inherited")
+        return previous_result[0]
+
+    def set_member_result(self, archive: str, member: str, check_name: str, result: bool, messages: list[str]) -> None:
+        """Record the result of a check in the manifest of the version being checked (see check_member())."""
+        if self.manifest is not None:
+            package_index: PackageIndex = self.get_package_index(archive)
+            self.manifest.set(self.manifest.get_member_key(package_index, member), package_index.entries[member].crc, check_name, result, messages)
+        return None
+
+    def check_member_stream(self, archive: str, member: str, check: Callable[[IO[bytes]], bool]) -> bool:
+        """Run a check on a member streamed from the archive."""
+        member_stream: IO[bytes]
+        with self.get_package_reader(archive).open(member, "r") as member_stream:
+            return check(member_stream)
+
+    @instrument
+    def validate_package(self, archive: str) -> bool:
+        """Read-only validation of the package metadata files. The META-INF/taxonomyPackage.xml
+        file and, if present, the META-INF/catalog.xml file are validated straight from the
+        archive, so checking a package needs neither scratch disk nor a full extraction."""
+        package_index: PackageIndex = self.get_package_index(archive)
+        if self.manifest is not None:
+            changed: int
+            total: int
+            changed, total = self.manifest.add_package(package_index)
+            self._message(f"    {changed} of {total} members changed since the previous version")
+        top_level_node: PackageNode | None = package_index.top_level_dir()
+        if top_level_node is None:
+            return False
+        taxonomy_package_node: PackageNode | None = top_level_node.find("META-INF/taxonomyPackage.xml")
+        if taxonomy_package_node is None:
+            return False
+        is_valid: bool = self.validate_package_member(archive, taxonomy_package_node.path(), TAXONOMY_PACKAGE_XSD)
+        catalog_node: PackageNode | None = top_level_node.find("META-INF/catalog.xml")
+        if catalog_node is not None:
+            is_valid = self.validate_package_member(archive, catalog_node.path(), TAXONOMY_PACKAGE_CATALOG_XSD) and is_valid
+        return is_valid
 
+    @instrument
     def has_meta_inf_folder(self, archive: str, folder_name: str = "META-INF") -> bool:
         """Standard description: 'The top-level directory MUST contain a sub directory named META-INF.'"""
-        zipfilepath: str = os.path.dirname(os.path.abspath(__file__)) + os.path.abspath(str(archive).replace("\\", "/").replace("..",""))
-        zip_file: ZipFile
-        with ZipFile(zipfilepath, 'r') as zip_file:
-            archive_contents = zip_file.namelist()
-            for folder in archive_contents:
-                if folder_name in folder:
-                    return True
-                else:
-                    continue
-            return False
+        # like the original check, any member path containing the folder name is accepted
+        return self.get_package_index(str(archive)).find_path_containing(folder_name) is not None
 
+    @instrument
     def has_taxonomy_package_xml(self, archive: str, tp_file: str = "taxonomyPackage.xml") -> bool:
         """Standard description: 'The top-level directory MUST contain a taxonomyPackage.xml file.'"""
-        zip_file_path: str = os.path.dirname(os.path.abspath(__file__)) + os.path.abspath(archive.replace("\\", "/").replace("..",""))
-        zip_file: ZipFile
-        with ZipFile(zip_file_path, 'r') as zip_file:
-            archive_contents: object = zip_file.namelist()
-            for folder in archive_contents:
-                if tp_file in folder:
-                    return True
-                else:
-                    continue
+        if self.get_package_index(archive).find_basename(tp_file):
+            return True
+        else:
             return False
 
+    @instrument
     def has_catalog_xml(self, archive, catalog_file: str = "catalog.xml") -> bool:
         """Standard description: 'The top-level directory MUST ontain a catalog.xml file
         
         A Taxonomy Package MUST NOT include a catalog file which includes more than one rewriteURI element
         with the same value (after performing URI Normalization, as prescribed by the XML Catalog Specification)
         for the @uriStartString attribute (tpe:multipleRewriteURIsForStartString).'"""
-        zipfilepath: str = os.path.dirname(os.path.abspath(__file__)) + os.path.abspath(archive.replace("\\", "/").replace("..",""))
-        zip_file: ZipFile
-        with ZipFile(zipfilepath, 'r') as zip_file:
-            archive_contents = zip_file.namelist()
-            for folder in archive_contents:
-                if catalog_file in folder:
-                    return True
-                else:
-                    continue
+        if self.get_package_index(archive).find_basename(catalog_file):
+            return True
+        else:
             return False
 
-    # TODO: Further development and testing needed. It is assumed though that the
-    # xml base resolution is valid, because providers test the package as well.
-    def check_rel_url_base_resolution(self, file: str, base_url: str) -> bool:
+    @instrument
+    def has_unique_rewrite_uris(self, archive: str) -> bool:
+        """Standard description: 'A Taxonomy Package MUST NOT include a catalog file which includes more than
+        one rewriteURI element with the same value (after performing URI Normalization, as prescribed by the
+        XML Catalog Specification) for the @uriStartString attribute (tpe:multipleRewriteURIsForStartString).'"""
+        catalog_member: str | None = self.get_catalog_member(archive)
+        if catalog_member is None:
+            return True
+
+        def check_unique_rewrite_uris(catalog_stream: IO[bytes]) -> bool:
+            # the resolver is kept, so the catalog is parsed only once
+            catalog_resolver: CatalogResolver = self.set_catalog_resolver(archive, CatalogResolver.from_stream(catalog_stream, catalog_member))
+            uri_start_string: str
+            for uri_start_string in catalog_resolver.duplicates:
+                self._message(f"    Multiple rewriteURI elements for start string '{uri_start_string}'")
+            return not catalog_resolver.duplicates
+        return self.check_member(archive, catalog_member, "uniqueRewriteURIs", check_unique_rewrite_uris)
+
+    @instrument
+    def check_rel_url_base_resolution(self, document: str | bytes | IO[bytes], base_url: str) -> bool:
         """Standard description: 'Relative URLs MUST undergo XML Base resolution [XML Base].
         More info here: https://www.w3.org/TR/xmlbase/#syntax
         
@@ -151,53 +442,157 @@ class TPChecker:
         "Hot Pick #2" resolves to the URI "http://example.org/hotpicks/pick2.xml"
         "Hot Pick #3" resolves to the URI "http://example.org/hotpicks/pick3.xml"
         '"""
-        def resolve_xml_base(file, base_url):
-            root: ET.Element = ET.fromstring(file)
-            elements_to_resolve: list[ET.Element] = root.findall('.//*[@xlink:href or @xml:base]')
-            for element in elements_to_resolve:
-                if 'xlink:href' in element.attrib:
-                    element.attrib['xlink:href'] = urljoin(base_url, element.attrib['xlink:href'])
-                if 'xml:base' in element.attrib:
-                    element.attrib['xml:base'] = urljoin(base_url, element.attrib['xml:base'])
-            return ET.tostring(root).decode()
-
-        if resolve_xml_base(file, base_url):
-            return True
-        else:
+        if isinstance(document, (str, bytes)):
+            document = BytesIO(document.encode("utf-8") if isinstance(document, str) else document)
+        try:
+            self.xml_base_resolver.resolve_document(document, base_url)
+        except etree.XMLSyntaxError as e:
+            self._message(f"    Document {base_url} is not well-formed: {e}")
+            return False
+        except ValueError as e:
+            self._message(f"    Relative URL of document {base_url} cannot be resolved: {e}")
             return False
+        return True
 
     # TODO: Further development and testing needed. It is assumed though that the
     # entry point check is valid, because providers test the package as well.
+    @instrument
     def check_entry_point_location(self, input_document: str) -> bool:
         """Standard description: 'A Conformant Processor MUST refuse to open any entry point where one or more of
         its <tp:entryPointDocument> URLs resolve to anything other than a taxonomy schema or linkbase document.'"""
-        def is_taxonomy_schema(input_document: str) -> bool:
-            try:
-                root: ET.Element = ET.fromstring(input_document)
-                app_info_elems: list[ET.Element] = root.findall(".//{http://www.w3.org/2001/XMLSchema}appinfo")
-                if app_info_elems:
-                    return True
-                else:
-                    return False
-            except ET.ParseError as e:
-                print_color_msg(f"ERROR: Parsing XML file {e} went wrong!",Fore.RED)
-                return False
-
-        def is_linkbase_document(input_document: str) -> bool:
-            try:
-                root: ET.Element = ET.fromstring(input_document)
-                linkbase_elements: list[ET.Element] = root.findall(".//{http://www.xbrl.org/2003/linkbase}linkbase")
-                if linkbase_elements:
-                    return True
-                else:
-                    return False
-            except ET.ParseError as e:
-                print(f"Error parsing XML: {e}")
-                return False
-
-        if is_taxonomy_schema(input_document) or is_linkbase_document(input_document):
-            print(f"{input_document} is a taxonomy document.")
+        try:
+            root_tag: str | None = sniff_root_element(BytesIO(input_document.encode("utf-8")))
+        except etree.XMLSyntaxError as e:
+            self._message(f"ERROR: Parsing XML file {e} went wrong!",Fore.RED)
+            return False
+        if root_tag in TAXONOMY_DOCUMENT_ROOTS:
+            self._message(f"{input_document} is a taxonomy document.")
             return True
         else:
-            print(f"{input_document} is not a taxonomy document.")
+            self._message(f"{input_document} is not a taxonomy document.")
             return False
+
+    def get_taxonomy_package_member(self, archive: str) -> str | None:
+        """Return the path of the META-INF/taxonomyPackage.xml file of the archive, if there is one."""
+        top_level_node: PackageNode | None = self.get_package_index(archive).top_level_dir()
+        taxonomy_package_node: PackageNode | None = top_level_node.find("META-INF/taxonomyPackage.xml") if top_level_node is not None else None
+        return taxonomy_package_node.path() if taxonomy_package_node is not None else None
+
+    @instrument
+    def get_entry_point_urls(self, archive: str) -> list[tuple[str, str]]:
+        """Return the href of every tp:entryPointDocument of the META-INF/taxonomyPackage.xml file
+        and its URL (relative URLs are resolved against the taxonomyPackage.xml file)."""
+        taxonomy_package_member: str | None = self.get_taxonomy_package_member(archive)
+        if taxonomy_package_member is None:
+            return []
+
+        def read_entry_point_documents(taxonomy_package_stream: IO[bytes]) -> list[str]:
+            hrefs: list[str] = []
+            element: etree._Element
+            for _, element in etree.iterparse(taxonomy_package_stream, no_network=True, resolve_entities=False):
+                if element.tag == f"{{{TAXONOMY_PACKAGE_NS}}}entryPointDocument":
+                    hrefs.append(element.get("href", ""))
+                element.clear()
+            return hrefs
+        href: str
+        return [(href, urljoin(taxonomy_package_member, href)) for href in self.check_member_stream(archive, taxonomy_package_member, read_entry_point_documents)]
+
+    def get_entry_point_documents(self, archive: str) -> list[tuple[str, str]]:
+        """Return the href of every tp:entryPointDocument of the META-INF/taxonomyPackage.xml file
+        and the path it resolves to through the catalog."""
+        catalog_resolver: CatalogResolver | None = self.get_catalog_resolver(archive)
+        href: str
+        url: str
+        return [(href, catalog_resolver.resolve(url) if catalog_resolver is not None else url) for href, url in self.get_entry_point_urls(archive)]
+
+    @instrument
+    def check_entry_points(self, archive: str, workers: int | None = None) -> bool:
+        """Check that every tp:entryPointDocument URL resolves to a taxonomy schema or linkbase
+        document of the package (see check_entry_point_location()). Documents are classified by
+        their root element only, the members are read concurrently on a thread pool."""
+        entry_point_documents: list[tuple[str, str]] = self.get_entry_point_documents(archive)
+        package_index: PackageIndex = self.get_package_index(archive)
+        # documents which changed since the previous version (or all of them) are sniffed
+        members: list[str] = []
+        is_valid: bool = True
+        href: str
+        member: str
+        for href, member in entry_point_documents:
+            if member not in package_index.entries or package_index.entries[member].is_dir:
+                # the entry point refers to no member, so the taxonomyPackage.xml file is reported
+                self._message(f"    Entry point document {href} is not part of the package")
+                self._member(self.get_taxonomy_package_member(archive))
+                is_valid = False
+            elif member not in members:
+                previous_result: bool | None = self.get_previous_result(archive, member, "entryPointDocument")
+                if previous_result is None:
+                    members.append(member)
+                else:
+                    if not previous_result:
+                        self._member(member)
+                    is_valid = previous_result and is_valid
+        root_tags: dict[str, str | None] = {}
+        if members:
+            package_reader: PackageReader = self.get_package_reader(archive)
+            executor: ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+
+                def sniff_member(member: str) -> str | None:
+                    member_stream: IO[bytes]
+                    with package_reader.open(member, "r") as member_stream:
+                        try:
+                            return sniff_root_element(member_stream)
+                        except etree.XMLSyntaxError:
+                            return None
+                # the members are sniffed in the context of the check, so their profiling stages are recorded
+                context: contextvars.Context = contextvars.copy_context()
+                root_tags = dict(zip(members, executor.map(lambda member: context.copy().run(sniff_member, member), members)))
+        for href, member in entry_point_documents:
+            if member not in root_tags:
+                continue
+            root_tag: str | None = root_tags.pop(member)
+            messages: list[str] = []
+            if root_tag not in TAXONOMY_DOCUMENT_ROOTS:
+                messages.append(f"Entry point document {href} is neither a taxonomy schema nor a linkbase")
+                self._message(f"    {messages[-1]}")
+                self._member(member)
+            self.set_member_result(archive, member, "entryPointDocument", not messages, messages)
+            is_valid = not messages and is_valid
+        return is_valid
+
+    def get_dts_graph(self, archive: str) -> DTSGraph:
+        """Return the DTS graph of all entry points of the archive. The graph is discovered
+        once per archive and reused, e.g. by checks working on the documents of the DTS."""
+        archive_key: tuple[str, int, int] = self.get_archive_key(archive)
+        if archive_key not in self._dts_graphs:
+            with self._lock:
+                if archive_key not in self._dts_graphs:
+                    entry_point_urls: list[str] = [url for _, url in self.get_entry_point_urls(archive)]
+                    dts_walker: DTSWalker = DTSWalker(self.get_package_reader(archive), self.get_package_index(archive), self.get_catalog_resolver(archive))
+                    self._dts_graphs[archive_key] = dts_walker.walk(entry_point_urls)
+        return self._dts_graphs[archive_key]
+
+    @instrument
+    def check_dts(self, archive: str) -> bool:
+        """Check that the Discoverable Taxonomy Sets of the entry points can be discovered within
+        the package: every referenced document which resolves into the package (directly or through
+        the catalog) must be a member and well-formed. References to documents outside of the package
+        (e.g. the XBRL specification schemas or taxonomies the package depends on) are reported only."""
+        dts_graph: DTSGraph = self.get_dts_graph(archive)
+        is_valid: bool = True
+        outside_package: int = 0
+        node_id: int
+        for node_id in range(len(dts_graph)):
+            status: int = dts_graph.status[node_id]
+            if status == OUTSIDE_PACKAGE:
+                outside_package += 1
+            elif status != IN_PACKAGE:
+                referrer_id: int | None = dts_graph.referrer(node_id)
+                referrer: str = f" (referenced by {dts_graph.urls[referrer_id]})" if referrer_id is not None else ""
+                problem: str = "is not part of the package" if status == MISSING else "is not well-formed"
+                self._message(f"    Document {dts_graph.urls[node_id]} {problem}{referrer}")
+                # a missing document is reported with the member referring to it
+                self._member(dts_graph.members[referrer_id] if status == MISSING and referrer_id is not None else dts_graph.members[node_id])
+                is_valid = False
+        self._message(f"    DTS has {len(dts_graph) - outside_package} documents in the package, {outside_package} outside of the package")
+        return is_valid
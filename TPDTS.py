@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""DTS.py
+
+Provides the discovery of the Discoverable Taxonomy Set (DTS) of the
+entry points of an XBRL Taxonomy Package. References are followed
+through the catalog into the members of the package, every member is
+parsed at most once and the dependencies are stored as compact graph.
+"""
+
+from array import array
+from lxml import etree
+from typing import IO, Iterator
+from urllib.parse import unquote, urlsplit
+from TPCatalog import CatalogResolver, normalize_uri
+from TPPackage import PackageIndex
+from TPReader import PackageReader
+from TPXmlBase import UrlTable, XLINK_HREF, XmlBaseResolver
+
+XSD_NS: str = "http://www.w3.org/2001/XMLSchema"
+# schema elements whose schemaLocation attribute is followed
+SCHEMA_REFERENCES: frozenset[str] = frozenset({f"{{{XSD_NS}}}import", f"{{{XSD_NS}}}include", f"{{{XSD_NS}}}redefine"})
+
+# status of a document of the DTS
+IN_PACKAGE: int = 0
+OUTSIDE_PACKAGE: int = 1
+MISSING: int = 2
+INVALID: int = 3
+
+def get_references(url_table: UrlTable) -> tuple[str, ...]:
+    """Return the URLs of the documents a document refers to (xs:import, xs:include and xs:redefine
+    schema locations and all xlink:href attributes, i.e. linkbaseRef, loc, roleRef and arcroleRef)
+    in document order. References within the document itself are left out."""
+    references: dict[str, None] = {}
+    row: int
+    for row in range(len(url_table)):
+        if url_table.attributes[row] != XLINK_HREF and url_table.tags[row] not in SCHEMA_REFERENCES:
+            continue
+        if url_table.values[row].startswith("#") or url_table.urls[row] == url_table.document_url:
+            continue
+        references[url_table.urls[row]] = None
+    return tuple(references)
+
+class DTSGraph:
+    """The documents of the DTS of one or more entry points and their references. Documents are
+    identified by integer ids, the references are stored as adjacency arrays: the references
+    of document i are targets[starts[i]:ends[i]]."""
+    def __init__(self) -> None:
+        """class constructor"""
+        self.urls: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.members: list[str | None] = []
+        self.status: bytearray = bytearray()
+        self.starts: array = array("i")
+        self.ends: array = array("i")
+        self.targets: array = array("i")
+        self.entry_points: array = array("i")
+        # the first document referring to each document, built on first use (see referrer())
+        self._referrers: array | None = None
+        return None
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def add_node(self, url: str, member: str | None, status: int) -> int:
+        """Add a document and return its id."""
+        node_id: int = len(self.urls)
+        self.urls.append(url)
+        self.ids[url] = node_id
+        self.members.append(member)
+        self.status.append(status)
+        self.starts.append(0)
+        self.ends.append(0)
+        self._referrers = None
+        return node_id
+
+    def references(self, node_id: int) -> array:
+        """Return the ids of the documents the document refers to."""
+        return self.targets[self.starts[node_id]:self.ends[node_id]]
+
+    def reachable(self, node_id: int) -> Iterator[int]:
+        """Yield the ids of all documents of the DTS of a document (including itself)."""
+        visited: bytearray = bytearray(len(self.urls))
+        visited[node_id] = 1
+        stack: list[int] = [node_id]
+        while stack:
+            current_id: int = stack.pop()
+            yield current_id
+            target_id: int
+            for target_id in self.targets[self.starts[current_id]:self.ends[current_id]]:
+                if not visited[target_id]:
+                    visited[target_id] = 1
+                    stack.append(target_id)
+
+    def referrer(self, node_id: int) -> int | None:
+        """Return the id of a document referring to the document (the first one in id order).
+        The referrers of all documents are collected in one pass over the references when the
+        first one is asked for, so the graph must be complete by then."""
+        if self._referrers is None:
+            self._referrers = array("i", [-1]) * len(self.urls)
+            source_id: int
+            for source_id in range(len(self.urls) - 1, -1, -1):
+                target_id: int
+                for target_id in self.targets[self.starts[source_id]:self.ends[source_id]]:
+                    self._referrers[target_id] = source_id
+        referrer_id: int = self._referrers[node_id]
+        return referrer_id if referrer_id >= 0 else None
+
+class DTSWalker:
+    """Discovers the DTS of entry points within a package. Documents are parsed once and
+    their references are kept in a document cache shared by all entry points."""
+    def __init__(self, package_reader: PackageReader, package_index: PackageIndex, catalog_resolver: CatalogResolver | None = None) -> None:
+        """class constructor"""
+        self.package_reader = package_reader
+        self.package_index = package_index
+        self.catalog_resolver = catalog_resolver
+        self.xml_base_resolver: XmlBaseResolver = XmlBaseResolver()
+        # references of every parsed member (None if the member could not be parsed)
+        self.documents: dict[str, tuple[str, ...] | None] = {}
+        return None
+
+    def resolve(self, url: str) -> tuple[str | None, int]:
+        """Return the member a url resolves to (through the catalog) and the status of the document."""
+        resolved_url: str = self.catalog_resolver.resolve(url) if self.catalog_resolver is not None else normalize_uri(url)
+        if urlsplit(resolved_url).scheme:
+            return None, OUTSIDE_PACKAGE
+        member: str = unquote(resolved_url)
+        entry = self.package_index.entries.get(member)
+        if entry is None or entry.is_dir:
+            return member, MISSING
+        return member, IN_PACKAGE
+
+    def get_references(self, member: str, document_url: str) -> tuple[str, ...] | None:
+        """Return the (resolved and normalized) references of a member, which is parsed on first
+        use only. Relative references are resolved with XML Base against the document URL."""
+        if member not in self.documents:
+            member_stream: IO[bytes]
+            try:
+                with self.package_reader.open(member, "r") as member_stream:
+                    url_table: UrlTable = self.xml_base_resolver.resolve_document(member_stream, document_url)
+                reference: str
+                self.documents[member] = tuple(normalize_uri(reference) for reference in get_references(url_table))
+            except etree.XMLSyntaxError:
+                self.documents[member] = None
+        return self.documents[member]
+
+    def walk(self, entry_point_urls: list[str], graph: DTSGraph | None = None) -> DTSGraph:
+        """Discover the DTS of all entry points (absolute URLs or package paths) into one graph.
+        Relative references are resolved against the (XML Base) URL of the referring document."""
+        if graph is None:
+            graph = DTSGraph()
+        pending: list[int] = []
+        url: str
+        for url in entry_point_urls:
+            url = normalize_uri(url)
+            if url not in graph.ids:
+                pending.append(graph.add_node(url, *self.resolve(url)))
+            graph.entry_points.append(graph.ids[url])
+        while pending:
+            node_id: int = pending.pop()
+            member: str | None = graph.members[node_id]
+            if graph.status[node_id] != IN_PACKAGE:
+                continue
+            references: tuple[str, ...] | None = self.get_references(member, graph.urls[node_id])
+            if references is None:
+                graph.status[node_id] = INVALID
+                continue
+            # the references of a document are stored contiguously
+            graph.starts[node_id] = len(graph.targets)
+            target_url: str
+            for target_url in references:
+                target_id: int | None = graph.ids.get(target_url)
+                if target_id is None:
+                    target_id = graph.add_node(target_url, *self.resolve(target_url))
+                    pending.append(target_id)
+                graph.targets.append(target_id)
+            graph.ends[node_id] = len(graph.targets)
+        return graph
@@ -9,37 +9,235 @@ xbrl taxonomy packages based by certain providers.
 
 from abc import ABC, abstractmethod
 import os
-from xml.dom.minidom import parseString
-import xml.etree.ElementTree as ET
+import re
 import zipfile
-from io import TextIOWrapper
 import shutil
-import zipfile
-import os
-from colorama import Fore
-from TPChecker import TPChecker
-from TPMisc import print_color_msg
+import tempfile
+from contextlib import ExitStack
+from functools import partial
+from typing import IO, Callable, Iterable, Iterator
+from TPChecker import TPChecker, TAXONOMY_PACKAGE_XSD, TAXONOMY_PACKAGE_CATALOG_XSD
+from TPMisc import XmlWriter, gen_zip_archive, report_step
+from TPPackage import PackageIndex, PackageNode
+from TPProfile import instrument, stage
+from TPReport import ERROR, Report
+from TPReader import PackageReader
+from TPStore import MemberStore
+from TPZip import COPY_CHUNK_SIZE, DEFAULT_COMPRESSION, copy_reader_member, get_compression, write_member_stream
+
+# generated metadata files, which are validated before they are written
+METADATA_SCHEMAS: dict[str, tuple[str, str]] = {
+    "META-INF/catalog.xml": ("validateCatalogXml", TAXONOMY_PACKAGE_CATALOG_XSD),
+    "META-INF/taxonomyPackage.xml": ("validateTaxonomyPackageXml", TAXONOMY_PACKAGE_XSD),
+}
+
+# names of the EDINET entry points by the prefix of their schema file name
+EDINET_ENTRY_POINT_NAMES: dict[str, str] = {
+    "all": "ALL : All Entry Points",
+    "ifrs": "IFRS : International Financial Reporting Standards",
+    "jpcrp": "JPCRP : Disclosure of Corporate Information",
+    "jpctl": "JPCTL : Internal Control Form No.1 Internal Control Report",
+    "jpdei": "JPDEI : Document and Entity information",
+    "jpigp": "JPIGP : Designed International Accounting Standards",
+    "jplvh": "JPLVH : Large Volume Holding",
+    "jppfs": "JPPFS : Primary Financial Statments",
+    "jpsps": "JPSPS : Disclosure of Information, etc. on Specified Securities",
+    "jptoi": "JPTOI : Tender Offer by Issuer",
+    "jptoo": "JPTOO : Tender Offer by Those Other than Issuer Form",
+}
+EDINET_ENTRY_POINT_PREFIX: re.Pattern = re.compile(r"[a-z]+")
+EDINET_URL: str = "http://disclosure.edinet-fsa.go.jp/"
+
+def walk_folder(source_folder: str) -> Iterator[str]:
+    """Yield the paths of all files below source_folder relative to it, like member paths."""
+    root: str
+    files: list[str]
+    for root, _, files in os.walk(source_folder):
+        relative_root: str = os.path.relpath(root, source_folder).replace(os.sep, "/")
+        prefix: str = "" if relative_root == "." else f"{relative_root}/"
+        file: str
+        for file in files:
+            yield f"{prefix}{file}"
+
+class EDINETIndex:
+    """The publication dates and taxonomy directories of an EDINET package, which
+    are collected in a single pass over its member paths (relative to the top-level
+    directory). The metadata files of the package are generated from the index."""
+    def __init__(self, member_paths: Iterable[str] = ()) -> None:
+        """class constructor"""
+        # entry point schemas (samples/<date>/<file>.xsd) by publication date
+        self.entry_points: dict[str, list[str]] = {}
+        # directories with members, as keys of dicts to keep them unique
+        self.sample_dirs: dict[str, None] = {}
+        self.taxonomy_dirs: dict[str, None] = {}
+        member_path: str
+        for member_path in member_paths:
+            self.add(member_path)
+        return None
+
+    def add(self, member_path: str) -> None:
+        """Add a member path (directories end with '/')."""
+        folder: str
+        rest: str
+        folder, _, rest = member_path.partition("/")
+        if folder == "samples" and "/" in rest:
+            date: str
+            name: str
+            date, _, name = rest.partition("/")
+            self.sample_dirs[date] = None
+            if name.endswith(".xsd") and "/" not in name:
+                self.entry_points.setdefault(date, []).append(name)
+        elif folder == "taxonomy" and rest.count("/") >= 2:
+            parts: list[str] = rest.split("/", 2)
+            self.taxonomy_dirs[f"{parts[0]}/{parts[1]}"] = None
+        return None
 
 class TaxonomyPackageFixerInterface(ABC):
     """The Interface provides methods to fix an
     XBRL Taxonomy Package by a certain provider.
     """
-    def __init__(self, full_path_to_zip: str, destination_folder: str) -> None:
+    def __init__(self, full_path_to_zip: str, destination_folder: str, report: Report | None = None, extract: bool = True,
+                 compression: str = DEFAULT_COMPRESSION, compression_level: int | None = None, store: MemberStore | None = None) -> None:
         """Initialize XBRL Taxonomy Package class. By initializing the class
         the input package is copied over to the ouptut folder and extracted there
-        to comfortably work with the data."""
+        to comfortably work with the data. If extract is False, the package is
+        left untouched and fixed with rewrite_package() instead. If a report is
+        passed, all fix steps are recorded in the report instead of being printed.
+        The compression settings apply to generated and repacked members. If a
+        member store is passed, the package is extracted as links into the store
+        and repacked from it (see TPStore.py)."""
         # set initial variables
         self.full_path_to_zip = full_path_to_zip
         self.destination_folder = destination_folder
+        self.report = report
+        self.compression = compression
+        self.compression_level = compression_level
+        self.store = store
         # create destination folder
         os.makedirs(self.destination_folder, exist_ok=True)
-        # move taxonomy package to destination folder
-        shutil.move(f"{self.full_path_to_zip}.zip", self.destination_folder)
-        # extract at destination
-        with zipfile.ZipFile(os.path.join(self.destination_folder, os.path.basename(full_path_to_zip)+".zip"), 'r') as zip_ref:
-            zip_ref.extractall(self.destination_folder)
+        if extract:
+            with stage("TaxonomyPackageFixerInterface.extract_package"):
+                # move taxonomy package to destination folder
+                shutil.move(f"{self.full_path_to_zip}.zip", self.destination_folder)
+                # extract at destination
+                if self.store is not None:
+                    package_reader: PackageReader
+                    with PackageReader(os.path.join(self.destination_folder, os.path.basename(full_path_to_zip)+".zip")) as package_reader:
+                        added: int
+                        total: int
+                        added, total = self.store.extract_package(package_reader, self.destination_folder)
+                    report_step(self.report, "extractPackage", f"    {total} members extracted, {added} of them added to the member store")
+                else:
+                    with zipfile.ZipFile(os.path.join(self.destination_folder, os.path.basename(full_path_to_zip)+".zip"), 'r') as zip_ref:
+                        zip_ref.extractall(self.destination_folder)
         return None
 
+    @instrument
+    def validate_xml(self, name: str, schemafile: str, xml_file: str | IO[bytes], member: str | None = None) -> bool:
+        """Validate a generated metadata file and record the result in the report."""
+        tp_checker: TPChecker = TPChecker(quiet=self.report is not None)
+        if self.report is None:
+            return tp_checker.validate_xml(schemafile, xml_file)
+        if member is None:
+            member = os.path.relpath(xml_file, self.destination_folder)
+        return self.report.check(name, tp_checker.validate_xml, schemafile, xml_file,
+                                 passed_msg=f"{os.path.basename(member)} is valid", failed_msg=f"{os.path.basename(member)} is not valid",
+                                 member=member, messages=tp_checker.messages)
+
+    def gen_metadata_files(self, member_paths: Iterable[str]) -> dict[str, Callable[[IO[bytes]], None]]:
+        """Return the metadata files generated for the package, as paths relative to the
+        top-level directory and functions which write their content to a binary stream.
+        member_paths are the paths of all members relative to the top-level directory, they
+        can be iterated once. Nothing is generated by default."""
+        return {}
+
+    @instrument
+    def rewrite_package(self, single_dir: bool) -> str:
+        """Fix the package as streaming ZIP-to-ZIP transform instead of extracting it. Member
+        paths are rewritten (top-level directory insertion, META-INF relocation), unchanged
+        members are copied in their compressed form and generated metadata files are injected.
+        Returns the path of the fixed package."""
+        top_level_name: str = os.path.basename(self.full_path_to_zip)
+        target_zip: str = os.path.join(self.destination_folder, f"{top_level_name}.zip")
+        package_reader: PackageReader
+        with PackageReader(f"{self.full_path_to_zip}.zip") as package_reader:
+            package_index: PackageIndex = PackageIndex(package_reader)
+            package_root: PackageNode | None = package_index.top_level_dir() if single_dir else package_index.root
+            if single_dir:
+                top_level_name = package_root.name
+            # a META-INF folder somewhere below the top-level directory is moved up
+            meta_inf_path: str | None = None
+            if package_root.child("META-INF") is None:
+                meta_inf_nodes: list[PackageNode] = [node for node in package_index.find_basename("META-INF") if node.is_dir()]
+                if len(meta_inf_nodes) == 1:
+                    meta_inf_path = meta_inf_nodes[0].path()
+                    report_step(self.report, "fixMetaInfFolder", f"    META-INF directory relocated")
+            if not single_dir:
+                report_step(self.report, "fixTopLevelSingleDir", f"    Top level directory generated")
+
+            # generate the metadata files from the member paths, before anything is written
+            root_prefix: str = f"{top_level_name}/" if single_dir else ""
+            member_paths: Iterator[str] = (name[len(root_prefix):] for name in map(package_reader.get_name, range(len(package_reader)))
+                                           if name.startswith(root_prefix))
+            metadata_writers: dict[str, Callable[[IO[bytes]], None]] = self.gen_metadata_files(member_paths)
+            metadata_files: dict[str, IO[bytes]] = {}
+            exit_stack: ExitStack
+            with ExitStack() as exit_stack:
+                # large metadata files are spooled to disk instead of being held in memory
+                metadata_path: str
+                write_metadata: Callable[[IO[bytes]], None]
+                for metadata_path, write_metadata in metadata_writers.items():
+                    metadata_file: IO[bytes] = exit_stack.enter_context(tempfile.SpooledTemporaryFile(max_size=COPY_CHUNK_SIZE))
+                    write_metadata(metadata_file)
+                    metadata_file.seek(0)
+                    if metadata_path in METADATA_SCHEMAS:
+                        self.validate_xml(METADATA_SCHEMAS[metadata_path][0], METADATA_SCHEMAS[metadata_path][1], metadata_file, metadata_path)
+                        metadata_file.seek(0)
+                    metadata_files[metadata_path] = metadata_file
+
+                # write to a temporary file, so a failed run leaves no broken package behind
+                compress_type: int
+                compression_level: int | None
+                compress_type, compression_level = get_compression(self.compression, self.compression_level)
+                target_file: zipfile.ZipFile
+                with zipfile.ZipFile(f"{target_zip}.part", "w") as target_file:
+                    for metadata_path, metadata_file in metadata_files.items():
+                        write_member_stream(target_file, f"{top_level_name}/{metadata_path}", metadata_file, compress_type, compression_level)
+                        report_step(self.report, "genMetadataFile", f"    {os.path.basename(metadata_path)} file generated")
+                    index: int
+                    for index in range(len(package_reader)):
+                        name: str = package_reader.get_name(index)
+                        arcname: str = name if single_dir else f"{top_level_name}/{name}"
+                        if meta_inf_path is not None and name.startswith(meta_inf_path):
+                            arcname = f"{top_level_name}/META-INF/{name[len(meta_inf_path):]}"
+                        if arcname.partition("/")[2] in metadata_files or arcname in target_file.NameToInfo:
+                            continue
+                        copy_reader_member(package_reader, index, target_file, arcname)
+        os.replace(f"{target_zip}.part", target_zip)
+        report_step(self.report, "rewritePackage", f"    Final zip generated")
+        return target_zip
+
+    @instrument
+    def fix_package(self, zip_format: bool, meta_inf_dir: bool, single_dir: bool, top_level_names: list[str]) -> str:
+        """Fix the package extracted into the destination folder (extract mode) according
+        to the results of the checks. top_level_names are the top-level entries of the input
+        package, they are the working folders removed afterwards. Returns the path of the
+        fixed package."""
+        if not zip_format:
+            self.convert_to_zip_archive()
+        if not meta_inf_dir:
+            self.fix_meta_inf_folder()
+        if not single_dir:
+            self.fix_top_level_single_dir()
+
+        # remove the working folder(s) extracted into the output folder
+        top_level_name: str
+        for top_level_name in top_level_names:
+            target_dir: str = os.path.join(self.destination_folder, top_level_name)
+            if os.path.isdir(target_dir):
+                shutil.rmtree(target_dir)
+        return os.path.join(self.destination_folder, f"{os.path.basename(self.full_path_to_zip)}.zip")
+
     @abstractmethod
     def convert_to_zip_archive(self):
         """Returns an xbrl taxonomy package in zip format."""
@@ -75,20 +273,24 @@ class EDINETTaxonomyPackage(TaxonomyPackageFixerInterface):
     The package in input/* folder as well as newer and older versions
     can be found here: https://disclosure2.edinet-fsa.go.jp/weee0020.aspx
     """
+    @instrument
     def convert_to_zip_archive(self) -> None:
         shutil.make_archive(self.full_path_to_zip, 'zip', self.destination_folder)    
         return None
 
+    @instrument
     def fix_top_level_single_dir(self) -> None:
         os.makedirs(os.path.join(self.destination_folder, os.path.basename(self.full_path_to_zip).replace(".zip","")), exist_ok = True)
-        print_color_msg(f"    Top level directory generated",Fore.YELLOW)
+        report_step(self.report, "fixTopLevelSingleDir", f"    Top level directory generated")
         return None
     
+    @instrument
     def fix_meta_inf_folder(self) -> None:
-        os.makedirs(os.path.join(self.destination_folder, "META-INF"))
-        print_color_msg(f"    META-INF directory generated",Fore.YELLOW)
+        os.makedirs(os.path.join(self.destination_folder, "META-INF"), exist_ok=True)
+        report_step(self.report, "fixMetaInfFolder", f"    META-INF directory generated")
         return None
 
+    @instrument
     def restructure_folder(self) -> None:
         for filename in os.listdir(self.destination_folder):
             if filename.endswith(".zip"):
@@ -100,128 +302,143 @@ class EDINETTaxonomyPackage(TaxonomyPackageFixerInterface):
                 folder_name = os.path.join(self.destination_folder, filename)
                 des_folder = os.path.join(self.destination_folder, os.path.basename(self.full_path_to_zip).replace(".zip",""))
                 shutil.move(folder_name, des_folder)
-        print_color_msg(f"    Package content restructured",Fore.YELLOW)
-        return None
-
-    def fix_taxonomy_package_xml(self, source_folder: str) -> None:
-        # set relevant elements and its content for the taxonomyPackage.xml file
-        taxonomy_package_xml_settings: ET.Element = ET.Element('taxonomyPackage')
-        taxonomy_package_xml_settings.set('xml:lang', 'en')
-        taxonomy_package_xml_settings.set('xmlns', 'http://xbrl.org/2016/taxonomy-package')
-        taxonomy_package_xml_settings.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        taxonomy_package_xml_settings.set('xsi:schemaLocation', 'http://xbrl.org/2016/taxonomy-package http://xbrl.org/2016/taxonomy-package.xsd')
-        taxonomy_package_xml_settings.append(ET.Comment('This file and its content has been generated and is not part of the original ZIP.'))
-        # TODO: all strings in variable taxonomy_package_xml_metadata.text shoul dbe created dynamically
-        taxonomy_package_xml_metadata: ET.Element
-        taxonomy_package_xml_metadata = ET.SubElement(taxonomy_package_xml_settings, 'identifier')
-        taxonomy_package_xml_metadata.text = "full/official/path/to/the/packge.zip"
-        taxonomy_package_xml_metadata = ET.SubElement(taxonomy_package_xml_settings, 'name')
-        taxonomy_package_xml_metadata.text = "ALL_2022-11-01.zip"
-        taxonomy_package_xml_metadata = ET.SubElement(taxonomy_package_xml_settings, 'description')
-        taxonomy_package_xml_metadata.text = "The ALL-2022-11-01 Taxonomy Package provided by the JFSA."
-        taxonomy_package_xml_metadata = ET.SubElement(taxonomy_package_xml_settings, 'version')
-        taxonomy_package_xml_metadata.text = "2023"
-        taxonomy_package_xml_metadata = ET.SubElement(taxonomy_package_xml_settings, 'publisher')
-        taxonomy_package_xml_metadata.text = "Japanese Financial Service Agency"
-        taxonomy_package_xml_metadata = ET.SubElement(taxonomy_package_xml_settings, 'publisherURL')
-        taxonomy_package_xml_metadata.text = "https://www.fsa.go.jp/en/"
-        taxonomy_package_xml_metadata = ET.SubElement(taxonomy_package_xml_settings, 'publicationDate')
-        taxonomy_package_xml_metadata.text = "2022-11-01"
-        # entrypoint list is almost generated dynamically
-        entrypoints = ET.SubElement(taxonomy_package_xml_settings, 'entryPoints')
-        file: str
-        # TODO: yyyy-mm-dd should be generated dynamically
-        for file in os.listdir(source_folder + "/samples/2022-11-01"):
-            if file.endswith(".xsd"):
-                taxonomy: ET.Element = ET.SubElement(entrypoints, 'entryPoint')
-                # TODO: if necessary add relevant folder to generate entrypoint list
-                elem: ET.Element = ET.SubElement(taxonomy, 'name')
-                if "all" in os.path.abspath(file):
-                    elem.text = "ALL : All Entry Points"
-                elif "ifrs" in os.path.abspath(file):
-                    elem.text = "IFRS : International Financial Reporting Standards"
-                elif "jpcrp" in os.path.abspath(file):
-                    elem.text = "JPCRP : Disclosure of Corporate Information"
-                elif "jpctl" in os.path.abspath(file):
-                    elem.text = "JPCTL : Internal Control Form No.1 Internal Control Report"
-                elif "jpdei" in os.path.abspath(file):
-                    elem.text = "JPDEI : Document and Entity information"
-                elif "jpigp" in os.path.abspath(file):
-                    elem.text = "JPIGP : Designed International Accounting Standards"
-                elif "jplvh" in os.path.abspath(file):
-                    elem.text = "JPLVH : Large Volume Holding"
-                elif "jppfs" in os.path.abspath(file):
-                    elem.text = "JPPFS : Primary Financial Statments"
-                elif "jpsps" in os.path.abspath(file):
-                    elem.text = "JPSPS : Disclosure of Information, etc. on Specified Securities"
-                elif "jptoi" in os.path.abspath(file):
-                    elem.text = "JPTOI : Tender Offer by Issuer"
-                elif "jptoo" in os.path.abspath(file):
-                    elem.text = "JPTOO : Tender Offer by Those Other than Issuer Form"
-                else:
-                    print("Please integrate new entry point group in script and in template!")
-                    elem.text = "<missingEntry>"
-                    break
-                    
-                elem = ET.SubElement(taxonomy, 'version')
-                elem.text = "2023"
-                ET.SubElement(taxonomy, 'entryPointDocument', { 'href': 'http://disclosure.edinet-fsa.go.jp/samples/' + "self.__get_tp_publication_date()" + '/' + file })
-
-        taxonomy_package_content: str = parseString(ET.tostring(taxonomy_package_xml_settings, 'utf-8')).toprettyxml(indent='    ')
-        taxonomy_package_xml_file: TextIOWrapper
-        with open(os.path.join(source_folder, "META-INF", "taxonomyPackage.xml"), "w", encoding='utf-8') as taxonomy_package_xml_file:
-            taxonomy_package_xml_file.write(taxonomy_package_content)
-        print_color_msg(f"    taxonomyPackage.xml file generated",Fore.YELLOW)
+        report_step(self.report, "restructureFolder", f"    Package content restructured")
+        return None
+
+    @instrument
+    def fix_package(self, zip_format: bool, meta_inf_dir: bool, single_dir: bool, top_level_names: list[str]) -> str:
+        if not zip_format:
+            self.convert_to_zip_archive()
+        if not meta_inf_dir:
+            self.fix_meta_inf_folder()
+        if not single_dir:
+            self.fix_top_level_single_dir()
+
+        # prepare variables to work with
+        full_path_to_zip: str = os.path.join(self.destination_folder, f"{os.path.basename(self.full_path_to_zip)}.zip")
+        target_output_dir: str = os.path.join(self.destination_folder, os.path.basename(self.full_path_to_zip))
+
+        # restructure the folder strucutre in the package
+        # means moveing taxonomy/, samples/ and META-INF/ folder
+        # in the root directory
+        self.restructure_folder()
+
+        # generate and validate the catalog.xml and taxonomyPackage.xml files,
+        # the restructured folder is walked once for both
+        edinet_index: EDINETIndex = EDINETIndex(walk_folder(target_output_dir))
+        self.fix_catalog_xml(target_output_dir, edinet_index)
+        self.fix_taxonomy_package_xml(target_output_dir, edinet_index)
+
+        # compose zip archive
+        gen_zip_archive(target_output_dir, full_path_to_zip, self.report, self.compression, self.compression_level, self.store)
+
+        # remove the folder next to the fixed zip archive, because
+        # not needed anymore
+        shutil.rmtree(target_output_dir)
+        return full_path_to_zip
+
+    def gen_metadata_files(self, member_paths: Iterable[str]) -> dict[str, Callable[[IO[bytes]], None]]:
+        edinet_index: EDINETIndex = EDINETIndex(member_paths)
+        return {
+            "META-INF/catalog.xml": partial(self.gen_catalog_xml, edinet_index),
+            "META-INF/taxonomyPackage.xml": partial(self.gen_taxonomy_package_xml, edinet_index),
+        }
+
+    def gen_taxonomy_package_xml(self, edinet_index: EDINETIndex, stream: IO[bytes]) -> None:
+        """Write the taxonomyPackage.xml file for the package to a binary stream, with the
+        entry points of all publication dates."""
+        xml_writer: XmlWriter = XmlWriter(stream)
+        xml_writer.declaration()
+        with xml_writer.element('taxonomyPackage', {'xmlns': 'http://xbrl.org/2016/taxonomy-package',
+                                                    'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+                                                    'xml:lang': 'en',
+                                                    'xsi:schemaLocation': 'http://xbrl.org/2016/taxonomy-package http://xbrl.org/2016/taxonomy-package.xsd'}):
+            xml_writer.comment('This file and its content has been generated and is not part of the original ZIP.')
+            # TODO: all strings of the metadata elements should be created dynamically
+            xml_writer.text_element('identifier', "full/official/path/to/the/packge.zip")
+            xml_writer.text_element('name', "ALL_2022-11-01.zip")
+            xml_writer.text_element('description', "The ALL-2022-11-01 Taxonomy Package provided by the JFSA.")
+            xml_writer.text_element('version', "2023")
+            xml_writer.text_element('publisher', "Japanese Financial Service Agency")
+            xml_writer.text_element('publisherURL', "https://www.fsa.go.jp/en/")
+            xml_writer.text_element('publicationDate', "2022-11-01")
+            # the entry points of all publication dates, named by the prefix of their file name
+            with xml_writer.element('entryPoints'):
+                date: str
+                for date in sorted(edinet_index.entry_points):
+                    file: str
+                    for file in sorted(edinet_index.entry_points[date]):
+                        prefix: re.Match | None = EDINET_ENTRY_POINT_PREFIX.match(file)
+                        entry_point_name: str | None = EDINET_ENTRY_POINT_NAMES.get(prefix.group()) if prefix is not None else None
+                        if entry_point_name is None:
+                            report_step(self.report, "fixTaxonomyPackageXml", f"    Please integrate the entry point group of {file} in EDINET_ENTRY_POINT_NAMES!",
+                                        member=f"samples/{date}/{file}")
+                            entry_point_name = "<missingEntry>"
+                        with xml_writer.element('entryPoint'):
+                            xml_writer.text_element('name', entry_point_name)
+                            xml_writer.text_element('version', "2023")
+                            xml_writer.text_element('entryPointDocument', attributes={'href': f'{EDINET_URL}samples/{date}/{file}'})
+        return None
+
+    @instrument
+    def fix_taxonomy_package_xml(self, source_folder: str, edinet_index: EDINETIndex | None = None) -> None:
+        if edinet_index is None:
+            edinet_index = EDINETIndex(walk_folder(source_folder))
+        # an extracted file may be a link into the member store, which must not be written through
+        if os.path.lexists(os.path.join(source_folder, "META-INF", "taxonomyPackage.xml")):
+            os.remove(os.path.join(source_folder, "META-INF", "taxonomyPackage.xml"))
+        taxonomy_package_xml_file: IO[bytes]
+        with open(os.path.join(source_folder, "META-INF", "taxonomyPackage.xml"), "wb") as taxonomy_package_xml_file:
+            self.gen_taxonomy_package_xml(edinet_index, taxonomy_package_xml_file)
+        report_step(self.report, "fixTaxonomyPackageXml", f"    taxonomyPackage.xml file generated")
         # check if taxonomyPackage.xml is an xml file
         if os.path.join(source_folder, "META-INF", "taxonomyPackage.xml").endswith(".xml"):
-            print_color_msg(f"    taxonomyPackage.xml is xml file",Fore.YELLOW)
+            report_step(self.report, "fixTaxonomyPackageXml", f"    taxonomyPackage.xml is xml file")
         else:
-            print_color_msg(f'    ERROR: {os.path.join(source_folder, "META-INF", "taxonomyPackage.xml")} is not an xml file')
+            report_step(self.report, "fixTaxonomyPackageXml", f'    ERROR: {os.path.join(source_folder, "META-INF", "taxonomyPackage.xml")} is not an xml file', ERROR)
         
         # validate taxonomyPackage.xml file
-        check_taxonomy_pkg_xml: TPChecker = TPChecker()
-        check_taxonomy_pkg_xml.validate_xml("http://www.xbrl.org/2016/taxonomy-package.xsd",os.path.join(source_folder, "META-INF", "taxonomyPackage.xml"))
-        return None
-
-    def fix_catalog_xml(self, source_folder: str) -> None:
-        # set relevant elements and its content for the catalog.xml file        
-        catalog_xml_file: ET.Element = ET.Element("catalog")
-        catalog_xml_file.set('xmlns', 'urn:oasis:names:tc:entity:xmlns:xml:catalog')
-        catalog_xml_file.set('xmlns:spy', 'http://www.altova.com/catalog_ext')
-        catalog_xml_file.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        catalog_xml_file.set('xsi:schemaLocation', 'urn:oasis:names:tc:entity:xmlns:xml:catalog Catalog.xsd')
-        # write a path for each entry in "samples"
-        samples_directory: str = f"{ source_folder }/samples"
-        folder_paths: list[str] = [samples_directory.name for samples_directory in os.scandir(samples_directory) if samples_directory.is_dir()]
-        samples_directory: str
-        for samples_directory in folder_paths:
-            ET.SubElement(catalog_xml_file, 'rewriteURI', { 'uriStartString': 'http://disclosure.edinet-fsa.go.jp/samples/' + samples_directory + '/', 'rewritePrefix': '../samples/' + samples_directory + '/' })
-        # write a path for each entry in "taxonomy"
-        taxonomy_directory: str = f"{ source_folder }/taxonomy"
-        list_taxonomy_subdirs: list[str] = [taxonomy_directory.name for taxonomy_directory in os.scandir(taxonomy_directory) if taxonomy_directory.is_dir()]
-        # iterate each folder, located in 'C:\\tmp\\taxonomy'
-        str_taxonomy_subdir: str
-        for str_taxonomy_subdir in list_taxonomy_subdirs:
-            str_taxonomy_ep_shortname_subdir: str = f"{ source_folder }/taxonomy/{ str_taxonomy_subdir }"
-            list_taxonomy_dir_ep_shortname_dir: list[str] = [str_taxonomy_ep_shortname_subdir.name for str_taxonomy_ep_shortname_subdir in os.scandir(str_taxonomy_ep_shortname_subdir) if str_taxonomy_ep_shortname_subdir.is_dir()]
-            ep_shortname_dir_entry: str
-            for ep_shortname_dir_entry in list_taxonomy_dir_ep_shortname_dir:
-                new_path_to_directories: str = f"{ str_taxonomy_subdir }/{ ep_shortname_dir_entry }"
-            # write corresponding path in "catalog.xml"
-            ET.SubElement(catalog_xml_file, 'rewriteURI', { 'uriStartString': 'http://disclosure.edinet-fsa.go.jp/taxonomy/' + new_path_to_directories + '/', 'rewritePrefix': '../taxonomy/' + new_path_to_directories + '/' })
-        catalog_file_content = parseString(ET.tostring(catalog_xml_file, 'utf-8')).toprettyxml(indent='    ')
-        catalog_file: TextIOWrapper
-        with open(os.path.join(source_folder, "META-INF", "catalog.xml"), "w", encoding='utf-8') as catalog_file:
-            catalog_file.write(catalog_file_content)
-        print_color_msg(f"    catalog.xml file generated",Fore.YELLOW)
+        self.validate_xml("validateTaxonomyPackageXml", TAXONOMY_PACKAGE_XSD, os.path.join(source_folder, "META-INF", "taxonomyPackage.xml"))
+        return None
+
+    def gen_catalog_xml(self, edinet_index: EDINETIndex, stream: IO[bytes]) -> None:
+        """Write the catalog.xml file for the package to a binary stream."""
+        xml_writer: XmlWriter = XmlWriter(stream)
+        xml_writer.declaration()
+        with xml_writer.element("catalog", {'xmlns': 'urn:oasis:names:tc:entity:xmlns:xml:catalog',
+                                            'xmlns:spy': 'http://www.altova.com/catalog_ext',
+                                            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+                                            'xsi:schemaLocation': 'urn:oasis:names:tc:entity:xmlns:xml:catalog Catalog.xsd'}):
+            # write a path for each publication date in "samples"
+            samples_directory: str
+            for samples_directory in sorted(edinet_index.sample_dirs):
+                xml_writer.text_element('rewriteURI', attributes={'uriStartString': f'{EDINET_URL}samples/{samples_directory}/',
+                                                                  'rewritePrefix': f'../samples/{samples_directory}/'})
+            # write a path for each publication date of each taxonomy in "taxonomy"
+            taxonomy_directory: str
+            for taxonomy_directory in sorted(edinet_index.taxonomy_dirs):
+                xml_writer.text_element('rewriteURI', attributes={'uriStartString': f'{EDINET_URL}taxonomy/{taxonomy_directory}/',
+                                                                  'rewritePrefix': f'../taxonomy/{taxonomy_directory}/'})
+        return None
+
+    @instrument
+    def fix_catalog_xml(self, source_folder: str, edinet_index: EDINETIndex | None = None) -> None:
+        if edinet_index is None:
+            edinet_index = EDINETIndex(walk_folder(source_folder))
+        # an extracted file may be a link into the member store, which must not be written through
+        if os.path.lexists(os.path.join(source_folder, "META-INF", "catalog.xml")):
+            os.remove(os.path.join(source_folder, "META-INF", "catalog.xml"))
+        catalog_file: IO[bytes]
+        with open(os.path.join(source_folder, "META-INF", "catalog.xml"), "wb") as catalog_file:
+            self.gen_catalog_xml(edinet_index, catalog_file)
+        report_step(self.report, "fixCatalogXml", f"    catalog.xml file generated")
         # check if catalog.xml is an xml file
         if os.path.join(source_folder, "META-INF", "catalog.xml").endswith(".xml"):
-            print_color_msg(f"    catalog.xml is xml file",Fore.YELLOW)
+            report_step(self.report, "fixCatalogXml", f"    catalog.xml is xml file")
         else:
-            print_color_msg(f'    ERROR: {os.path.join(source_folder, "META-INF", "catalog.xml").endswith(".xml")} is not an xml file')        
+            report_step(self.report, "fixCatalogXml", f'    ERROR: {os.path.join(source_folder, "META-INF", "catalog.xml")} is not an xml file', ERROR)
         # validate catalog.xml file
-        check_catalog_xml: TPChecker = TPChecker()
-        check_catalog_xml.validate_xml("http://www.xbrl.org/2016/taxonomy-package-catalog.xsd",os.path.join(source_folder, "META-INF", "catalog.xml"))
+        self.validate_xml("validateCatalogXml", TAXONOMY_PACKAGE_CATALOG_XSD, os.path.join(source_folder, "META-INF", "catalog.xml"))
         return None
 
 class EBATaxonomyPackage(TaxonomyPackageFixerInterface):
@@ -230,20 +447,26 @@ class EBATaxonomyPackage(TaxonomyPackageFixerInterface):
     The package in input/* folder as well as newer and older versions
     can be found here: https://www.eba.europa.eu/risk-analysis-and-data/reporting-frameworks/reporting-framework-3.3
     """    
+    @instrument
     def convert_to_zip_archive(self) -> None:
         return None
 
+    @instrument
     def fix_meta_inf_folder(self) -> None:
         return None
 
+    @instrument
     def fix_top_level_single_dir(self) -> None:
         return None
 
+    @instrument
     def restructure_folder(self) -> None:
         return None
 
+    @instrument
     def fix_taxonomy_package_xml(self) -> None:
         return None
     
+    @instrument
     def fix_catalog_xml(self) -> None:
         return None
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Manifest.py
+
+Provides a per-member manifest of a taxonomy package version: the
+CRC-32 of every member (taken from the ZIP central directory) and the
+results of the document-level checks. When a new version of the
+package is checked, members with an unchanged CRC inherit the results
+of the previous version instead of being checked again.
+"""
+
+import json
+import os
+from typing import Any, IO
+from TPPackage import PackageEntry, PackageIndex, PackageNode
+
+class MemberManifest:
+    """Check results per member of a package version. Member paths are stored relative to
+    the top-level directory, as its name usually changes between versions (e.g. errata)."""
+    def __init__(self, previous: dict[str, dict[str, Any]] | None = None) -> None:
+        """class constructor"""
+        # members of the previous version and of the version being checked
+        self.previous: dict[str, dict[str, Any]] = previous or {}
+        self.members: dict[str, dict[str, Any]] = {}
+        self.inherited: int = 0
+        self.checked: int = 0
+        return None
+
+    @staticmethod
+    def load(path: str) -> "MemberManifest":
+        """Return the manifest stored in a file, or an empty one if there is no such file yet."""
+        if not os.path.isfile(path):
+            return MemberManifest()
+        manifest_file: IO[str]
+        with open(path, "r", encoding="utf-8") as manifest_file:
+            return MemberManifest(json.load(manifest_file)["members"])
+
+    def save(self, path: str) -> None:
+        """Store the manifest of the checked version, so it becomes the previous version of the next run."""
+        manifest_file: IO[str]
+        with open(f"{path}.part", "w", encoding="utf-8") as manifest_file:
+            json.dump({"members": self.members}, manifest_file, indent=1, sort_keys=True)
+        os.replace(f"{path}.part", path)
+        return None
+
+    @staticmethod
+    def get_member_key(package_index: PackageIndex, path: str) -> str:
+        """Return the path of a member relative to the top-level directory of the package."""
+        top_level_node: PackageNode | None = package_index.top_level_dir()
+        if top_level_node is not None and path.startswith(top_level_node.path()):
+            return path[len(top_level_node.path()):]
+        return path
+
+    def add_package(self, package_index: PackageIndex) -> tuple[int, int]:
+        """Record the CRC-32 of every member of the version being checked and return the
+        number of members which were added or changed since the previous version and the
+        number of all members."""
+        changed: int = 0
+        total: int = 0
+        path: str
+        entry: PackageEntry
+        for path, entry in package_index.entries.items():
+            if entry.is_dir:
+                continue
+            total += 1
+            key: str = self.get_member_key(package_index, path)
+            self.members.setdefault(key, {"crc": entry.crc, "checks": {}})
+            previous_record: dict[str, Any] | None = self.previous.get(key)
+            if previous_record is None or previous_record["crc"] != entry.crc:
+                changed += 1
+        return changed, total
+
+    def get(self, member: str, crc: int, check: str) -> tuple[bool, list[str]] | None:
+        """Return the result and messages of a check of the previous version, if the member is unchanged.
+        The inherited result is carried over into the manifest of the version being checked."""
+        previous_record: dict[str, Any] | None = self.previous.get(member)
+        if previous_record is None or previous_record["crc"] != crc or check not in previous_record["checks"]:
+            return None
+        result: dict[str, Any] = previous_record["checks"][check]
+        self.members.setdefault(member, {"crc": crc, "checks": {}})["checks"][check] = result
+        self.inherited += 1
+        return result["result"], result["messages"]
+
+    def set(self, member: str, crc: int, check: str, result: bool, messages: list[str]) -> None:
+        """Record the result and messages of a check of the version being checked."""
+        record: dict[str, Any] = self.members.setdefault(member, {"crc": crc, "checks": {}})
+        record["crc"] = crc
+        record["checks"][check] = {"result": result, "messages": messages}
+        self.checked += 1
+        return None
@@ -10,18 +10,22 @@ XBRL Taxonomy Package checking and fixing process.
 import os
 import shutil
 import zipfile
+from contextlib import contextmanager
+from typing import IO, Iterator
 from colorama import Fore, Style
+from TPProfile import instrument
+from TPZip import DEFAULT_COMPRESSION, pack_folder
 
-def gen_zip_archive(folder_path: str, zip_filename: str) -> None:
-    """Generate a zip archive out of a root input folder."""
-    zip_file: zipfile.ZipFile
-    with zipfile.ZipFile(zip_filename, 'w') as zip_file:
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                file_path: str = os.path.join(root, file)
-                relative_path: str = os.path.relpath(file_path, folder_path)
-                zip_file.write(file_path, arcname=os.path.join(os.path.basename(folder_path), relative_path))
-    print_color_msg("    Final zip generated",Fore.YELLOW)
+@instrument
+def gen_zip_archive(folder_path: str, zip_filename: str, report: object | None = None, compression: str = DEFAULT_COMPRESSION,
+                    compression_level: int | None = None, store: object | None = None) -> None:
+    """Generate a zip archive out of a root input folder. The members are compressed in
+    parallel with the given method and level (see TPZip.py) and the archive is byte
+    reproducible. If a report (see TPReport.py) is passed, the step is recorded there
+    instead of being printed. If the folder was extracted from a member store (see
+    TPStore.py), unchanged members are taken from the store."""
+    pack_folder(folder_path, zip_filename, f"{os.path.basename(folder_path)}/", compression, compression_level, store=store)
+    report_step(report, "genZipArchive", "    Final zip generated")
     return None
 
 def move_folder_recursively(source_folder: str, destination_folder: str) -> None:
@@ -45,6 +49,88 @@ def extract_zip_in_same_folder(zip_path: str) -> None:
         zip_ref.extractall(zip_dir)
     return None
 
+def report_step(report: object | None, name: str, msg: str, status: str | None = None, member: str | None = None) -> None:
+    """Record a fix step in the report, or print it if there is no report. The status
+    (see TPReport.py) defaults to done, other steps are printed in red."""
+    if report is None:
+        print_color_msg(msg,Fore.YELLOW if status is None else Fore.RED)
+    elif status is None:
+        report.step(name, msg.strip(), member=member)
+    else:
+        report.step(name, msg.strip(), status, member)
+    return None
+
+def escape_xml(data: str) -> str:
+    """Escape text and attribute values like minidom does."""
+    return data.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+class XmlWriter:
+    """Writes an XML document element by element to a binary stream, indented like
+    minidom's toprettyxml(). Only the nesting depth is kept, so documents are written
+    in constant memory no matter how many elements they have."""
+    def __init__(self, stream: IO[bytes], indent: str = "    ", encoding: str = "utf-8") -> None:
+        """class constructor"""
+        self.stream: IO[bytes] = stream
+        self.indent: str = indent
+        self.encoding: str = encoding
+        self.depth: int = 0
+        # the start tag of the current element is closed by its first child, or as empty element
+        self.start_tag_open: bool = False
+        return None
+
+    def write(self, data: str) -> None:
+        """Write encoded data to the stream."""
+        self.stream.write(data.encode(self.encoding))
+        return None
+
+    def close_start_tag(self) -> None:
+        """Close the start tag of the current element before its first child is written."""
+        if self.start_tag_open:
+            self.write(">\n")
+            self.start_tag_open = False
+        return None
+
+    def start_tag(self, tag: str, attributes: dict[str, str] | None) -> str:
+        """Return the unclosed start tag of an element at the current depth."""
+        self.close_start_tag()
+        attribute_list: str = "".join(f' {name}="{escape_xml(value)}"' for name, value in (attributes or {}).items())
+        return f"{self.indent * self.depth}<{tag}{attribute_list}"
+
+    def declaration(self) -> None:
+        """Write the XML declaration."""
+        self.write('<?xml version="1.0" ?>\n')
+        return None
+
+    @contextmanager
+    def element(self, tag: str, attributes: dict[str, str] | None = None) -> Iterator[None]:
+        """Write an element whose children are written in the with block."""
+        self.write(self.start_tag(tag, attributes))
+        self.start_tag_open = True
+        self.depth += 1
+        yield None
+        self.depth -= 1
+        if self.start_tag_open:
+            self.write("/>\n")
+            self.start_tag_open = False
+        else:
+            self.write(f"{self.indent * self.depth}</{tag}>\n")
+        return None
+
+    def text_element(self, tag: str, text: str | None = None, attributes: dict[str, str] | None = None) -> None:
+        """Write an element with text content only, or an empty element if there is no text."""
+        start_tag: str = self.start_tag(tag, attributes)
+        if text:
+            self.write(f"{start_tag}>{escape_xml(text)}</{tag}>\n")
+        else:
+            self.write(f"{start_tag}/>\n")
+        return None
+
+    def comment(self, text: str) -> None:
+        """Write a comment."""
+        self.close_start_tag()
+        self.write(f"{self.indent * self.depth}<!--{text}-->\n")
+        return None
+
 def print_color_msg(msg: str, color: str = Fore.WHITE) -> None:
     """Print a colorized message."""
     print(f"{color}{msg}{Style.RESET_ALL}")
@@ -0,0 +1,464 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Package.py
+
+Provides classes to index the content of an XBRL Taxonomy Package
+(ZIP) once, so that all checks can be answered by lookups instead of
+re-reading the archive. The member paths are kept in a compact path
+table, so even packages with hundreds of thousands of members need
+little memory.
+"""
+
+import os
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from typing import Iterator
+from zipfile import ZipInfo
+from TPReader import MemberTable, PackageReader
+
+# problems of member paths found by scan_member_paths()
+ABSOLUTE_PATH: str = "absolutePath"
+PARENT_TRAVERSAL: str = "parentTraversal"
+BACKSLASH: str = "backslash"
+CASE_COLLISION: str = "caseCollision"
+
+class PackageEntry:
+    """Size and checksum information of a single archive member."""
+    __slots__ = ("path", "file_size", "compress_size", "crc", "is_dir")
+
+    def __init__(self, path: str, file_size: int, compress_size: int, crc: int, is_dir: bool) -> None:
+        """class constructor"""
+        self.path = path
+        self.file_size = file_size
+        self.compress_size = compress_size
+        self.crc = crc
+        self.is_dir = is_dir
+        return None
+
+class PackageNode:
+    """A node in the prefix tree of archive member paths. Each node represents
+    one path component; intermediate directories exist as nodes even if the
+    archive does not contain an explicit directory entry for them. Nodes are
+    created on access as views of a directory (or a file row) of the index."""
+    __slots__ = ("index", "directory", "row")
+
+    def __init__(self, index: "PackageIndex", directory: int, row: int) -> None:
+        """class constructor. Files have no directory (-1), nodes without entry no row (-1)."""
+        self.index = index
+        self.directory = directory
+        self.row = row
+        return None
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, PackageNode) and (other.index, other.directory, other.row) == (self.index, self.directory, self.row)
+
+    def __hash__(self) -> int:
+        return hash((self.directory, self.row))
+
+    @property
+    def name(self) -> str:
+        if self.directory >= 0:
+            return self.index.components[self.index.dir_components[self.directory]]
+        return self.index.member_table.get_name(self.row).rpartition("/")[2]
+
+    @property
+    def parent(self) -> "PackageNode | None":
+        parent: int = self.index.dir_parents[self.directory] if self.directory >= 0 else self.index.parents[self.row]
+        return self.index.get_dir_node(parent) if parent >= 0 else None
+
+    @property
+    def entry(self) -> PackageEntry | None:
+        return self.index.get_entry(self.row) if self.row >= 0 else None
+
+    @property
+    def children(self) -> dict[str, "PackageNode"]:
+        """The child nodes by name in archive order (use child() to look up a single one)."""
+        child: PackageNode
+        return {child.name: child for child in self.index.get_children(self.directory)}
+
+    def child(self, name: str) -> "PackageNode | None":
+        """Return the child node with the given name, or None if there is none."""
+        return self.find(name) if name and "/" not in name else None
+
+    def is_dir(self) -> bool:
+        """A node is a directory if it has children or was stored as directory entry."""
+        return self.directory >= 0
+
+    def find(self, path: str) -> "PackageNode | None":
+        """Return the descendant node for a path relative to this node in O(depth)."""
+        if self.directory < 0:
+            return self if not path.strip("/") else None
+        directory: int = self.directory
+        parts: list[str] = [part for part in path.split("/") if part]
+        position: int
+        part: str
+        for position, part in enumerate(parts):
+            child_directory: int | None = self.index.get_dir(directory, part)
+            if child_directory is None:
+                # only the last component can be a file, which is looked up by its full path
+                if position < len(parts) - 1:
+                    return None
+                row: int | None = self.index.member_table.find(self.index.get_dir_path(directory) + part)
+                return PackageNode(self.index, -1, row) if row is not None else None
+            directory = child_directory
+        return self.index.get_dir_node(directory)
+
+    def list_dir(self, path: str = "") -> list[tuple[str, bool]]:
+        """Return name and directory flag of the children of a descendant directory (like os.scandir)."""
+        node: PackageNode | None = self.find(path)
+        if node is None:
+            raise FileNotFoundError(f"No such directory in package: '{path}'")
+        child: PackageNode
+        return [(child.name, child.is_dir()) for child in self.index.get_children(node.directory)]
+
+    def path(self) -> str:
+        """Return the full member path of the node (directories end with '/')."""
+        if self.directory >= 0:
+            return self.index.get_dir_path(self.directory)
+        return self.index.member_table.get_name(self.row)
+
+class PackageEntries(Mapping):
+    """The entries of the index by member path in archive order, like a dict."""
+    def __init__(self, index: "PackageIndex") -> None:
+        """class constructor"""
+        self.index = index
+        return None
+
+    def __getitem__(self, path: str) -> PackageEntry:
+        row: int | None = self.index.member_table.find(path)
+        if row is None:
+            raise KeyError(path)
+        return self.index.get_entry(row)
+
+    def __iter__(self) -> Iterator[str]:
+        row: int
+        for row in range(len(self.index.member_table)):
+            if row not in self.index.repeated_rows:
+                yield self.index.member_table.get_name(row)
+
+    def __len__(self) -> int:
+        return len(self.index.member_table) - len(self.index.repeated_rows)
+
+class PackageIndex:
+    """Index over the central directory of a taxonomy package. The archive
+    is read exactly once; afterwards the member paths are available as
+    prefix tree, basename lookup and per-entry size/CRC table.
+
+    The prefix tree is a compact path table: the directories are rows of
+    integer arrays (parent directory, interned name component and explicit
+    entry) and every member only stores the directory it is in. The names,
+    sizes and CRC-32s stay in the member table (e.g. of a PackageReader,
+    which reads the names from the mapping of the archive), entries and
+    nodes are created on access. The children of the directories and the
+    basenames are looked up in sorted copies of these arrays, which are
+    built on first use."""
+    def __init__(self, member_table: MemberTable) -> None:
+        """class constructor"""
+        self.member_table = member_table
+        # interned directory names
+        self.components: list[str] = [""]
+        self._component_ids: dict[str, int] = {"": 0}
+        # one row per directory, the root directory is row 0
+        self.dir_parents: array = array("i", [-1])
+        self.dir_components: array = array("i", [0])
+        self.dir_rows: array = array("i", [-1])
+        self.dir_first_rows: array = array("i", [-1])
+        # child directories by (parent directory << 32 | component)
+        self._dirs: dict[int, int] = {}
+        # one row per member: the directory containing the member (-1 for directory entries)
+        # and the hash of its basename
+        self.parents: array = array("i")
+        self.basename_hashes: array = array("q")
+        # the member rows and directories sorted by parent directory, with the start of the rows
+        # and directories of every directory (see get_children())
+        self._child_rows: array | None = None
+        self._child_row_starts: array | None = None
+        self._child_dirs: array | None = None
+        self._child_dir_starts: array | None = None
+        # the directories sorted by name component, the member rows sorted by basename hash
+        self._component_dirs: array | None = None
+        self._sorted_components: array | None = None
+        self._basename_rows: array | None = None
+        self._sorted_basename_hashes: array | None = None
+        self.repeated_rows: frozenset[int] = frozenset(member_table.get_repeated_rows())
+        # names stored more than once in the central directory (the last record wins)
+        self.duplicates: list[str] = [member_table.get_name(row) for row in sorted(self.repeated_rows)]
+        self.entries: PackageEntries = PackageEntries(self)
+        self.root: PackageNode = PackageNode(self, 0, -1)
+        self._top_level_nodes: list[PackageNode] | None = None
+        self._build()
+        return None
+
+    @classmethod
+    def from_infolist(cls, infolist: list[ZipInfo]) -> "PackageIndex":
+        """Build the index from the records of a zipfile.ZipFile."""
+        return cls(MemberTable.from_infolist(infolist))
+
+    @classmethod
+    def from_archive(cls, archive_path: str) -> "PackageIndex":
+        """Build the index by reading the central directory of the archive once."""
+        package_reader: PackageReader
+        with PackageReader(archive_path) as package_reader:
+            return cls(package_reader.copy())
+
+    def _build(self) -> None:
+        """Insert the directories of all members into the path table."""
+        # consecutive members are mostly in the same directory
+        last_dir_path: str | None = None
+        directory: int = 0
+        row: int
+        for row in range(len(self.member_table)):
+            name: str = self.member_table.get_name(row)
+            path: str = name.rstrip("/")
+            slash: int = path.rfind("/")
+            dir_path: str | None = path[:slash] if slash >= 0 else None
+            if dir_path != last_dir_path:
+                directory = self._add_dirs(dir_path, row)
+                last_dir_path = dir_path
+            basename: str = path[slash + 1:]
+            self.basename_hashes.append(hash(basename))
+            if name.endswith("/"):
+                self.parents.append(-1)
+                self.dir_rows[self._add_dir(directory, basename, row)] = row
+            else:
+                self.parents.append(directory)
+        return None
+
+    def _add_dirs(self, dir_path: str | None, row: int) -> int:
+        """Return the directory of a path, which is added with its ancestors if needed."""
+        directory: int = 0
+        part: str
+        for part in dir_path.split("/") if dir_path is not None else ():
+            directory = self._add_dir(directory, part, row)
+        return directory
+
+    def _add_dir(self, parent: int, name: str, row: int) -> int:
+        """Return the child directory of a directory, which is added if needed."""
+        component: int | None = self._component_ids.get(name)
+        if component is None:
+            component = self._component_ids[name] = len(self.components)
+            self.components.append(name)
+        directory: int | None = self._dirs.get(parent << 32 | component)
+        if directory is None:
+            directory = self._dirs[parent << 32 | component] = len(self.dir_parents)
+            self.dir_parents.append(parent)
+            self.dir_components.append(component)
+            self.dir_rows.append(-1)
+            self.dir_first_rows.append(row)
+        return directory
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, path: str) -> bool:
+        return self.find(path) is not None
+
+    def get_entry(self, row: int) -> PackageEntry:
+        """Return the entry of a member row."""
+        return PackageEntry(self.member_table.get_name(row), self.member_table.file_sizes[row], self.member_table.compress_sizes[row],
+                            self.member_table.crcs[row], self.parents[row] < 0)
+
+    def get_dir(self, parent: int, name: str) -> int | None:
+        """Return the child directory with the given name, or None if there is none."""
+        component: int | None = self._component_ids.get(name)
+        return self._dirs.get(parent << 32 | component) if component is not None else None
+
+    def get_dir_node(self, directory: int) -> PackageNode:
+        """Return the node of a directory."""
+        return PackageNode(self, directory, self.dir_rows[directory])
+
+    def get_dir_path(self, directory: int) -> str:
+        """Return the path of a directory with a trailing '/' (the root directory has the empty path)."""
+        parts: list[str] = []
+        while directory > 0:
+            parts.append(self.components[self.dir_components[directory]])
+            directory = self.dir_parents[directory]
+        return "".join(part + "/" for part in reversed(parts))
+
+    def _build_children(self) -> None:
+        """Sort the member rows and the directories by parent directory (stable, so in archive
+        order), the children of every directory are a range of each then."""
+        # directory entries and the root directory have no parent (-1) and come first
+        child_rows: array = array("i", sorted(range(len(self.parents)), key=self.parents.__getitem__))
+        child_dirs: array = array("i", sorted(range(len(self.dir_parents)), key=self.dir_parents.__getitem__))
+        self._child_rows, self._child_dirs = child_rows, child_dirs
+        self._child_dir_starts = get_key_starts(array("i", map(self.dir_parents.__getitem__, child_dirs)), len(self.dir_parents))
+        self._child_row_starts = get_key_starts(array("i", map(self.parents.__getitem__, child_rows)), len(self.dir_parents))
+        return None
+
+    def _build_components(self) -> None:
+        """Sort the directories by name component (stable, so in the order of their first member)."""
+        component_dirs: array = array("i", sorted(range(len(self.dir_components)), key=self.dir_components.__getitem__))
+        self._component_dirs = component_dirs
+        self._sorted_components = array("i", map(self.dir_components.__getitem__, component_dirs))
+        return None
+
+    def _build_basenames(self) -> None:
+        """Sort the member rows by the hash of their basename (stable, so in archive order)."""
+        basename_rows: array = array("i", sorted(range(len(self.basename_hashes)), key=self.basename_hashes.__getitem__))
+        self._basename_rows = basename_rows
+        self._sorted_basename_hashes = array("q", map(self.basename_hashes.__getitem__, basename_rows))
+        return None
+
+    def get_children(self, directory: int) -> list[PackageNode]:
+        """Return the child nodes of a directory in the order of their first member."""
+        if directory < 0:
+            return []
+        if self._child_row_starts is None:
+            self._build_children()
+        child: int
+        children: list[tuple[int, PackageNode]] = [(self.dir_first_rows[child], self.get_dir_node(child))
+                                                   for child in self._child_dirs[self._child_dir_starts[directory]:self._child_dir_starts[directory + 1]]]
+        children.extend((child, PackageNode(self, -1, child)) for child in self._child_rows[self._child_row_starts[directory]:self._child_row_starts[directory + 1]]
+                        if child not in self.repeated_rows)
+        children.sort(key=lambda child: child[0])
+        return [child for _, child in children]
+
+    def get_component_dirs(self, component: int) -> array:
+        """Return the directories with the given name component in the order of their first member."""
+        if self._sorted_components is None:
+            self._build_components()
+        return self._component_dirs[bisect_left(self._sorted_components, component):bisect_right(self._sorted_components, component)]
+
+    def find(self, path: str) -> PackageNode | None:
+        """Return the node for a member path in O(depth), or None if it does not exist."""
+        return self.root.find(path)
+
+    def find_basename(self, basename: str) -> list[PackageNode]:
+        """Return all nodes (files and directories) with the given basename, which are looked up
+        by name component and by basename hash (rows with colliding hashes are left out)."""
+        component: int | None = self._component_ids.get(basename)
+        directory: int
+        nodes: list[tuple[int, PackageNode]] = [(self.dir_first_rows[directory], self.get_dir_node(directory))
+                                                for directory in (self.get_component_dirs(component) if component is not None else ())]
+        if self._sorted_basename_hashes is None:
+            self._build_basenames()
+        basename_hash: int = hash(basename)
+        row: int
+        for row in self._basename_rows[bisect_left(self._sorted_basename_hashes, basename_hash):bisect_right(self._sorted_basename_hashes, basename_hash)]:
+            if self.parents[row] >= 0 and row not in self.repeated_rows and self.member_table.get_name(row).rpartition("/")[2] == basename:
+                nodes.append((row, PackageNode(self, -1, row)))
+        nodes.sort(key=lambda node: node[0])
+        return [node for _, node in nodes]
+
+    def find_path_containing(self, text: str) -> str | None:
+        """Return the path of a member containing text, or None if there is none. The interned
+        directory names are searched first (a matching directory returns the path of its first
+        member), the member names only if no directory name contains text."""
+        component: int
+        name: str
+        for component, name in enumerate(self.components):
+            if component > 0 and text in name:
+                return self.member_table.get_name(self.dir_first_rows[self.get_component_dirs(component)[0]])
+        row: int
+        for row in range(len(self.member_table)):
+            name = self.member_table.get_name(row)
+            if text in name:
+                return name
+        return None
+
+    def top_level_nodes(self) -> list[PackageNode]:
+        """Return the nodes directly below the archive root (looked up once, the index does not change)."""
+        if self._top_level_nodes is None:
+            self._top_level_nodes = self.get_children(0)
+        return list(self._top_level_nodes)
+
+    def find_case_collisions(self) -> list[tuple[int, str, str]]:
+        """Return (row, path, colliding path) for the paths of members and directories, which differ
+        from an earlier one in case (or Unicode normalization) only, in the order of the rows they
+        first appear in. Paths can only collide if their parent directories do: the directories are
+        folded once, then the members are compared by the hash of their folded parent and basename."""
+        collisions: list[tuple[int, str, str]] = []
+        # colliding directories share the folded directory of the first one
+        folded_dirs: array = array("i", [0])
+        first_dirs: dict[tuple[int, str], int] = {}
+        directory: int
+        for directory in range(1, len(self.dir_parents)):
+            other_dir: int = first_dirs.setdefault((folded_dirs[self.dir_parents[directory]], fold_name(self.components[self.dir_components[directory]])), directory)
+            folded_dirs.append(other_dir)
+            if other_dir != directory:
+                collisions.append((self.dir_first_rows[directory], self.get_dir_path(directory)[:-1], self.get_dir_path(other_dir)[:-1]))
+        rows: list[int] = [row for row in range(len(self.parents)) if self.parents[row] >= 0 and row not in self.repeated_rows]
+        folded_keys: array = array("q", [hash((folded_dirs[self.parents[row]], fold_name(self.member_table.get_name(row).rpartition("/")[2]))) for row in rows])
+        order: list[int] = sorted(range(len(rows)), key=folded_keys.__getitem__)
+        start: int = 0
+        position: int
+        row: int
+        for position in range(1, len(order) + 1):
+            if position < len(order) and folded_keys[order[position]] == folded_keys[order[start]]:
+                continue
+            if position - start > 1:
+                # the first member of every folded path is kept (the order is stable, so it is in archive order)
+                first_rows: dict[tuple[int, str], int] = {}
+                for row in (rows[index] for index in order[start:position]):
+                    folded_key: tuple[int, str] = (folded_dirs[self.parents[row]], fold_name(self.member_table.get_name(row).rpartition("/")[2]))
+                    other_row: int = first_rows.setdefault(folded_key, row)
+                    if other_row != row:
+                        collisions.append((row, self.member_table.get_name(row), self.member_table.get_name(other_row)))
+            start = position
+        # members colliding with a directory
+        for row in rows:
+            other_dir: int | None = first_dirs.get((folded_dirs[self.parents[row]], fold_name(self.member_table.get_name(row).rpartition("/")[2])))
+            if other_dir is not None:
+                other_path: str = self.get_dir_path(other_dir)[:-1]
+                if self.dir_first_rows[other_dir] < row:
+                    collisions.append((row, self.member_table.get_name(row), other_path))
+                else:
+                    collisions.append((self.dir_first_rows[other_dir], other_path, self.member_table.get_name(row)))
+        # members are reported before their parent directories
+        collisions.sort(key=lambda collision: (collision[0], -len(collision[1])))
+        return collisions
+
+    def top_level_dir(self) -> PackageNode | None:
+        """Return the single top-level directory, or None if the package has none or several."""
+        top_level: list[PackageNode] = self.top_level_nodes()
+        if len(top_level) == 1 and top_level[0].is_dir():
+            return top_level[0]
+        return None
+
+def get_key_starts(sorted_keys: array, count: int) -> array:
+    """Return the start of the range of each key 0 ... count - 1 in sorted keys and the end of the last range."""
+    key: int
+    return array("i", [bisect_left(sorted_keys, key) for key in range(count + 1)])
+
+def fold_name(name: str) -> str:
+    """Return the case-folded form of a name, under which names differing in case (or Unicode normalization) only are equal."""
+    # ascii names are in normal form already
+    return name.lower() if name.isascii() else unicodedata.normalize("NFC", name).casefold()
+
+def scan_member_paths(package_index: PackageIndex) -> Iterator[tuple[str, str, str | None]]:
+    """Scan the member names in one pass and yield (problem, name, colliding name) for absolute paths,
+    '..' components, backslash separators and names (of members or their parent directories)
+    which differ from another one in case (or Unicode normalization) only. Such members escape
+    the target folder or overwrite each other when extracted on a case-insensitive volume."""
+    collisions: Iterator[tuple[int, str, str]] = iter(package_index.find_case_collisions())
+    collision: tuple[int, str, str] | None = next(collisions, None)
+    member_table: MemberTable = package_index.member_table
+    row: int
+    for row in range(len(member_table)):
+        if row in package_index.repeated_rows:
+            continue
+        name: str = member_table.get_name(row)
+        if name.startswith(("/", "\\")) or name[1:3] in (":/", ":\\"):
+            yield ABSOLUTE_PATH, name, None
+        if "\\" in name:
+            yield BACKSLASH, name, None
+        if ".." in name and ".." in name.replace("\\", "/").split("/"):
+            yield PARENT_TRAVERSAL, name, None
+        while collision is not None and collision[0] <= row:
+            yield CASE_COLLISION, collision[1], collision[2]
+            collision = next(collisions, None)
+
+def get_archive_path(archive: str) -> str:
+    """Resolve the archive argument passed on the command line (or in tests)
+    to the location of the package relative to the project folder. Absolute
+    paths of existing files (as used by the batch mode) are taken as they are,
+    existing relative paths are taken relative to the working directory."""
+    if os.path.isabs(archive) and os.path.isfile(archive):
+        return archive
+    if os.path.isfile(archive):
+        return os.path.abspath(archive)
+    return os.path.dirname(os.path.abspath(__file__)) + os.path.abspath(archive.replace("\\", "/").replace("..",""))
@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Pipeline.py
+
+Provides an asyncio based orchestrator for the checks of an XBRL
+Taxonomy Package. The checks are declared as dependency graph and
+independent checks run concurrently on a thread pool, so reading
+members, parsing and schema validation of different checks overlap.
+The results are reported in the order the checks were declared.
+"""
+
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from TPChecker import TPChecker
+from TPReport import PASSED, Report, ReportEntry
+
+class CheckStage:
+    """A check of the pipeline. The check is a TPChecker method, which is called with the
+    arguments of the stage once every stage in requires has passed and every stage in after
+    has finished. If a required stage did not pass, the stage is skipped (and not reported)."""
+    def __init__(self, name: str, check: Callable[..., bool], *args: Any, passed_msg: str, failed_msg: str, error_code: str | None = None,
+                 member: str | None = None, messages: bool = False, requires: tuple[str, ...] = (), after: tuple[str, ...] = ()) -> None:
+        """class constructor. If messages is set, the messages of the check are recorded as details.
+        A failed check is recorded with the first member the check reported (see TPChecker.members),
+        or with member if the check reported none."""
+        self.name = name
+        self.check = check
+        self.args = args
+        self.passed_msg = passed_msg
+        self.failed_msg = failed_msg
+        self.error_code = error_code
+        self.member = member
+        self.messages = messages
+        self.requires = requires
+        self.after = after
+        return None
+
+class CheckPipeline:
+    """Runs the stages of a dependency graph of checks on a package. Every stage runs with its own
+    fork of the checker (see TPChecker.fork()), so the stages share the index, the reader and the
+    parsed documents of the package, but not their messages. At most workers stages run at a time,
+    which also caps the memory held by the documents the stages are working on."""
+    def __init__(self, tp_checker: TPChecker, report: Report, workers: int | None = None) -> None:
+        """class constructor"""
+        self.tp_checker = tp_checker
+        self.report = report
+        self.workers = workers if workers is not None else min(4, os.cpu_count() or 1)
+        self.stages: list[CheckStage] = []
+        # outcome of every stage: True (passed), False (failed or error) or None (skipped)
+        self.results: dict[str, bool | None] = {}
+        self._entries: dict[str, ReportEntry | None] = {}
+        self._reported: int = 0
+        return None
+
+    def add(self, stage: CheckStage) -> CheckStage:
+        """Add a stage, the stages it depends on must have been added before."""
+        stage_names: set[str] = {added_stage.name for added_stage in self.stages}
+        dependency: str
+        for dependency in stage.requires + stage.after:
+            if dependency not in stage_names:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage {dependency}.")
+        self.stages.append(stage)
+        return stage
+
+    def run(self) -> dict[str, bool | None]:
+        """Run all stages and return their outcomes."""
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> dict[str, bool | None]:
+        """Run all stages as tasks, each waiting for the stages it depends on."""
+        slots: asyncio.Semaphore = asyncio.Semaphore(self.workers)
+        executor: ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            tasks: dict[str, asyncio.Task] = {}
+            stage: CheckStage
+            for stage in self.stages:
+                tasks[stage.name] = asyncio.ensure_future(self._run_stage(stage, tasks, slots, executor))
+            await asyncio.gather(*tasks.values())
+        return self.results
+
+    async def _run_stage(self, stage: CheckStage, tasks: dict[str, asyncio.Task], slots: asyncio.Semaphore, executor: ThreadPoolExecutor) -> None:
+        """Run a stage once its dependencies are finished and report the finished stages in order."""
+        await asyncio.gather(*(tasks[dependency] for dependency in stage.requires + stage.after))
+        entry: ReportEntry | None = None
+        if all(self.results[dependency] for dependency in stage.requires):
+            async with slots:
+                # the stage runs in the context of the pipeline, so its profiling stages are recorded
+                entry = await asyncio.get_running_loop().run_in_executor(executor, contextvars.copy_context().run, self._run_check, stage)
+        self.results[stage.name] = entry.status == PASSED if entry is not None else None
+        self._entries[stage.name] = entry
+        while self._reported < len(self.stages) and self.stages[self._reported].name in self._entries:
+            reported_entry: ReportEntry | None = self._entries[self.stages[self._reported].name]
+            if reported_entry is not None:
+                self.report.add(reported_entry)
+            self._reported += 1
+        return None
+
+    def _run_check(self, stage: CheckStage) -> ReportEntry:
+        """Run the check of a stage with a fork of the checker (in a worker thread)."""
+        tp_checker: TPChecker = self.tp_checker.fork()
+        return Report.run_check(stage.name, stage.check, tp_checker, *stage.args, passed_msg=stage.passed_msg, failed_msg=stage.failed_msg,
+                                error_code=stage.error_code, member=stage.member, messages=tp_checker.messages if stage.messages else None,
+                                members=tp_checker.members)
@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Profile.py
+
+Provides a lightweight instrumentation layer to measure the stages of
+checking and fixing an XBRL Taxonomy Package (wall time, bytes read
+and written by the thread of the stage and growth of the resident
+memory) as well as cProfile support. Stages running on thread pools
+are only recorded if the pool runs them in a copy of the context of
+the caller (contextvars.copy_context().run).
+"""
+
+import functools
+import io
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
+try:
+    import resource
+except ImportError:
+    # the resource module is not available on windows
+    resource = None
+
+# the list collecting the stages of the current run (None if instrumentation is off)
+_active_stages: ContextVar[list | None] = ContextVar("tp_active_stages", default=None)
+_stage_depth: ContextVar[int] = ContextVar("tp_stage_depth", default=0)
+
+class StageRecord:
+    """Measurements of a single instrumented stage."""
+    def __init__(self, name: str, depth: int) -> None:
+        """class constructor"""
+        self.name = name
+        self.depth = depth
+        self.wall_time: float = 0.0
+        self.bytes_read: int | None = None
+        self.bytes_written: int | None = None
+        self.rss_growth: int | None = None
+        return None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the record as JSON serializable dictionary."""
+        return {
+            "name": self.name,
+            "depth": self.depth,
+            "wallTime": round(self.wall_time, 6),
+            "bytesRead": self.bytes_read,
+            "bytesWritten": self.bytes_written,
+            "rssGrowth": self.rss_growth,
+        }
+
+def read_io_counters() -> tuple[int, int] | None:
+    """Return the number of bytes read and written by the calling thread so far (Linux only),
+    so stages running concurrently on other threads are not counted."""
+    try:
+        with open("/proc/thread-self/io", "r", encoding="ascii") as io_file:
+            counters: dict[str, int] = {key: int(value) for key, value in (line.split(":") for line in io_file)}
+        return counters["rchar"], counters["wchar"]
+    except (OSError, KeyError, ValueError):
+        return None
+
+def get_rss() -> int | None:
+    """Return the current resident set size of the process in bytes (Linux only)."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        return None
+
+def get_peak_rss() -> int | None:
+    """Return the peak resident set size of the process in bytes."""
+    if resource is None:
+        return None
+    max_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+@contextmanager
+def collect_stages(stages: list) -> Iterator[list]:
+    """Record all stages executed within the context in the given list."""
+    token = _active_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _active_stages.reset(token)
+
+@contextmanager
+def stage(name: str) -> Iterator[StageRecord | None]:
+    """Measure a stage. Does nothing (and costs next to nothing) if no stages are collected.
+    The resident memory is the one of the process, so the growth of a stage includes the
+    memory of stages running at the same time (and is negative if more memory was freed)."""
+    stages: list | None = _active_stages.get()
+    if stages is None:
+        yield None
+        return
+    record: StageRecord = StageRecord(name, _stage_depth.get())
+    stages.append(record)
+    depth_token = _stage_depth.set(record.depth + 1)
+    io_start: tuple[int, int] | None = read_io_counters()
+    rss_start: int | None = get_rss()
+    start_time: float = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.wall_time = time.perf_counter() - start_time
+        io_end: tuple[int, int] | None = read_io_counters()
+        if io_start is not None and io_end is not None:
+            record.bytes_read = io_end[0] - io_start[0]
+            record.bytes_written = io_end[1] - io_start[1]
+        rss_end: int | None = get_rss()
+        if rss_start is not None and rss_end is not None:
+            record.rss_growth = rss_end - rss_start
+        _stage_depth.reset(depth_token)
+
+def instrument(func: Callable) -> Callable:
+    """Decorator measuring every call of a function as a stage named after the function."""
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if _active_stages.get() is None:
+            return func(*args, **kwargs)
+        with stage(func.__qualname__):
+            return func(*args, **kwargs)
+    return wrapper
+
+@contextmanager
+def profile_run(profile_file: str | None, top: int = 25) -> Iterator[None]:
+    """Profile the context with cProfile. The stats are dumped to profile_file (to be
+    inspected with pstats) and the most expensive functions are printed to stderr."""
+    if profile_file is None:
+        yield None
+        return
+    # the profilers are imported on demand, they are slow to import
+    import cProfile
+    import pstats
+    profiler: cProfile.Profile = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield None
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_file)
+        stats_output: io.StringIO = io.StringIO()
+        pstats.Stats(profiler, stream=stats_output).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        sys.stderr.write(stats_output.getvalue())
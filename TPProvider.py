@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Provider.py
+
+Provides the registry of the fixers of the supported providers. A
+fixer is registered by its module path ("module:Class") and its module
+is imported only when the provider is selected, so runs which do not
+fix a package (check-only runs, cache hits) never import the fixers.
+Fixers of further providers can be registered with register_provider()
+or installed as "tpfixer.providers" entry points. Providers are only
+looked up by abbreviation, so user input never names a module to import.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from TPFixer import TaxonomyPackageFixerInterface
+
+# entry point group of fixers installed by other distributions
+ENTRY_POINT_GROUP: str = "tpfixer.providers"
+
+# fixers by provider abbreviation (str.upper())
+PROVIDERS: dict[str, str] = {
+    "EBA": "TPFixer:EBATaxonomyPackage",
+    "EDINET": "TPFixer:EDINETTaxonomyPackage",
+}
+
+# TODO: This is just a first working template version. Fixes for more packages should be implemented.
+# The following packages could be supported as well:
+#     https://www.sec.gov/edgar/information-for-filers/standard-taxonomies
+#     https://xbrl.us/xbrl-taxonomy/2021-acfr/
+#     https://xbrl.us/xbrl-taxonomy/2023-mutual-fund-riskreturn/
+#     https://www.ifrs.org/issued-standards/ifrs-taxonomy/
+#     https://esurfi-assurance.banque-france.fr/
+#     https://www.bundesbank.de/en/service/reporting-systems/banking-supervision/formats-xbrl-and-xml-/formats-xml-and-xbrl--619400
+#     https://www.bde.es/wbe/en/entidades-profesionales/supervisadas/informacion-financiera-a-remitir-entidades-supervisadas/entidades-credito/taxonomias/
+#     https://www.bportugal.pt/en/page/reporting-obligations-supervised-institutions
+#     https://www.bankofengland.co.uk/prudential-regulation/regulatory-reporting/regulatory-reporting-banking-sector/banks-building-societies-and-investment-firms
+#     https://www.centralbank.ie/regulation/industry-market-sectors/investment-firms
+#     https://www.cipc.co.za/?page_id=4400
+#     https://www.cmfchile.cl/portal/principal/613/w3-article-49999.html
+#     https://www.dnb.nl/en/login/dlr/information-and-documentation/
+#     https://www.esma.europa.eu/document/esma-esef-taxonomy-2021
+#     ...
+
+def register_provider(provider: str, module_path: str) -> None:
+    """Register the fixer of a provider by its module path ("module:Class")."""
+    if ":" not in module_path:
+        raise ValueError(f"Fixer of provider {provider} is not given as 'module:Class' ({module_path}).")
+    PROVIDERS[provider.upper()] = module_path
+    return None
+
+def get_provider_path(provider: str) -> str | None:
+    """Return the module path of the fixer of a provider, or None if the provider is not supported.
+    The installed entry points are only looked up for providers which are not registered."""
+    # module paths are no provider abbreviations
+    if ":" in provider:
+        return None
+    provider_name: str = provider.upper()
+    if provider_name not in PROVIDERS:
+        # importing importlib.metadata is slow, so it is done on demand
+        from importlib.metadata import EntryPoint, entry_points
+        entry_point: EntryPoint
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            if entry_point.name.upper() == provider_name:
+                return entry_point.value
+        return None
+    return PROVIDERS[provider_name]
+
+def get_provider(provider: str) -> "type[TaxonomyPackageFixerInterface] | None":
+    """Import and return the fixer class of a provider, or None if the provider is not supported."""
+    module_path: str | None = get_provider_path(provider)
+    if module_path is None:
+        return None
+    module_name: str
+    class_name: str
+    module_name, _, class_name = module_path.partition(":")
+    return getattr(importlib.import_module(module_name.strip()), class_name.strip())
@@ -0,0 +1,452 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Reader.py
+
+Provides a memory-mapped reader for random access to the members of
+a taxonomy package. The central directory is parsed once into a
+compact table of arrays, stored members are returned as zero-copy
+views of the mapping and decompressed members are kept in a small
+cache, so the many small reads of a validation run need no syscalls.
+"""
+
+import bz2
+import io
+import mmap
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import IO
+from TPZipInternals import get_decompressor
+
+# total size of the decompressed members kept in the cache of a reader
+DECOMPRESSION_CACHE_SIZE: int = 16 * 1024 * 1024
+# size of the compressed chunks fed to the decompressor of a stream
+INFLATE_CHUNK_SIZE: int = 16 * 1024
+
+_END_OF_CENTRAL_DIRECTORY: struct.Struct = struct.Struct("<4s4H2LH")
+_ZIP64_LOCATOR: struct.Struct = struct.Struct("<4sLQL")
+_ZIP64_END_OF_CENTRAL_DIRECTORY: struct.Struct = struct.Struct("<4sQ2H2L4Q")
+_CENTRAL_DIRECTORY_RECORD: struct.Struct = struct.Struct("<4s4B4HL2L5H2L")
+_LOCAL_FILE_HEADER: struct.Struct = struct.Struct("<4s2B4HL2L2H")
+_EXTRA_FIELD_HEADER: struct.Struct = struct.Struct("<2H")
+_MAX_COMMENT_SIZE: int = 65535
+_MASK_ENCRYPTED: int = 0x01
+_MASK_UTF8: int = 0x800
+_ZIP64_EXTRA: int = 0x0001
+
+class MemoryStream(io.RawIOBase):
+    """A read-only binary stream over a memoryview, e.g. for parsers expecting a file object."""
+    def __init__(self, data: memoryview) -> None:
+        """class constructor"""
+        self.data = data
+        self.position: int = 0
+        return None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:
+        size: int = min(len(buffer), len(self.data) - self.position)
+        buffer[:size] = self.data[self.position:self.position + size]
+        self.position += size
+        return size
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base: int = {os.SEEK_SET: 0, os.SEEK_CUR: self.position, os.SEEK_END: len(self.data)}[whence]
+        self.position = max(base + offset, 0)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+class InflateStream(io.RawIOBase):
+    """A read-only binary stream decompressing a deflated memoryview on demand, so reading
+    the beginning of a member (e.g. to find its root element) decompresses only that part.
+    Size and CRC-32 are checked when the end of the data is reached."""
+    def __init__(self, data: memoryview, file_size: int, crc: int, name: str) -> None:
+        """class constructor"""
+        self.data = data
+        self.file_size = file_size
+        self.crc = crc
+        self.name = name
+        self.position: int = 0
+        self.size: int = 0
+        self.running_crc: int = 0
+        self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:
+        chunk: bytes = b""
+        try:
+            while not chunk and not self._decompressor.eof and (self.position < len(self.data) or self._decompressor.unconsumed_tail):
+                compressed: bytes | memoryview = self._decompressor.unconsumed_tail or self.data[self.position:self.position + INFLATE_CHUNK_SIZE]
+                if not self._decompressor.unconsumed_tail:
+                    self.position += len(compressed)
+                chunk = self._decompressor.decompress(compressed, len(buffer))
+        except zlib.error as e:
+            raise zipfile.BadZipFile(f"Bad data of member {self.name}: {e}")
+        buffer[:len(chunk)] = chunk
+        self.size += len(chunk)
+        self.running_crc = zlib.crc32(chunk, self.running_crc)
+        if not chunk and (self.size != self.file_size or self.running_crc != self.crc):
+            raise zipfile.BadZipFile(f"Bad CRC-32 for member {self.name}")
+        return len(chunk)
+
+class MemberTable:
+    """The central directory of a ZIP archive as table of arrays (one row per member): sizes,
+    CRC-32s and the UTF-8 names as slices of a single buffer. The buffer of a reader is the
+    mapping of the archive itself, so the names take no memory besides their offsets. Names
+    are looked up by binary search over their hashes, no name has to be decoded for it."""
+    def __init__(self, name_buffer: bytes | mmap.mmap = b"") -> None:
+        """class constructor"""
+        self.name_buffer = name_buffer
+        self.name_offsets: array = array("Q")
+        self.name_lengths: array = array("H")
+        self.compress_sizes: array = array("Q")
+        self.file_sizes: array = array("Q")
+        self.crcs: array = array("L")
+        # names which are not stored as UTF-8 in the buffer (cp437 names of old archives)
+        self._transcoded_names: dict[int, bytes] = {}
+        self._hashes: array = array("q")
+        self._sorted: array = array("L")
+        return None
+
+    def __len__(self) -> int:
+        return len(self.crcs)
+
+    @classmethod
+    def from_infolist(cls, infolist: list[zipfile.ZipInfo]) -> "MemberTable":
+        """Build the table from the records of a zipfile.ZipFile."""
+        info: zipfile.ZipInfo
+        names: list[bytes] = [info.filename.encode("utf-8") for info in infolist]
+        member_table: MemberTable = cls(b"".join(names))
+        offset: int = 0
+        name: bytes
+        for name, info in zip(names, infolist):
+            member_table.append(offset, len(name), info.compress_size, info.file_size, info.CRC)
+            offset += len(name)
+        member_table.index_names()
+        return member_table
+
+    def copy(self) -> "MemberTable":
+        """Return a copy of the table, which owns its names (e.g. to keep it after closing a reader)."""
+        index: int
+        return MemberTable.from_infolist([self.get_info(index) for index in range(len(self))])
+
+    def append(self, name_offset: int, name_length: int, compress_size: int, file_size: int, crc: int) -> None:
+        """Add a row for a member whose name is stored at name_offset in the name buffer."""
+        self.name_offsets.append(name_offset)
+        self.name_lengths.append(name_length)
+        self.compress_sizes.append(compress_size)
+        self.file_sizes.append(file_size)
+        self.crcs.append(crc)
+        return None
+
+    def index_names(self) -> None:
+        """Sort the rows by the hashes of their names. Rows with equal hashes keep their order."""
+        index: int
+        hashes: list[int] = [hash(self.get_name_bytes(index)) for index in range(len(self))]
+        self._sorted = array("L", sorted(range(len(hashes)), key=hashes.__getitem__))
+        self._hashes = array("q", [hashes[index] for index in self._sorted])
+        return None
+
+    def get_name_bytes(self, index: int) -> bytes:
+        """Return the UTF-8 encoded name of a member."""
+        name: bytes | None = self._transcoded_names.get(index)
+        if name is None:
+            offset: int = self.name_offsets[index]
+            name = bytes(self.name_buffer[offset:offset + self.name_lengths[index]])
+        return name
+
+    def get_name(self, index: int) -> str:
+        """Return the name of a member."""
+        return self.get_name_bytes(index).decode("utf-8")
+
+    def get_info(self, index: int) -> zipfile.ZipInfo:
+        """Return the name, sizes and CRC-32 of a member as ZipInfo."""
+        info: zipfile.ZipInfo = zipfile.ZipInfo(self.get_name(index))
+        info.compress_size = self.compress_sizes[index]
+        info.file_size = self.file_sizes[index]
+        info.CRC = self.crcs[index]
+        return info
+
+    def namelist(self) -> list[str]:
+        """Return the names of all members in archive order."""
+        index: int
+        return [self.get_name(index) for index in range(len(self))]
+
+    def find(self, name: str) -> int | None:
+        """Return the row of a member in O(log n), or None if there is no such member.
+        If several members have the name, the last one wins (like zipfile)."""
+        name_bytes: bytes = name.encode("utf-8")
+        name_hash: int = hash(name_bytes)
+        position: int = bisect_right(self._hashes, name_hash)
+        while position and self._hashes[position - 1] == name_hash:
+            position -= 1
+            if self.get_name_bytes(self._sorted[position]) == name_bytes:
+                return self._sorted[position]
+        return None
+
+    def get_index(self, member: str | int) -> int:
+        """Return the row of a member given by name or row."""
+        if isinstance(member, int):
+            return member
+        index: int | None = self.find(member)
+        if index is None:
+            raise KeyError(f"There is no item named '{member}' in the archive")
+        return index
+
+    def get_repeated_rows(self) -> list[int]:
+        """Return the rows (in archive order) whose name is used by an earlier row already."""
+        repeated_rows: list[int] = []
+        start: int = 0
+        position: int
+        for position in range(1, len(self._hashes) + 1):
+            if position < len(self._hashes) and self._hashes[position] == self._hashes[start]:
+                continue
+            if position - start > 1:
+                # rows with equal hashes are in archive order, the first row of every name is kept
+                first_rows: dict[bytes, int] = {}
+                index: int
+                for index in self._sorted[start:position]:
+                    if first_rows.setdefault(self.get_name_bytes(index), index) != index:
+                        repeated_rows.append(index)
+            start = position
+        return sorted(repeated_rows)
+
+class PackageReader(MemberTable):
+    """Random access to the members of a ZIP archive through a read-only memory mapping.
+    The central directory is stored as member table (see MemberTable), extended by the
+    offsets of the central directory records and local headers, the compression methods
+    and the flags of the members. The names are read from the mapping."""
+    def __init__(self, path: str, cache_size: int = DECOMPRESSION_CACHE_SIZE) -> None:
+        """class constructor. Raises zipfile.BadZipFile if the file is no ZIP archive."""
+        self.path = path
+        self._file: IO[bytes] = open(path, "rb")
+        try:
+            self._mmap: mmap.mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            self._file.close()
+            raise zipfile.BadZipFile(f"File is not a zip file: {path}")
+        MemberTable.__init__(self, self._mmap)
+        self._view: memoryview = memoryview(self._mmap)
+        self.record_offsets: array = array("Q")
+        self.header_offsets: array = array("Q")
+        self.data_offsets: array = array("q")
+        self.methods: array = array("H")
+        self.flags: array = array("H")
+        self._cache: OrderedDict[int, bytes] = OrderedDict()
+        self._cache_size: int = cache_size
+        self._cached_bytes: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        try:
+            self._read_central_directory()
+        except (struct.error, UnicodeDecodeError) as e:
+            self.close()
+            raise zipfile.BadZipFile(f"Bad central directory: {e}")
+        except zipfile.BadZipFile:
+            self.close()
+            raise
+        return None
+
+    def __len__(self) -> int:
+        return len(self.crcs)
+
+    def __enter__(self) -> "PackageReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        return None
+
+    @property
+    def closed(self) -> bool:
+        """True once the reader is closed."""
+        return self._file.closed
+
+    def close(self) -> None:
+        """Release the mapping and the file. Views returned by read() must not be used afterwards."""
+        if not self._file.closed:
+            self._view.release()
+            try:
+                self._mmap.close()
+            except BufferError:
+                # views of members are still in use, the mapping is released with the last of them
+                pass
+            self._file.close()
+        return None
+
+    def _read_central_directory(self) -> None:
+        """Locate the end of central directory record (and its ZIP64 variant) and parse all records."""
+        mapping: mmap.mmap = self._mmap
+        eocd_offset: int = mapping.rfind(b"PK\x05\x06", max(len(mapping) - _END_OF_CENTRAL_DIRECTORY.size - _MAX_COMMENT_SIZE, 0))
+        if eocd_offset < 0 or eocd_offset + _END_OF_CENTRAL_DIRECTORY.size > len(mapping):
+            raise zipfile.BadZipFile(f"File is not a zip file: {self.path}")
+        fields: tuple = _END_OF_CENTRAL_DIRECTORY.unpack_from(mapping, eocd_offset)
+        count: int = fields[4]
+        directory_size: int = fields[5]
+        directory_offset: int = fields[6]
+        end_offset: int = eocd_offset
+        locator_offset: int = eocd_offset - _ZIP64_LOCATOR.size
+        if locator_offset >= 0 and mapping[locator_offset:locator_offset + 4] == b"PK\x06\x07":
+            zip64_offset: int = locator_offset - _ZIP64_END_OF_CENTRAL_DIRECTORY.size
+            zip64_fields: tuple = _ZIP64_END_OF_CENTRAL_DIRECTORY.unpack_from(mapping, zip64_offset)
+            if zip64_fields[0] != b"PK\x06\x06":
+                raise zipfile.BadZipFile("Bad ZIP64 end of central directory record")
+            count, directory_size, directory_offset = zip64_fields[7], zip64_fields[8], zip64_fields[9]
+            end_offset = zip64_offset
+        # data prepended to the archive (e.g. a self-extracting stub) shifts all offsets
+        self._concat: int = end_offset - directory_size - directory_offset
+        if self._concat < 0:
+            raise zipfile.BadZipFile("Bad offset of the central directory")
+        position: int = directory_offset + self._concat
+        index: int
+        for index in range(count):
+            record: tuple = _CENTRAL_DIRECTORY_RECORD.unpack_from(mapping, position)
+            if record[0] != b"PK\x01\x02":
+                raise zipfile.BadZipFile(f"Bad central directory record {index}")
+            self.record_offsets.append(position)
+            flag_bits: int = record[5]
+            name_length: int = record[12]
+            extra_length: int = record[13]
+            position += _CENTRAL_DIRECTORY_RECORD.size
+            name: bytes = mapping[position:position + name_length]
+            if not name.isascii():
+                if flag_bits & _MASK_UTF8:
+                    name.decode("utf-8")
+                else:
+                    self._transcoded_names[index] = name.decode("cp437").encode("utf-8")
+            file_size: int = record[11]
+            compress_size: int = record[10]
+            header_offset: int = record[18]
+            if 0xFFFFFFFF in (file_size, compress_size, header_offset):
+                file_size, compress_size, header_offset = self._read_zip64_extra(position + name_length, extra_length,
+                                                                                 file_size, compress_size, header_offset)
+            self.append(position, name_length, compress_size, file_size, record[9])
+            self.header_offsets.append(header_offset + self._concat)
+            self.data_offsets.append(-1)
+            self.methods.append(record[6])
+            self.flags.append(flag_bits)
+            position += name_length + extra_length + record[14]
+        self.index_names()
+        return None
+
+    def _read_zip64_extra(self, position: int, extra_length: int, file_size: int, compress_size: int, header_offset: int) -> tuple[int, int, int]:
+        """Return the sizes and header offset of a record, replaced by the values of its ZIP64 extra field."""
+        end: int = position + extra_length
+        while position + _EXTRA_FIELD_HEADER.size <= end:
+            field_id: int
+            field_length: int
+            field_id, field_length = _EXTRA_FIELD_HEADER.unpack_from(self._mmap, position)
+            position += _EXTRA_FIELD_HEADER.size
+            if field_id == _ZIP64_EXTRA:
+                values: list[int] = list(struct.unpack_from(f"<{field_length // 8}Q", self._mmap, position))
+                if file_size == 0xFFFFFFFF:
+                    file_size = values.pop(0)
+                if compress_size == 0xFFFFFFFF:
+                    compress_size = values.pop(0)
+                if header_offset == 0xFFFFFFFF:
+                    header_offset = values.pop(0)
+                break
+            position += field_length
+        return file_size, compress_size, header_offset
+
+    def get_info(self, index: int) -> zipfile.ZipInfo:
+        """Return the complete central directory record of a member as ZipInfo (e.g. to copy the member)."""
+        position: int = self.record_offsets[index]
+        record: tuple = _CENTRAL_DIRECTORY_RECORD.unpack_from(self._mmap, position)
+        info: zipfile.ZipInfo = MemberTable.get_info(self, index)
+        info.create_version, info.create_system, info.extract_version, info.reserved = record[1:5]
+        info.flag_bits, info.compress_type = record[5:7]
+        info.date_time = ((record[8] >> 9) + 1980, (record[8] >> 5) & 0xF, record[8] & 0x1F,
+                          record[7] >> 11, (record[7] >> 5) & 0x3F, (record[7] & 0x1F) * 2)
+        info.internal_attr, info.external_attr = record[16:18]
+        info.header_offset = self.header_offsets[index] - self._concat
+        position += _CENTRAL_DIRECTORY_RECORD.size + record[12]
+        info.extra = self._mmap[position:position + record[13]]
+        info.comment = self._mmap[position + record[13]:position + record[13] + record[14]]
+        return info
+
+    def get_data_offset(self, index: int) -> int:
+        """Return the offset of the member data, which follows the local file header."""
+        data_offset: int = self.data_offsets[index]
+        if data_offset < 0:
+            header: tuple = _LOCAL_FILE_HEADER.unpack_from(self._mmap, self.header_offsets[index])
+            if header[0] != b"PK\x03\x04":
+                raise zipfile.BadZipFile(f"Bad local file header of member {self.get_name(index)}")
+            data_offset = self.data_offsets[index] = self.header_offsets[index] + _LOCAL_FILE_HEADER.size + header[10] + header[11]
+            if data_offset + self.compress_sizes[index] > len(self._mmap):
+                raise zipfile.BadZipFile(f"Truncated data of member {self.get_name(index)}")
+        return data_offset
+
+    def read_raw(self, member: str | int) -> memoryview:
+        """Return the (compressed) data of a member as zero-copy view of the mapping."""
+        index: int = self.get_index(member)
+        data_offset: int = self.get_data_offset(index)
+        return self._view[data_offset:data_offset + self.compress_sizes[index]]
+
+    def read(self, member: str | int) -> memoryview:
+        """Return the data of a member. Stored members are zero-copy views of the mapping,
+        other members are decompressed (and checked against their CRC-32) and cached."""
+        index: int = self.get_index(member)
+        if self.flags[index] & _MASK_ENCRYPTED:
+            raise NotImplementedError(f"Encrypted member {self.get_name(index)} can not be read.")
+        raw_data: memoryview = self.read_raw(index)
+        if self.methods[index] == zipfile.ZIP_STORED:
+            return raw_data
+        with self._lock:
+            data: bytes | None = self._cache.get(index)
+            if data is not None:
+                self._cache.move_to_end(index)
+                return memoryview(data)
+        data = self._decompress(index, raw_data)
+        if len(data) <= self._cache_size // 4:
+            with self._lock:
+                if index not in self._cache:
+                    self._cache[index] = data
+                    self._cached_bytes += len(data)
+                while self._cached_bytes > self._cache_size:
+                    self._cached_bytes -= len(self._cache.popitem(last=False)[1])
+        return memoryview(data)
+
+    def _decompress(self, index: int, raw_data: memoryview) -> bytes:
+        """Decompress the data of a member and verify its size and CRC-32."""
+        method: int = self.methods[index]
+        try:
+            if method == zipfile.ZIP_DEFLATED:
+                data: bytes = zlib.decompress(raw_data, -zlib.MAX_WBITS, self.file_sizes[index] or zlib.DEF_BUF_SIZE)
+            elif method == zipfile.ZIP_BZIP2:
+                data = bz2.decompress(raw_data)
+            else:
+                data = get_decompressor(method).decompress(bytes(raw_data))
+        except (zlib.error, OSError, EOFError) as e:
+            raise zipfile.BadZipFile(f"Bad data of member {self.get_name(index)}: {e}")
+        if len(data) != self.file_sizes[index] or zlib.crc32(data) != self.crcs[index]:
+            raise zipfile.BadZipFile(f"Bad CRC-32 for member {self.get_name(index)}")
+        return data
+
+    def open(self, member: str | int, mode: str = "r") -> IO[bytes]:
+        """Return a binary stream of the data of a member (see read()). Deflated members which
+        are not cached are decompressed while they are read."""
+        if mode != "r":
+            raise ValueError("open() requires mode 'r'")
+        index: int = self.get_index(member)
+        if self.methods[index] == zipfile.ZIP_DEFLATED and not self.flags[index] & _MASK_ENCRYPTED:
+            with self._lock:
+                data: bytes | None = self._cache.get(index)
+            if data is None:
+                return io.BufferedReader(InflateStream(self.read_raw(index), self.file_sizes[index], self.crcs[index], self.get_name(index)))
+        return io.BufferedReader(MemoryStream(self.read(index)))
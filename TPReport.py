@@ -0,0 +1,225 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Report.py
+
+Provides a machine-readable result model for checking and fixing an
+XBRL Taxonomy Package. Results can be rendered on the console or
+written as JSON / JSON Lines.
+"""
+
+import json
+import time
+from typing import Any, Callable, IO
+from colorama import Fore
+from TPMisc import print_color_msg
+from TPProfile import StageRecord
+
+# possible status values of a report entry
+PASSED: str = "passed"
+FAILED: str = "failed"
+ERROR: str = "error"
+DONE: str = "done"
+
+class ReportEntry:
+    """The result of a single check or fix step."""
+    def __init__(self, stage: str, name: str, status: str, message: str, error_code: str | None = None,
+                 member: str | None = None, duration: float = 0.0, details: list[str] | None = None) -> None:
+        """class constructor"""
+        self.stage = stage
+        self.name = name
+        self.status = status
+        self.message = message
+        self.error_code = error_code
+        self.member = member
+        self.duration = duration
+        self.details = details or []
+        return None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the entry as JSON serializable dictionary."""
+        return {
+            "stage": self.stage,
+            "name": self.name,
+            "status": self.status,
+            "message": self.message,
+            "errorCode": self.error_code,
+            "member": self.member,
+            "duration": round(self.duration, 6),
+            "details": self.details,
+        }
+
+    @staticmethod
+    def from_dict(entry: dict[str, Any]) -> "ReportEntry":
+        """Return an entry from its dictionary, see to_dict()."""
+        return ReportEntry(entry["stage"], entry["name"], entry["status"], entry["message"], entry["errorCode"],
+                           entry["member"], entry["duration"], entry["details"])
+
+class ConsoleRenderer:
+    """Render a report as colorized console output while it is being filled."""
+    COLORS: dict[str, str] = {PASSED: Fore.GREEN, FAILED: Fore.RED, ERROR: Fore.RED, DONE: Fore.YELLOW}
+
+    def render_header(self, report: "Report") -> None:
+        print_color_msg(f"Input information:",Fore.BLUE)
+        print_color_msg(f"-"*18,Fore.BLUE)
+        print_color_msg(f"    Provider -> {report.provider}",Fore.BLUE)
+        print_color_msg(f"    Package  -> {report.package}\n",Fore.BLUE)
+        return None
+
+    def render_section(self, title: str, underline: str = "") -> None:
+        if underline:
+            print_color_msg(title,Fore.BLUE)
+            print_color_msg(underline,Fore.BLUE)
+        else:
+            print_color_msg(title,Fore.YELLOW)
+        return None
+
+    def render_entry(self, entry: ReportEntry) -> None:
+        detail: str
+        for detail in entry.details:
+            print_color_msg(f"    {detail}",Fore.YELLOW)
+        if entry.stage == "check":
+            prefix: str = "DONE" if entry.status == PASSED else "ERROR"
+            print_color_msg(f"    {prefix}: {entry.message}",self.COLORS[entry.status])
+        else:
+            print_color_msg(f"    {entry.message}",self.COLORS[entry.status])
+        return None
+
+    def render_result(self, message: str, success: bool) -> None:
+        if success:
+            print_color_msg(f"\nOutput result:",Fore.BLUE)
+            print_color_msg(f"-"*14,Fore.BLUE)
+            print_color_msg(f"    {message}",Fore.BLUE)
+        else:
+            print_color_msg(f"    ERROR: {message}",Fore.RED)
+        return None
+
+class Report:
+    """Collects the results of checking and fixing a single taxonomy package."""
+    def __init__(self, provider: str, package: str, renderer: ConsoleRenderer | None = None) -> None:
+        """class constructor"""
+        self.provider = provider
+        self.package = package
+        self.renderer = renderer
+        self.entries: list[ReportEntry] = []
+        self.result: str | None = None
+        self.success: bool = False
+        # path of the fixed package and whether the results were taken from the cache (see TPCache.py)
+        self.output: str | None = None
+        self.cached: bool = False
+        # instrumented stages of the run (see TPProfile.py)
+        self.stages: list[StageRecord] = []
+        self.start_time: float = time.perf_counter()
+        self.duration: float = 0.0
+        if self.renderer is not None:
+            self.renderer.render_header(self)
+        return None
+
+    def add(self, entry: ReportEntry) -> ReportEntry:
+        """Add an entry to the report and render it."""
+        self.entries.append(entry)
+        if self.renderer is not None:
+            self.renderer.render_entry(entry)
+        return entry
+
+    def section(self, title: str, underline: str = "") -> None:
+        """Start a new section of the console output."""
+        if self.renderer is not None:
+            self.renderer.render_section(title, underline)
+        return None
+
+    def check(self, name: str, check: Callable[..., bool], *args: Any, passed_msg: str, failed_msg: str,
+              error_code: str | None = None, member: str | None = None, messages: list[str] | None = None,
+              members: list[str] | None = None) -> bool:
+        """Run a check, record its status, timing and any messages it produced, and return its outcome.
+        A failed check is recorded with the first member the check added to members (if any)."""
+        return self.add(self.run_check(name, check, *args, passed_msg=passed_msg, failed_msg=failed_msg, error_code=error_code,
+                                       member=member, messages=messages, members=members)).status == PASSED
+
+    @staticmethod
+    def run_check(name: str, check: Callable[..., bool], *args: Any, passed_msg: str, failed_msg: str,
+                  error_code: str | None = None, member: str | None = None, messages: list[str] | None = None,
+                  members: list[str] | None = None) -> ReportEntry:
+        """Run a check and return its entry without adding it to a report, see check()."""
+        first_message: int = len(messages) if messages is not None else 0
+        first_member: int = len(members) if members is not None else 0
+        start_time: float = time.perf_counter()
+        status: str
+        message: str
+        try:
+            if check(*args):
+                status, message = PASSED, passed_msg
+            else:
+                status, message = FAILED, failed_msg
+        except Exception as e:
+            status, message = ERROR, f"{failed_msg} ({type(e).__name__}: {e})"
+        details: list[str] = messages[first_message:] if messages is not None else []
+        if status != PASSED and members is not None and len(members) > first_member:
+            member = members[first_member]
+        return ReportEntry("check", name, status, message, error_code if status != PASSED else None, member, time.perf_counter() - start_time, details)
+
+    def step(self, name: str, message: str, status: str = DONE, member: str | None = None) -> None:
+        """Record a fix step."""
+        self.add(ReportEntry("fix", name, status, message, member=member))
+        return None
+
+    def finish(self, message: str, success: bool = True) -> None:
+        """Record the final result of the run."""
+        self.result = message
+        self.success = success
+        self.duration = time.perf_counter() - self.start_time
+        if self.renderer is not None:
+            self.renderer.render_result(message, success)
+        return None
+
+    def replay(self, report: dict[str, Any]) -> None:
+        """Fill the report with the entries and the result of a previous run of an
+        unchanged package (see TPCache.py) and render them."""
+        self.cached = True
+        self.output = report["output"]
+        self.section(f"Analyzis results (cached):", f"-"*27)
+        stage: str = "check"
+        entry: dict[str, Any]
+        for entry in report["entries"]:
+            if entry["stage"] != stage:
+                stage = entry["stage"]
+                self.section(f"\nFixing package...")
+            self.add(ReportEntry.from_dict(entry))
+        self.finish(report["result"], report["success"])
+        return None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the report as JSON serializable dictionary."""
+        return {
+            "provider": self.provider,
+            "package": self.package,
+            "success": self.success,
+            "result": self.result,
+            "output": self.output,
+            "cached": self.cached,
+            "duration": round(self.duration, 6),
+            "entries": [entry.to_dict() for entry in self.entries],
+            "stages": [stage.to_dict() for stage in self.stages],
+        }
+
+def write_json(reports: list[dict[str, Any]], stream: IO[str]) -> None:
+    """Write the reports as one JSON document (a single report is written as object)."""
+    json.dump(reports if len(reports) != 1 else reports[0], stream, indent=2)
+    stream.write("\n")
+    return None
+
+def write_jsonl(reports: list[dict[str, Any]], stream: IO[str]) -> None:
+    """Write one JSON line per report entry, each carrying its package and provider."""
+    report: dict[str, Any]
+    for report in reports:
+        entry: dict[str, Any]
+        for entry in report["entries"]:
+            stream.write(json.dumps({"provider": report["provider"], "package": report["package"], **entry}) + "\n")
+        stream.write(json.dumps({"provider": report["provider"], "package": report["package"], "stage": "result",
+                                 "success": report["success"], "result": report["result"], "duration": report["duration"]}) + "\n")
+    return None
+
+REPORT_WRITERS: dict[str, Callable[[list[dict[str, Any]], IO[str]], None]] = {
+    "json": write_json,
+    "jsonl": write_jsonl,
+}
@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Schema.py
+
+Provides access to the XML Schemas prescribed by the Taxonomy Package
+standard. The schemas are bundled in the schemas/ folder, resolved
+without network access and compiled only once per process.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from lxml import etree
+
+SCHEMA_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schemas")
+
+# official schema locations and the corresponding bundled copies
+BUNDLED_SCHEMAS: dict[str, str] = {
+    "http://www.xbrl.org/2016/taxonomy-package.xsd": "taxonomy-package.xsd",
+    "http://xbrl.org/2016/taxonomy-package.xsd": "taxonomy-package.xsd",
+    "http://www.xbrl.org/2016/taxonomy-package-catalog.xsd": "taxonomy-package-catalog.xsd",
+    "http://xbrl.org/2016/taxonomy-package-catalog.xsd": "taxonomy-package-catalog.xsd",
+    "http://www.w3.org/2001/xml.xsd": "xml.xsd",
+    # imported by taxonomy-package.xsd
+    "http://www.w3.org/2001/03/xml.xsd": "xml-2001-03.xsd",
+}
+
+# maximum number of compiled schemas kept in memory
+SCHEMA_CACHE_SIZE: int = 32
+
+_schema_cache: "OrderedDict[tuple[str, str], etree.XMLSchema]" = OrderedDict()
+_remote_schemas: dict[str, bytes] = {}
+_schema_lock: threading.Lock = threading.Lock()
+
+class BundledSchemaResolver(etree.Resolver):
+    """Resolve official schema locations to the bundled copies."""
+    def resolve(self, system_url: str, public_id: str, context: object) -> object:
+        schema_path: str | None = get_bundled_schema_path(system_url)
+        if schema_path is not None:
+            return self.resolve_filename(schema_path, context)
+        return None
+
+def get_bundled_schema_path(schema_uri: str) -> str | None:
+    """Return the path of the bundled copy of a schema, or None if it is not bundled."""
+    if schema_uri in BUNDLED_SCHEMAS:
+        return os.path.join(SCHEMA_DIR, BUNDLED_SCHEMAS[schema_uri])
+    return None
+
+def read_schema(schema_uri: str) -> bytes:
+    """Return the content of a schema document. Bundled schemas and local files are
+    read from disk, any other remote schema is fetched once per process."""
+    schema_path: str | None = get_bundled_schema_path(schema_uri)
+    if schema_path is None and "://" not in schema_uri:
+        schema_path = schema_uri
+    if schema_path is not None:
+        with open(schema_path, "rb") as schema_file:
+            return schema_file.read()
+    if schema_uri not in _remote_schemas:
+        # urllib.request is slow to import and only needed for schemas which are not bundled
+        from urllib.request import urlopen
+        try:
+            with urlopen(schema_uri) as response:
+                _remote_schemas[schema_uri] = response.read()
+        except OSError:
+            raise etree.XMLSchemaParseError(f"Failed to locate the main schema resource at '{schema_uri}'.")
+    return _remote_schemas[schema_uri]
+
+def get_xml_schema(schema_uri: str) -> etree.XMLSchema:
+    """Return the compiled schema. Compiled schemas are kept in a process-wide LRU cache
+    keyed by schema URI and content hash, so each schema is compiled once per process.
+    The bundled schemas never change, so they are keyed by URI and only read to be compiled."""
+    schema_content: bytes | None = None
+    key: tuple[str, str] = (schema_uri, "")
+    if get_bundled_schema_path(schema_uri) is None:
+        schema_content = read_schema(schema_uri)
+        key = (schema_uri, hashlib.sha256(schema_content).hexdigest())
+    with _schema_lock:
+        xml_schema: etree.XMLSchema | None = _schema_cache.get(key)
+        if xml_schema is not None:
+            _schema_cache.move_to_end(key)
+            return xml_schema
+        if schema_content is None:
+            schema_content = read_schema(schema_uri)
+        # only schemas which are neither bundled nor local may import from the network
+        parser: etree.XMLParser = etree.XMLParser(no_network=schema_uri not in _remote_schemas)
+        parser.resolvers.add(BundledSchemaResolver())
+        base_url: str = schema_uri if "://" in schema_uri else os.path.abspath(schema_uri)
+        try:
+            schema_document: etree._Element = etree.fromstring(schema_content, parser, base_url=base_url)
+        except etree.XMLSyntaxError as syntax_error:
+            raise etree.XMLSchemaParseError(f"Schema {schema_uri} is not well-formed: {syntax_error}")
+        xml_schema = etree.XMLSchema(schema_document)
+        _schema_cache[key] = xml_schema
+        if len(_schema_cache) > SCHEMA_CACHE_SIZE:
+            _schema_cache.popitem(last=False)
+        return xml_schema
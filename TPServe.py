@@ -0,0 +1,384 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Serve.py
+
+Runs the checks and fixers as long-running local service. The service
+keeps the modules imported, the schemas compiled and the indexes and
+readers of analyzed packages open, so repeated jobs do not pay for them
+again. Jobs are accepted as JSON over HTTP on a local port or a Unix
+socket and run on a bounded pool of worker threads:
+
+    POST /validate  {"provider": "EBA", "package": "/path/to/package.zip"}
+    POST /fix       {"provider": "EDINET", "package": "/path/to/package.zip"}
+    GET  /health
+
+Both job endpoints answer with the report of the package (see TPReport.py).
+The service does not access the network.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from colorama import Fore
+from TPCache import CACHE_DIR, CACHE_FILE, ResultCache, get_tool_version
+from TPMisc import print_color_msg
+from TPProvider import get_provider_path
+from TPReport import Report
+from TPZip import DEFAULT_COMPRESSION, get_compression
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8765
+# jobs waiting for a worker, further jobs are rejected until a worker is free
+DEFAULT_QUEUE_SIZE: int = 16
+# analyzed packages whose indexes, readers and DTS graphs are kept
+DEFAULT_MAX_PACKAGES: int = 32
+# requests only carry the job, not the package
+MAX_REQUEST_SIZE: int = 64 * 1024
+JOB_PATHS: frozenset[str] = frozenset({"/validate", "/fix"})
+
+class ServiceJob:
+    """A validate or fix job of the service."""
+    def __init__(self, provider: str, package: str, check_only: bool, compression: str = DEFAULT_COMPRESSION, compression_level: int | None = None,
+                 verify_crc: bool = False) -> None:
+        """class constructor"""
+        self.provider = provider
+        self.package = package
+        self.check_only = check_only
+        self.compression = compression
+        self.compression_level = compression_level
+        self.verify_crc = verify_crc
+        return None
+
+def read_job(path: str, payload: Any) -> ServiceJob:
+    """Return the job of a request to /validate or /fix. The package must be given as
+    absolute path, as the working directory of the service is unrelated to the client, and
+    the provider by a registered abbreviation (no module path), so clients can not make the
+    service import other modules. Raises ValueError for invalid requests."""
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object.")
+    provider: Any = payload.get("provider")
+    package: Any = payload.get("package")
+    if not isinstance(provider, str) or not provider:
+        raise ValueError("Field 'provider' is required.")
+    if ":" in provider or get_provider_path(provider) is None:
+        raise ValueError(f"Provider {provider} is not supported.")
+    if not isinstance(package, str) or not os.path.isabs(package):
+        raise ValueError("Field 'package' is required as absolute path.")
+    compression: Any = payload.get("compression", DEFAULT_COMPRESSION)
+    compression_level: Any = payload.get("compressionLevel")
+    verify_crc: Any = payload.get("verifyCrc", False)
+    if not isinstance(compression, str) or not (compression_level is None or type(compression_level) is int) or not isinstance(verify_crc, bool):
+        raise ValueError("Fields 'compression', 'compressionLevel' and 'verifyCrc' must be a string, an integer and a boolean.")
+    get_compression(compression, compression_level)
+    return ServiceJob(provider, package, path == "/validate", compression, compression_level, verify_crc)
+
+class ValidationService:
+    """Runs the jobs on a bounded pool of worker threads. The workers share one checker,
+    so the caches of analyzed packages stay warm across jobs (bounded by max_packages,
+    least recently used first). Fixed packages are written to the output folder."""
+    def __init__(self, output_folder: str, workers: int | None = None, queue_size: int = DEFAULT_QUEUE_SIZE, cache_path: str | None = None,
+                 max_packages: int = DEFAULT_MAX_PACKAGES) -> None:
+        """class constructor"""
+        from TPChecker import TPChecker
+        self.output_folder = output_folder
+        self.workers: int = workers or os.cpu_count() or 1
+        self.cache_path = cache_path
+        self.max_packages = max_packages
+        self.version: str = get_tool_version()
+        self.tp_checker: TPChecker = TPChecker(quiet=True)
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tp-serve")
+        # running and waiting jobs
+        self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(self.workers + queue_size)
+        self._lock: threading.Lock = threading.Lock()
+        self._jobs: int = 0
+        self._packages: OrderedDict[tuple[str, int, int], None] = OrderedDict()
+        # fixes of packages with the same name are written to the same destination one after the other
+        self._destination_locks: dict[str, threading.Lock] = {}
+        # sqlite connections can not be shared by threads, so every worker opens its own
+        self._local: threading.local = threading.local()
+        self._caches: list[ResultCache] = []
+        return None
+
+    def warm_up(self) -> None:
+        """Import the fixers and compile the schemas of the metadata files before the first job."""
+        import TPFixer
+        from TPChecker import TAXONOMY_PACKAGE_CATALOG_XSD, TAXONOMY_PACKAGE_XSD
+        from TPSchema import get_xml_schema
+        schema: str
+        for schema in (TAXONOMY_PACKAGE_XSD, TAXONOMY_PACKAGE_CATALOG_XSD):
+            get_xml_schema(schema)
+        return None
+
+    def get_status(self) -> dict[str, Any]:
+        """Return the state of the service as JSON serializable dictionary."""
+        with self._lock:
+            return {"status": "ok", "version": self.version, "workers": self.workers, "jobs": self._jobs, "packages": len(self._packages)}
+
+    def get_cache(self) -> ResultCache | None:
+        """Return the result cache of the current worker thread, or None if the service runs without cache."""
+        if self.cache_path is None:
+            return None
+        if not hasattr(self._local, "cache"):
+            from app import open_cache
+            self._local.cache = open_cache(self.cache_path)
+            if self._local.cache is not None:
+                with self._lock:
+                    self._caches.append(self._local.cache)
+        return self._local.cache
+
+    def submit(self, job: ServiceJob) -> Future | None:
+        """Queue a job and return its future, which results in the report of the package.
+        Returns None if all workers are busy and the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            return None
+        with self._lock:
+            self._jobs += 1
+        future: Future = self.executor.submit(self.run_job, job)
+        future.add_done_callback(self._release_slot)
+        return future
+
+    def _release_slot(self, future: Future) -> None:
+        with self._lock:
+            self._jobs -= 1
+        self._slots.release()
+        return None
+
+    def run_job(self, job: ServiceJob) -> dict[str, Any]:
+        """Process a job in a worker thread and return the report of the package."""
+        from app import run_package
+        report: Report = Report(job.provider, job.package)
+        if job.check_only:
+            run_package(job.provider, job.package, None, True, report, compression=job.compression, compression_level=job.compression_level,
+                        cache=self.get_cache(), verify_crc=job.verify_crc, tp_checker=self.tp_checker)
+        else:
+            destination_folder: str = os.path.join(self.output_folder, os.path.splitext(os.path.basename(job.package))[0])
+            with self._lock:
+                destination_lock: threading.Lock = self._destination_locks.setdefault(destination_folder, threading.Lock())
+            with destination_lock:
+                run_package(job.provider, job.package, destination_folder, False, report, compression=job.compression,
+                            compression_level=job.compression_level, cache=self.get_cache(), verify_crc=job.verify_crc, tp_checker=self.tp_checker)
+        self.touch_package(job.package)
+        return report.to_dict()
+
+    def touch_package(self, package: str) -> None:
+        """Mark the package as recently used and drop the caches of the least recently used packages."""
+        try:
+            archive_key: tuple[str, int, int] = self.tp_checker.get_archive_key(package)
+        except OSError:
+            return None
+        with self._lock:
+            self._packages[archive_key] = None
+            self._packages.move_to_end(archive_key)
+            while len(self._packages) > self.max_packages:
+                self.tp_checker.release(self._packages.popitem(last=False)[0])
+        return None
+
+    def close(self) -> None:
+        """Wait for the running jobs and close the result caches."""
+        self.executor.shutdown(wait=True)
+        cache: ResultCache
+        for cache in self._caches:
+            cache.close()
+        return None
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """Answers the requests to the service with JSON."""
+    server_version: str = "TPServe"
+    # connections are kept alive, so clients do not connect for every job
+    protocol_version: str = "HTTP/1.1"
+
+    def send_json(self, status: int, body: dict[str, Any]) -> None:
+        """Send a JSON response."""
+        data: bytes = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(data)
+        return None
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return None
+        self.send_json(200, self.server.service.get_status())
+        return None
+
+    def do_POST(self) -> None:
+        try:
+            length: int = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_REQUEST_SIZE:
+            # the body is not read, so the connection can not be reused
+            self.close_connection = True
+            self.send_json(413 if length > 0 else 400, {"error": "Invalid request size"})
+            return None
+        body: bytes = self.rfile.read(length)
+        if self.path not in JOB_PATHS:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return None
+        try:
+            job: ServiceJob = read_job(self.path, json.loads(body or b"null"))
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return None
+        if not os.path.isfile(job.package):
+            self.send_json(404, {"error": f"Package {job.package} not found"})
+            return None
+        future: Future | None = self.server.service.submit(job)
+        if future is None:
+            self.send_json(503, {"error": "All workers are busy"})
+            return None
+        try:
+            report: dict[str, Any] = future.result()
+        except Exception as e:
+            self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return None
+        self.send_json(200, report)
+        return None
+
+    def address_string(self) -> str:
+        # clients of Unix sockets have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) and self.client_address else "local"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+        return None
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    """Serves the service on a local TCP port."""
+    def __init__(self, address: tuple[str, int], service: ValidationService, quiet: bool = False) -> None:
+        """class constructor"""
+        self.service = service
+        self.quiet = quiet
+        ThreadingHTTPServer.__init__(self, address, ServiceRequestHandler)
+        return None
+
+class ServiceUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves the service on a Unix socket, which is replaced if it exists."""
+    daemon_threads: bool = True
+
+    def __init__(self, socket_path: str, service: ValidationService, quiet: bool = False) -> None:
+        """class constructor"""
+        self.service = service
+        self.quiet = quiet
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path, ServiceRequestHandler)
+        return None
+
+    def server_close(self) -> None:
+        socketserver.UnixStreamServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        return None
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix socket."""
+    def __init__(self, socket_path: str, timeout: float | None = None) -> None:
+        """class constructor"""
+        http.client.HTTPConnection.__init__(self, "localhost", timeout=timeout)
+        self.socket_path = socket_path
+        return None
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+        return None
+
+class ServiceClient:
+    """Client of the service, e.g. for scripts and tests. The connection is kept
+    alive between requests. Every request returns the status and the JSON body."""
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, socket_path: str | None = None, timeout: float | None = None) -> None:
+        """class constructor"""
+        self.connection: http.client.HTTPConnection = (UnixHTTPConnection(socket_path, timeout) if socket_path is not None
+                                                       else http.client.HTTPConnection(host, port, timeout=timeout))
+        return None
+
+    def request(self, method: str, path: str, payload: dict[str, Any] | None = None) -> tuple[int, dict[str, Any]]:
+        """Send a request and return the status and the body of the response."""
+        body: bytes | None = json.dumps(payload).encode("utf-8") if payload is not None else None
+        try:
+            return self.send(method, path, body)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # the service closed the idle connection, so it is opened again
+            self.connection.close()
+            return self.send(method, path, body)
+
+    def send(self, method: str, path: str, body: bytes | None) -> tuple[int, dict[str, Any]]:
+        self.connection.request(method, path, body, {"Content-Type": "application/json"})
+        response: http.client.HTTPResponse = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def validate(self, provider: str, package: str, **options: Any) -> tuple[int, dict[str, Any]]:
+        """Validate a package, see read_job() for the options."""
+        return self.request("POST", "/validate", {"provider": provider, "package": package, **options})
+
+    def fix(self, provider: str, package: str, **options: Any) -> tuple[int, dict[str, Any]]:
+        """Fix a package, see read_job() for the options."""
+        return self.request("POST", "/fix", {"provider": provider, "package": package, **options})
+
+    def health(self) -> tuple[int, dict[str, Any]]:
+        return self.request("GET", "/health")
+
+    def close(self) -> None:
+        self.connection.close()
+        return None
+
+def create_server(service: ValidationService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, socket_path: str | None = None,
+                  quiet: bool = False) -> socketserver.BaseServer:
+    """Return the server of the service on a Unix socket if a path is passed, else on a TCP port."""
+    if socket_path is not None:
+        return ServiceUnixServer(socket_path, service, quiet)
+    return ServiceHTTPServer((host, port), service, quiet)
+
+def main(argv: list[str]) -> None:
+    """driver code of the serve subcommand"""
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog="app.py serve", description="Check and fix XBRL Taxonomy Packages as long-running local service.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT}).")
+    parser.add_argument("--socket", metavar="PATH", help="Listen on a Unix socket instead of a TCP port.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker threads (default: number of cpus).")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help=f"Number of jobs waiting for a worker before further jobs are rejected (default: {DEFAULT_QUEUE_SIZE}).")
+    parser.add_argument("--max-packages", type=int, default=DEFAULT_MAX_PACKAGES, help=f"Number of analyzed packages kept in memory (default: {DEFAULT_MAX_PACKAGES}).")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "output"), help="Folder for the fixed taxonomy packages.")
+    parser.add_argument("--no-cache", action="store_true", help="Check and fix all packages, even those which did not change since the last run.")
+    parser.add_argument("--quiet", action="store_true", help="Do not log the requests.")
+    args = parser.parse_args(argv)
+
+    service: ValidationService = ValidationService(os.path.abspath(args.output), args.workers, args.queue_size,
+                                                   None if args.no_cache else os.path.join(CACHE_DIR, CACHE_FILE), args.max_packages)
+    service.warm_up()
+    try:
+        server: socketserver.BaseServer = create_server(service, args.host, args.port, args.socket, args.quiet)
+    except OSError as e:
+        print_color_msg(f"Error: {e}",Fore.RED)
+        sys.exit(2)
+    # stop like on Ctrl+C, so running jobs are finished
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    address: str = f"unix:{args.socket}" if args.socket else f"http://{server.server_address[0]}:{server.server_address[1]}"
+    print_color_msg(f"Serving on {address} with {service.workers} workers...",Fore.YELLOW)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return None
@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Store.py
+
+Provides a content-addressed store of package members. Consecutive
+versions of a taxonomy share most of their members byte for byte, so
+every distinct member is stored once, keyed by the SHA-256 of its data,
+and extracted packages consist of hardlinks into the store. Members are
+recognized by the hash of their compressed data, so unchanged members
+are neither decompressed nor written again. The compressed data of the
+members of fixed packages is kept as well, so fixed packages are
+assembled from the store and only changed members are compressed.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import zipfile
+from typing import IO, Any
+from zipfile import ZipInfo
+from TPCache import CACHE_DIR
+from TPReader import PackageReader
+from TPZip import COPY_CHUNK_SIZE, STORED_EXTENSIONS, new_member_info, read_and_compress_member
+
+STORE_DIR: str = os.path.join(CACHE_DIR, "store")
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS members (
+    raw_key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS packed (
+    digest TEXT NOT NULL,
+    compression TEXT NOT NULL,
+    compress_type INTEGER NOT NULL,
+    flag_bits INTEGER NOT NULL,
+    crc INTEGER NOT NULL,
+    compress_size INTEGER NOT NULL,
+    PRIMARY KEY (digest, compression)
+);
+"""
+
+class MemberStore:
+    """Content-addressed store of package members. The data of a member is stored as
+    read-only file objects/<digest>, its compressed data as packed/<digest>.<compression>,
+    and an index maps the compressed data of archive members and the packed members to
+    the digests. Files are added atomically, so runs can share the store."""
+    def __init__(self, path: str | None = None) -> None:
+        """class constructor"""
+        self.path = path or STORE_DIR
+        folder: str
+        for folder in ("objects", "packed"):
+            os.makedirs(os.path.join(self.path, folder), exist_ok=True)
+        # batch workers share the index, so writers wait for each other, and members are
+        # packed on several threads; the index can be rebuilt, so commits are not synced
+        self.connection: sqlite3.Connection = sqlite3.connect(os.path.join(self.path, "index.sqlite"), timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+        self._lock: threading.Lock = threading.Lock()
+        # extracted files by device and inode, with the digest, size and mtime they were extracted with
+        self.extracted: dict[tuple[int, int], tuple[str, int, int]] = {}
+        return None
+
+    def close(self) -> None:
+        self.connection.close()
+        return None
+
+    def __enter__(self) -> "MemberStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+        return None
+
+    def get_object_path(self, digest: str) -> str:
+        """Return the path of the data of a member in the store."""
+        return os.path.join(self.path, "objects", digest[:2], digest[2:])
+
+    def get_packed_path(self, digest: str, compression: str) -> str:
+        """Return the path of the compressed data of a member in the store."""
+        return os.path.join(self.path, "packed", digest[:2], f"{digest[2:]}.{compression}")
+
+    def put_file(self, file_path: str, target_path: str) -> bool:
+        """Add a file to the store as read-only link, or as copy if the store is on another
+        file system, unless another run stored it first. Returns True if the file was added."""
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        # the files are shared by all extracted packages
+        os.chmod(file_path, 0o444)
+        try:
+            os.link(file_path, target_path)
+            return True
+        except FileExistsError:
+            return False
+        except OSError:
+            pass
+        temp_fd: int
+        temp_path: str
+        temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target_path))
+        os.close(temp_fd)
+        shutil.copyfile(file_path, temp_path)
+        os.chmod(temp_path, 0o444)
+        os.replace(temp_path, target_path)
+        return True
+
+    def link(self, digest: str, target_path: str) -> None:
+        """Create a file as link of a member in the store, or as copy if the store is on
+        another file system."""
+        if os.path.lexists(target_path):
+            os.remove(target_path)
+        try:
+            os.link(self.get_object_path(digest), target_path)
+        except OSError:
+            shutil.copyfile(self.get_object_path(digest), target_path)
+        return None
+
+    def add_member(self, package_reader: PackageReader, index: int, target_path: str) -> bool:
+        """Extract an archive member to a file, which is a link into the store, and remember
+        the file for packing. Members already in the store are found by the hash of their
+        compressed data and are not decompressed. Returns True if the member was added."""
+        raw_key: str = f"{package_reader.methods[index]}:{hashlib.sha256(package_reader.read_raw(index)).hexdigest()}"
+        with self._lock:
+            row: tuple[str] | None = self.connection.execute("SELECT digest FROM members WHERE raw_key = ?", (raw_key,)).fetchone()
+        digest: str
+        added: bool = False
+        if row is not None and os.path.isfile(self.get_object_path(row[0])):
+            digest = row[0]
+            self.link(digest, target_path)
+        else:
+            # the member is extracted like by extractall() and hashed on the way, then the file
+            # itself becomes the object in the store (temporary files in one folder are slow)
+            if os.path.lexists(target_path):
+                os.remove(target_path)
+            content_hash = hashlib.sha256()
+            target_file: IO[bytes]
+            member: IO[bytes]
+            with open(target_path, "wb") as target_file, package_reader.open(index) as member:
+                chunk: bytes
+                for chunk in iter(lambda: member.read(COPY_CHUNK_SIZE), b""):
+                    content_hash.update(chunk)
+                    target_file.write(chunk)
+            digest = content_hash.hexdigest()
+            added = self.put_file(target_path, self.get_object_path(digest))
+            if not added:
+                self.link(digest, target_path)
+            with self._lock:
+                self.connection.execute("INSERT OR REPLACE INTO members (raw_key, digest) VALUES (?, ?)", (raw_key, digest))
+        target_stat: os.stat_result = os.stat(target_path)
+        self.extracted[(target_stat.st_dev, target_stat.st_ino)] = (digest, target_stat.st_size, target_stat.st_mtime_ns)
+        return added
+
+    def extract_package(self, package_reader: PackageReader, destination_folder: str) -> tuple[int, int]:
+        """Extract all members of an archive into a folder as links into the store. Returns
+        the number of members added to the store and the number of all extracted members.
+        Raises zipfile.BadZipFile for members which would be extracted outside of the folder."""
+        destination: str = os.path.abspath(destination_folder)
+        added: int = 0
+        total: int = 0
+        try:
+            index: int
+            for index in range(len(package_reader)):
+                name: str = package_reader.get_name(index)
+                target_path: str = os.path.normpath(os.path.join(destination, name))
+                if os.path.commonpath([destination, target_path]) != destination:
+                    raise zipfile.BadZipFile(f"Member {name} would be extracted outside of {destination_folder}")
+                if name.endswith("/"):
+                    os.makedirs(target_path, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                added += self.add_member(package_reader, index, target_path)
+                total += 1
+        finally:
+            with self._lock:
+                self.connection.commit()
+        return added, total
+
+    def read_and_compress_member(self, file_path: str, arcname: str, compress_type: int, level: int | None) -> tuple[ZipInfo, bytes]:
+        """Compress a file as member like TPZip.read_and_compress_member(). Unchanged extracted
+        files are taken compressed from the store, and compressed only once otherwise."""
+        if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+            compress_type = zipfile.ZIP_STORED
+        file_stat: os.stat_result = os.stat(file_path)
+        extracted: tuple[str, int, int] | None = self.extracted.get((file_stat.st_dev, file_stat.st_ino))
+        # stored members need no compression, files not extracted from the store (or changed since) are not kept
+        if compress_type == zipfile.ZIP_STORED or extracted is None or extracted[1:] != (file_stat.st_size, file_stat.st_mtime_ns):
+            return read_and_compress_member(file_path, arcname, compress_type, level)
+        digest: str = extracted[0]
+        compression: str = f"{compress_type}-{level}"
+        with self._lock:
+            row: tuple[int, int, int, int] | None = self.connection.execute(
+                "SELECT compress_type, flag_bits, crc, compress_size FROM packed WHERE digest = ? AND compression = ?", (digest, compression)).fetchone()
+        info: ZipInfo
+        data: bytes
+        packed_path: str
+        if row is not None:
+            # incompressible data is stored, so it is read from the object itself
+            packed_path = file_path if row[0] == zipfile.ZIP_STORED else self.get_packed_path(digest, compression)
+            if os.path.isfile(packed_path):
+                info = new_member_info(arcname)
+                info.compress_type, info.flag_bits, info.CRC, info.compress_size = row
+                info.file_size = file_stat.st_size
+                packed_file: IO[bytes]
+                with open(packed_path, "rb") as packed_file:
+                    data = packed_file.read()
+                if len(data) == info.compress_size:
+                    return info, data
+        info, data = read_and_compress_member(file_path, arcname, compress_type, level)
+        if info.compress_type != zipfile.ZIP_STORED:
+            packed_path = self.get_packed_path(digest, compression)
+            os.makedirs(os.path.dirname(packed_path), exist_ok=True)
+            temp_fd: int
+            temp_path: str
+            temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(packed_path))
+            temp_file: IO[bytes]
+            with os.fdopen(temp_fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.chmod(temp_path, 0o444)
+            os.replace(temp_path, packed_path)
+        with self._lock:
+            self.connection.execute("INSERT OR REPLACE INTO packed (digest, compression, compress_type, flag_bits, crc, compress_size) VALUES (?, ?, ?, ?, ?, ?)",
+                                    (digest, compression, info.compress_type, info.flag_bits, info.CRC, info.compress_size))
+            self.connection.commit()
+        return info, data
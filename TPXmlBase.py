@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""XmlBase.py
+
+Provides the XML Base resolution of the relative URLs of a document
+(https://www.w3.org/TR/xmlbase/). Each document is walked once with a
+stack of effective base URIs and its URLs are emitted as flat table,
+which the catalog and DTS checks consume without parsing it again.
+"""
+
+import sys
+from array import array
+from lxml import etree
+from typing import IO, Iterator
+from urllib.parse import urljoin
+
+XML_BASE: str = "{http://www.w3.org/XML/1998/namespace}base"
+XLINK_HREF: str = "{http://www.w3.org/1999/xlink}href"
+# attributes holding the URLs of taxonomy schemas and linkbases
+DEFAULT_URL_ATTRIBUTES: tuple[str, ...] = (XLINK_HREF, "schemaLocation")
+
+class UrlTable:
+    """The URLs of a document in document order. Row i was found in the attribute attributes[i]
+    of the elements[i]-th element (with the tag tags[i]); values[i] is the attribute value as
+    written and urls[i] and fragments[i] the URL it resolves to and its fragment identifier."""
+    def __init__(self, document_url: str) -> None:
+        """class constructor"""
+        self.document_url = document_url
+        self.elements: array = array("i")
+        self.tags: list[str] = []
+        self.attributes: list[str] = []
+        self.values: list[str] = []
+        self.urls: list[str] = []
+        self.fragments: list[str] = []
+        return None
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def rows(self, attribute: str | None = None, tags: frozenset[str] | None = None) -> Iterator[int]:
+        """Yield the rows of an attribute (or all attributes), optionally of certain elements only."""
+        row: int
+        for row in range(len(self.urls)):
+            if (attribute is None or self.attributes[row] == attribute) and (tags is None or self.tags[row] in tags):
+                yield row
+
+class XmlBaseResolver:
+    """Resolves the URLs of documents against their effective base URIs. The resolved URLs are
+    memoized per (base, relative URL) pair, as taxonomies repeat the same hrefs over and over
+    again (e.g. the locators of a linkbase pointing to the concepts of one schema)."""
+    def __init__(self) -> None:
+        """class constructor"""
+        self._joined: dict[tuple[str, str], str] = {}
+        return None
+
+    def join(self, base: str, url: str) -> tuple[str, str]:
+        """Resolve a url against a base URI and return the resolved URL and the fragment identifier."""
+        fragment: str
+        url, _, fragment = url.strip().partition("#")
+        resolved_url: str | None = self._joined.get((base, url))
+        if resolved_url is None:
+            resolved_url = self._joined[(base, url)] = urljoin(base, url)
+        return resolved_url, fragment
+
+    def resolve_document(self, document: IO[bytes], document_url: str, url_attributes: tuple[str, ...] = DEFAULT_URL_ATTRIBUTES) -> UrlTable:
+        """Walk a document once and resolve the URL attributes of all elements. An xml:base
+        attribute applies to the element it appears on and to its descendants."""
+        url_table: UrlTable = UrlTable(document_url)
+        base_stack: list[str] = [document_url]
+        element_count: int = 0
+        event: str
+        element: etree._Element
+        for event, element in etree.iterparse(document, events=("start", "end"), no_network=True, resolve_entities=False, huge_tree=True):
+            if event == "end":
+                base_stack.pop()
+                # drop processed elements, only the URL table is kept (the root
+                # element has no parent, but may follow comments)
+                element.clear(keep_tail=True)
+                parent: etree._Element | None = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    del parent[0]
+                continue
+            base: str | None = element.get(XML_BASE)
+            base_stack.append(self.join(base_stack[-1], base)[0] if base is not None else base_stack[-1])
+            attribute: str
+            for attribute in url_attributes:
+                value: str | None = element.get(attribute)
+                if value is None:
+                    continue
+                url: str
+                fragment: str
+                url, fragment = self.join(base_stack[-1], value)
+                url_table.elements.append(element_count)
+                url_table.tags.append(sys.intern(element.tag))
+                url_table.attributes.append(attribute)
+                url_table.values.append(value)
+                url_table.urls.append(url)
+                url_table.fragments.append(fragment)
+            element_count += 1
+        return url_table
@@ -0,0 +1,353 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Zip.py
+
+Provides ZIP container helpers to rewrite a taxonomy package into a
+new archive without extracting it: members are copied in their
+already-compressed form and new members can be injected. Folders are
+packed reproducibly, with the members compressed on a thread pool.
+"""
+
+import contextvars
+import os
+import struct
+import tempfile
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, TYPE_CHECKING, Iterable
+from zipfile import ZipFile, ZipInfo
+from TPReader import MemberTable, PackageReader
+from TPZipInternals import append_member, get_compressor, get_lock
+
+if TYPE_CHECKING:
+    from TPStore import MemberStore
+
+# size of the chunks used to copy compressed member data
+COPY_CHUNK_SIZE: int = 1024 * 1024
+
+# supported compression methods and their valid levels (lzma has no levels in zip archives)
+COMPRESSION_METHODS: dict[str, int] = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+COMPRESSION_LEVELS: dict[str, range] = {
+    "deflate": range(0, 10),
+    "bzip2": range(1, 10),
+}
+DEFAULT_COMPRESSION: str = "deflate"
+
+# members with these extensions are compressed already and are always stored
+STORED_EXTENSIONS: frozenset[str] = frozenset({
+    ".zip", ".jar", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".pdf",
+    ".docx", ".xlsx", ".pptx", ".odt", ".ods",
+})
+
+# timestamp of all packed members (the earliest one zip supports), unless SOURCE_DATE_EPOCH is set
+DEFAULT_DATE_TIME: tuple[int, int, int, int, int, int] = (1980, 1, 1, 0, 0, 0)
+
+# limits of the conformance check, packages exceeding them are rejected before anything is
+# extracted; the compression ratio is checked for the whole archive and for members larger
+# than COPY_CHUNK_SIZE (small members, e.g. of repeated whitespace, compress much better)
+MAX_TOTAL_SIZE: int = 16 * 1024 * 1024 * 1024
+MAX_COMPRESSION_RATIO: int = 100
+MAX_ENTRY_COUNT: int = 500000
+
+# bit 3 of the general purpose flag: sizes and crc follow the data in a data descriptor
+_MASK_USE_DATA_DESCRIPTOR: int = 0x08
+_MASK_ENCRYPTED: int = 0x01
+_MASK_COMPRESS_OPTION_1: int = 0x02
+_ZIP64_EXTRA: int = 0x0001
+# the Info-ZIP Unicode path of a member, which readers prefer over the name
+_UNICODE_PATH_EXTRA: int = 0x7075
+# signature, versions, flags, method, time, date, crc, sizes, name and extra field lengths
+_LOCAL_FILE_HEADER: struct.Struct = struct.Struct("<4s5H3L2H")
+_EXTRA_FIELD_HEADER: struct.Struct = struct.Struct("<2H")
+
+def strip_extra_fields(extra: bytes, field_ids: tuple[int, ...]) -> bytes:
+    """Return the extra fields of a member without the fields with the given ids."""
+    fields: list[bytes] = []
+    position: int = 0
+    while position + _EXTRA_FIELD_HEADER.size <= len(extra):
+        field_id: int
+        size: int
+        field_id, size = _EXTRA_FIELD_HEADER.unpack_from(extra, position)
+        end: int = position + _EXTRA_FIELD_HEADER.size + size
+        if field_id not in field_ids:
+            fields.append(extra[position:end])
+        position = end
+    return b"".join(fields)
+
+def get_member_data_offset(zip_file: ZipFile, info: ZipInfo) -> int:
+    """Return the offset of the compressed data of a member by reading its local file header."""
+    zip_file.fp.seek(info.header_offset)
+    file_header: bytes = zip_file.fp.read(_LOCAL_FILE_HEADER.size)
+    if len(file_header) != _LOCAL_FILE_HEADER.size or file_header[0:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad local file header of member {info.filename}")
+    fields: tuple = _LOCAL_FILE_HEADER.unpack(file_header)
+    return info.header_offset + _LOCAL_FILE_HEADER.size + fields[-2] + fields[-1]
+
+def iter_raw_member(zip_file: ZipFile, info: ZipInfo, chunk_size: int = COPY_CHUNK_SIZE) -> Iterable[bytes]:
+    """Yield the compressed data of a member without decompressing it."""
+    with get_lock(zip_file):
+        position: int = get_member_data_offset(zip_file, info)
+        remaining: int = info.compress_size
+        while remaining > 0:
+            zip_file.fp.seek(position)
+            chunk: bytes = zip_file.fp.read(min(chunk_size, remaining))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated data of member {info.filename}")
+            position += len(chunk)
+            remaining -= len(chunk)
+            yield chunk
+
+def write_raw_member(target: ZipFile, info: ZipInfo, chunks: Iterable[bytes]) -> ZipInfo:
+    """Append a member whose data is already compressed. The info must carry the
+    compression method, the CRC and both sizes of the data."""
+    # sizes are known, so they are written to the local header instead of a data descriptor
+    info.flag_bits &= ~_MASK_USE_DATA_DESCRIPTOR
+    info.extra = strip_extra_fields(info.extra, (_ZIP64_EXTRA,))
+    zip64: bool = info.file_size > zipfile.ZIP64_LIMIT or info.compress_size > zipfile.ZIP64_LIMIT
+    target_file: IO[bytes]
+    with append_member(target, info) as target_file:
+        target_file.write(info.FileHeader(zip64))
+        chunk: bytes
+        for chunk in chunks:
+            target_file.write(chunk)
+    return info
+
+def copy_member_info(info: ZipInfo, arcname: str | None = None) -> ZipInfo:
+    """Return the info of a copy of a member (optionally renamed), see copy_member_raw()."""
+    if info.flag_bits & _MASK_ENCRYPTED:
+        raise NotImplementedError(f"Encrypted member {info.filename} can not be copied.")
+    new_info: ZipInfo = ZipInfo(arcname if arcname is not None else info.filename, info.date_time)
+    new_info.compress_type = info.compress_type
+    new_info.CRC = info.CRC
+    new_info.compress_size = info.compress_size
+    new_info.file_size = info.file_size
+    new_info.flag_bits = info.flag_bits
+    new_info.external_attr = info.external_attr
+    new_info.internal_attr = info.internal_attr
+    new_info.create_system = info.create_system
+    # the unicode path of the old name would take precedence over the new name
+    new_info.extra = strip_extra_fields(info.extra, (_UNICODE_PATH_EXTRA,)) if new_info.filename != info.filename else info.extra
+    new_info.comment = info.comment
+    return new_info
+
+def copy_member_raw(source: ZipFile, info: ZipInfo, target: ZipFile, arcname: str | None = None) -> ZipInfo:
+    """Copy a member from one archive into another (optionally renamed)
+    in its compressed form, i.e. without inflating and deflating it again."""
+    return write_raw_member(target, copy_member_info(info, arcname), iter_raw_member(source, info))
+
+def copy_reader_member(package_reader: PackageReader, index: int, target: ZipFile, arcname: str | None = None) -> ZipInfo:
+    """Copy a member of a memory-mapped archive into another archive like copy_member_raw(),
+    the compressed data is written straight from the mapping."""
+    return write_raw_member(target, copy_member_info(package_reader.get_info(index), arcname), (package_reader.read_raw(index),))
+
+def check_limits(member_table: MemberTable, max_total_size: int = MAX_TOTAL_SIZE, max_compression_ratio: int = MAX_COMPRESSION_RATIO,
+                 max_entry_count: int = MAX_ENTRY_COUNT) -> list[tuple[str | None, str]]:
+    """Check the sizes declared in the central directory against the limits and return the violations
+    with the member they are about (None for violations of the whole archive)."""
+    problems: list[tuple[str | None, str]] = []
+    if len(member_table) > max_entry_count:
+        problems.append((None, f"Archive has {len(member_table)} entries (limit: {max_entry_count})"))
+    total_size: int = sum(member_table.file_sizes)
+    total_compress_size: int = sum(member_table.compress_sizes)
+    if total_size > max_total_size:
+        problems.append((None, f"Archive has {total_size} bytes uncompressed (limit: {max_total_size})"))
+    if total_size > max_compression_ratio * max(total_compress_size, 1):
+        problems.append((None, f"Archive has compression ratio {total_size / max(total_compress_size, 1):.0f} (limit: {max_compression_ratio})"))
+    index: int
+    file_size: int
+    compress_size: int
+    for index, (file_size, compress_size) in enumerate(zip(member_table.file_sizes, member_table.compress_sizes)):
+        if file_size > COPY_CHUNK_SIZE and file_size > max_compression_ratio * max(compress_size, 1):
+            problems.append((member_table.get_name(index), f"Member {member_table.get_name(index)} has compression ratio {file_size / max(compress_size, 1):.0f} (limit: {max_compression_ratio})"))
+    return problems
+
+def verify_member(package_reader: PackageReader, index: int, chunk_size: int = COPY_CHUNK_SIZE) -> str | None:
+    """Decompress a member in chunks (never more than its declared size) and return the
+    error if its data is corrupt, e.g. does not match the CRC-32 of the central directory."""
+    crc: int = 0
+    size: int = 0
+    member_stream: IO[bytes]
+    try:
+        with package_reader.open(index) as member_stream:
+            chunk: bytes
+            while chunk := member_stream.read(chunk_size):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+    except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError, RuntimeError) as e:
+        return f"Member {package_reader.get_name(index)} is corrupt: {e}"
+    # stored members are read as they are, so their CRC-32 is checked here
+    if size != package_reader.file_sizes[index] or crc != package_reader.crcs[index]:
+        return f"Member {package_reader.get_name(index)} is corrupt: Bad CRC-32"
+    return None
+
+def verify_members(package_reader: PackageReader, workers: int | None = None) -> list[tuple[str | None, str]]:
+    """Verify the data of all members on a thread pool (see verify_member()) and return the corrupt
+    members with their errors in archive order. Only one chunk per worker is held in memory at a time."""
+    # the members are verified in the context of the caller, so their profiling stages are recorded
+    context: contextvars.Context = contextvars.copy_context()
+    executor: ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return [(package_reader.get_name(index), error)
+                for index, error in enumerate(executor.map(lambda index: context.copy().run(verify_member, package_reader, index), range(len(package_reader))))
+                if error is not None]
+
+def get_compression(method: str, level: int | None = None) -> tuple[int, int | None]:
+    """Return the zipfile constant and level for a compression method name.
+    Raises ValueError for unknown methods or invalid levels."""
+    if method not in COMPRESSION_METHODS:
+        raise ValueError(f"Unknown compression method '{method}', use one of: {', '.join(COMPRESSION_METHODS)}.")
+    if level is not None and level not in COMPRESSION_LEVELS.get(method, ()):
+        raise ValueError(f"Invalid compression level {level} for compression method '{method}'.")
+    return COMPRESSION_METHODS[method], level
+
+def get_reproducible_date_time() -> tuple[int, int, int, int, int, int]:
+    """Return the timestamp for packed members (SOURCE_DATE_EPOCH if set, see reproducible-builds.org)."""
+    source_date_epoch: str | None = os.environ.get("SOURCE_DATE_EPOCH")
+    if source_date_epoch is None:
+        return DEFAULT_DATE_TIME
+    return max(DEFAULT_DATE_TIME, time.gmtime(int(source_date_epoch))[0:6])
+
+def new_member_info(arcname: str, is_dir: bool = False) -> ZipInfo:
+    """Return the info of a new member with fixed timestamp and permissions, so the
+    archive does not depend on the file system, the platform or the time of packing."""
+    info: ZipInfo = ZipInfo(arcname, get_reproducible_date_time())
+    info.create_system = 3
+    info.external_attr = ((0o40755 << 16) | 0x10) if is_dir else (0o100644 << 16)
+    return info
+
+def new_dir_member(arcname: str) -> tuple[ZipInfo, bytes]:
+    """Return the info of a new directory member (the arcname ends with "/") and its empty data."""
+    info: ZipInfo = new_member_info(arcname, is_dir=True)
+    info.CRC = 0
+    return info, b""
+
+def compress_member(arcname: str, data: bytes, compress_type: int, level: int | None = None) -> tuple[ZipInfo, bytes]:
+    """Compress the data of a member and return its info and the compressed data.
+    Already compressed files are stored. Runs in worker threads (zlib, bz2 and lzma
+    release the GIL)."""
+    info: ZipInfo = new_member_info(arcname)
+    info.file_size = len(data)
+    info.CRC = zlib.crc32(data)
+    if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+        compress_type = zipfile.ZIP_STORED
+    compressed_data: bytes = data
+    if compress_type != zipfile.ZIP_STORED:
+        compressor = get_compressor(compress_type, level)
+        compressed_data = compressor.compress(data) + compressor.flush()
+        # incompressible data is stored instead
+        if len(compressed_data) >= len(data):
+            compress_type = zipfile.ZIP_STORED
+            compressed_data = data
+    info.compress_type = compress_type
+    if compress_type == zipfile.ZIP_LZMA:
+        # compressed data includes an end-of-stream marker
+        info.flag_bits |= _MASK_COMPRESS_OPTION_1
+    info.compress_size = len(compressed_data)
+    return info, compressed_data
+
+def write_member_stream(target: ZipFile, arcname: str, stream: IO[bytes], compress_type: int, level: int | None = None,
+                        chunk_size: int = COPY_CHUNK_SIZE) -> ZipInfo:
+    """Compress a member from a seekable stream and append it, like compress_member() but
+    in chunks. As the CRC and the sizes precede the data, the compressed data is spooled
+    to a temporary file first."""
+    info: ZipInfo = new_member_info(arcname)
+    if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+        compress_type = zipfile.ZIP_STORED
+    compressor = get_compressor(compress_type, level) if compress_type != zipfile.ZIP_STORED else None
+    start: int = stream.tell()
+    crc: int = 0
+    file_size: int = 0
+    spool: IO[bytes]
+    with tempfile.SpooledTemporaryFile(max_size=chunk_size) as spool:
+        chunk: bytes
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            if compressor is not None:
+                spool.write(compressor.compress(chunk))
+        if compressor is not None:
+            spool.write(compressor.flush())
+        compress_size: int = spool.tell()
+        source: IO[bytes] = spool
+        # incompressible data is stored instead
+        if compressor is None or compress_size >= file_size:
+            compress_type = zipfile.ZIP_STORED
+            compress_size = file_size
+            source = stream
+        info.CRC = crc
+        info.file_size = file_size
+        info.compress_size = compress_size
+        info.compress_type = compress_type
+        if compress_type == zipfile.ZIP_LZMA:
+            # compressed data includes an end-of-stream marker
+            info.flag_bits |= _MASK_COMPRESS_OPTION_1
+        source.seek(start if source is stream else 0)
+        return write_raw_member(target, info, iter(lambda: source.read(chunk_size), b""))
+
+def read_and_compress_member(file_path: str, arcname: str, compress_type: int, level: int | None) -> tuple[ZipInfo, bytes]:
+    """Read a file and compress it as member, see compress_member()."""
+    file: IO[bytes]
+    with open(file_path, "rb") as file:
+        return compress_member(arcname, file.read(), compress_type, level)
+
+def pack_folder(folder_path: str, zip_filename: str, arcname_root: str = "", method: str = DEFAULT_COMPRESSION,
+                level: int | None = None, workers: int | None = None, store: "MemberStore | None" = None) -> None:
+    """Pack all files below a folder into a new zip archive. The members are compressed
+    concurrently and written in sorted order with fixed timestamps and permissions,
+    so the same input always results in the same bytes. Empty directories are kept as
+    directory members. If the folder was extracted from a member store (see TPStore.py),
+    unchanged members are taken from the store."""
+    compress_type: int
+    compress_type, level = get_compression(method, level)
+    # collect the files and empty directories in a platform independent order
+    members: list[tuple[str, str | None]] = []
+    root: str
+    dirs: list[str]
+    files: list[str]
+    for root, dirs, files in os.walk(folder_path):
+        dirs.sort()
+        if not dirs and not files and root != folder_path:
+            members.append((arcname_root + os.path.relpath(root, folder_path).replace(os.sep, "/") + "/", None))
+        file: str
+        for file in files:
+            file_path: str = os.path.join(root, file)
+            arcname: str = os.path.relpath(file_path, folder_path).replace(os.sep, "/")
+            members.append((arcname_root + arcname, file_path))
+    members.sort()
+    if workers is None:
+        workers = min(32, (os.cpu_count() or 1) + 4)
+    # only a limited number of compressed members is buffered ahead of the writer
+    pending: deque[Future] = deque()
+    zip_file: ZipFile
+    executor: ThreadPoolExecutor
+    with ZipFile(zip_filename, "w") as zip_file, ThreadPoolExecutor(max_workers=workers) as executor:
+        arcname: str
+        file_path: str | None
+        for arcname, file_path in members:
+            if file_path is None:
+                pending.append(executor.submit(new_dir_member, arcname))
+            else:
+                pending.append(executor.submit(store.read_and_compress_member if store is not None else read_and_compress_member,
+                                               file_path, arcname, compress_type, level))
+            if len(pending) >= workers * 2:
+                write_compressed_member(zip_file, pending.popleft())
+        while pending:
+            write_compressed_member(zip_file, pending.popleft())
+    return None
+
+def write_compressed_member(zip_file: ZipFile, future: Future) -> ZipInfo:
+    """Append a member as soon as it is compressed, see compress_member()."""
+    info: ZipInfo
+    data: bytes
+    info, data = future.result()
+    return write_raw_member(zip_file, info, (data,))
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""ZipInternals.py
+
+Gathers the private parts of the zipfile module, which has no public
+API to read or write the compressed data of members as is (see TPZip.py
+and TPReader.py). The internals are checked once on import against the
+Python versions they were verified with, so a change of the zipfile
+module fails on import and not in the middle of writing an archive.
+"""
+
+import sys
+import warnings
+import zipfile
+from contextlib import contextmanager
+from threading import RLock
+from typing import IO, Any, Iterator
+from zipfile import ZipFile, ZipInfo
+
+# the internals used below are the same in these Python versions
+MIN_VERSION: tuple[int, int] = (3, 10)
+MAX_VERSION: tuple[int, int] = (3, 13)
+
+if sys.version_info[:2] < MIN_VERSION:
+    raise ImportError(f"Python {MIN_VERSION[0]}.{MIN_VERSION[1]} or later is required")
+if not all(hasattr(zipfile, name) for name in ("_get_compressor", "_get_decompressor")) or not hasattr(ZipFile, "_writecheck"):
+    raise ImportError(f"The zipfile module of Python {sys.version_info[0]}.{sys.version_info[1]} is not supported")
+if sys.version_info[:2] > MAX_VERSION:
+    warnings.warn(f"The zipfile module of Python {sys.version_info[0]}.{sys.version_info[1]} is not verified, "
+                  f"archives are written like with Python {MAX_VERSION[0]}.{MAX_VERSION[1]}", RuntimeWarning)
+
+def get_compressor(compress_type: int, level: int | None = None) -> Any:
+    """Return a new compressor of zipfile for a compression method (None for stored members)."""
+    return zipfile._get_compressor(compress_type, level)
+
+def get_decompressor(compress_type: int) -> Any:
+    """Return a new decompressor of zipfile for a compression method (None for stored members)."""
+    return zipfile._get_decompressor(compress_type)
+
+def get_lock(zip_file: ZipFile) -> RLock:
+    """Return the lock which guards the position of the file of an archive."""
+    return zip_file._lock
+
+@contextmanager
+def append_member(target: ZipFile, info: ZipInfo) -> Iterator[IO[bytes]]:
+    """Yield the file of an archive opened for writing, positioned at the end of its members,
+    to write the local header and the data of a member. The member is then registered with
+    the archive, so it is written to the central directory when the archive is closed."""
+    if target._writing:
+        raise ValueError("Can't write to ZIP archive while an open writing handle exists.")
+    with target._lock:
+        if target._seekable:
+            target.fp.seek(target.start_dir)
+        info.header_offset = target.fp.tell()
+        target._writecheck(info)
+        target._didModify = True
+        yield target.fp
+        target.start_dir = target.fp.tell()
+        target.filelist.append(info)
+        target.NameToInfo[info.filename] = info
+    return None
@@ -9,25 +9,251 @@ Main program and entryp point.
 import argparse
 import os
 import sys
-import shutil
-import sys
+import sqlite3
+from typing import TYPE_CHECKING
 from colorama import Fore, init
-import argparse
-import os
-from TPChecker import TPChecker
-from TPMisc import gen_zip_archive, print_color_msg
-from TPFixer import EBATaxonomyPackage, EDINETTaxonomyPackage
+from TPMisc import print_color_msg
+from TPPackage import get_archive_path
+from TPProfile import collect_stages, profile_run
+from TPProvider import get_provider
+from TPCache import ResultCache
+from TPReport import ConsoleRenderer, Report, REPORT_WRITERS
+from TPZip import COMPRESSION_METHODS, DEFAULT_COMPRESSION, get_compression
+
+# the checks and the fixers are imported when a package is processed,
+# so runs answered from the result cache do not import lxml at all
+if TYPE_CHECKING:
+    from TPChecker import TPChecker
+    from TPFixer import TaxonomyPackageFixerInterface
+    from TPManifest import MemberManifest
+    from TPStore import MemberStore
+
+def run_package(provider: str, package: str, destination_folder: str | None = None, check_only: bool = False, report: Report | None = None, extract: bool = False,
+                compression: str = DEFAULT_COMPRESSION, compression_level: int | None = None, cache: ResultCache | None = None,
+                manifest: "MemberManifest | None" = None, verify_crc: bool = False, tp_checker: "TPChecker | None" = None,
+                store: "MemberStore | None" = None) -> bool:
+    """Analyze and fix a single taxonomy package. Returns False if the package
+    could not be processed. If no destination folder is passed, the fixed
+    package is written to the output folder next to the input folder. The
+    package is fixed as ZIP-to-ZIP transform and the input is left in place,
+    unless extract is set (the package is then moved and extracted). The
+    compression settings apply to generated and repacked members. All
+    results and the timing of each stage are collected in the report
+    (rendered on the console by default). If a cache is passed, the results
+    of unchanged packages are taken from the cache. If the manifest of a
+    previous version is passed, unchanged members inherit its results. If
+    verify_crc is set, the data of all members is checked against its CRC-32.
+    If a checker is passed, the checks share its caches of analyzed archives
+    (e.g. in a long-running process, see TPServe.py). If a member store is
+    passed, extracted packages are deduplicated in it (see TPStore.py)."""
+    if report is None:
+        report = Report(provider, package, ConsoleRenderer())
+    source_zip: str = get_archive_path(package)
+    if destination_folder is None:
+        destination_folder = os.path.dirname(source_zip).replace("input","output")
+    cache_key: str | None = None
+    if cache is not None:
+        cache_key = cache.get_key(source_zip, provider=provider.upper(), checkOnly=check_only, extract=extract, compression=compression,
+                                  compressionLevel=compression_level, verifyCrc=verify_crc, destination=None if check_only else os.path.abspath(destination_folder))
+        cached_report: dict | None = cache.get(cache_key) if cache_key is not None else None
+        if cached_report is not None:
+            report.replay(cached_report)
+            return report.success
+    with collect_stages(report.stages):
+        success: bool = process_package(provider, package, destination_folder, check_only, report, extract, compression, compression_level, manifest,
+                                        verify_crc, tp_checker, store)
+    if cache_key is not None:
+        cache.put(cache_key, report.to_dict(), report.output)
+    return success
+
+def process_package(provider: str, package: str, destination_folder: str | None, check_only: bool, report: Report, extract: bool = False,
+                    compression: str = DEFAULT_COMPRESSION, compression_level: int | None = None, manifest: "MemberManifest | None" = None,
+                    verify_crc: bool = False, tp_checker: "TPChecker | None" = None, store: "MemberStore | None" = None) -> bool:
+    """Analyze and fix a single taxonomy package, see run_package()."""
+    from TPChecker import TPChecker
+    from TPPipeline import CheckPipeline, CheckStage
+    report.section(f"Analyzis results:", f"-"*18)
+
+    # init Checker class to analyze the provided package, the
+    # messages of the checks are collected in the report
+    tp_checker = tp_checker.fork() if tp_checker is not None else TPChecker(quiet=True, manifest=manifest)
+
+    # set vars forstatus checker
+    ZIP_FORMAT = False
+    SINGLE_DIR = False
+    METAINF_DIR = False
+
+    # 1/2 analyze the package
+    # -----------------------
+
+    # the checks are run as dependency graph, independent checks run
+    # concurrently and are reported in the order they are declared here
+    pipeline: CheckPipeline = CheckPipeline(tp_checker, report)
+
+    # check if package is zip
+    pipeline.add(CheckStage("zipFormat", TPChecker.has_zip_format, package, verify_crc, passed_msg="Package is ZIP",
+                            failed_msg="Package is not ZIP", error_code="tpe:invalidArchiveFormat", messages=True))
+
+    # check that the member paths are safe to extract, the package
+    # is not fixed if members would escape or overwrite each other
+    pipeline.add(CheckStage("memberPaths", TPChecker.check_member_paths, package, passed_msg="Package member paths are safe to extract",
+                            failed_msg="Package has member paths which are not safe to extract", error_code="tpe:invalidArchiveFormat",
+                            messages=True, requires=("zipFormat",)))
+
+    # in read-only mode the structure is also checked if member paths are not safe
+    structure: dict[str, tuple[str, ...]] = ({"requires": ("zipFormat",), "after": ("memberPaths",)} if check_only
+                                             else {"requires": ("memberPaths",)})
+
+    # check if has toplevel single directory
+    pipeline.add(CheckStage("topLevelSingleDir", TPChecker.has_top_level_single_dir, package, passed_msg="Package has toplevel dir",
+                            failed_msg="Package has not single toplevel dir", error_code="tpe:invalidDirectoryStructure", **structure))
+
+    # check if pacvkage has META-INF folder
+    pipeline.add(CheckStage("metaInfFolder", TPChecker.has_meta_inf_folder, package, passed_msg="Package has META-INF folder",
+                            failed_msg="Package has no META-INF folder", error_code="tpe:metadataDirectoryNotFound", **structure))
+
+    # check if catalog.xml file exists
+    pipeline.add(CheckStage("catalogXml", TPChecker.has_catalog_xml, package, passed_msg="Package has catalog.xml",
+                            failed_msg="Package has no catalog.xml", **structure))
+
+    # check that the catalog.xml file maps every start string once
+    pipeline.add(CheckStage("catalogRewriteUris", TPChecker.has_unique_rewrite_uris, package, passed_msg="Package catalog has unique rewriteURI start strings",
+                            failed_msg="Package catalog has multiple rewriteURI elements for the same start string",
+                            error_code="tpe:multipleRewriteURIsForStartString", messages=True, **structure))
+
+    # check if taxonomyPackage.xml file exists
+    pipeline.add(CheckStage("taxonomyPackageXml", TPChecker.has_taxonomy_package_xml, package, passed_msg="Package has taxonomy-package.xml",
+                            failed_msg="Package has no taxonomy-package.xml", error_code="tpe:metadataFileNotFound", **structure))
+
+    # check that all entry points resolve to taxonomy schemas or linkbases
+    pipeline.add(CheckStage("entryPoints", TPChecker.check_entry_points, package, passed_msg="Package entry points are taxonomy documents",
+                            failed_msg="Package has entry points which are no taxonomy documents", messages=True, requires=("taxonomyPackageXml",)))
+
+    # check that the DTS of the entry points can be discovered within the package
+    pipeline.add(CheckStage("dts", TPChecker.check_dts, package, passed_msg="Package DTS documents are part of the package",
+                            failed_msg="Package DTS refers to documents which are missing or not well-formed",
+                            messages=True, requires=("entryPoints",)))
+
+    # in read-only mode the metadata files are validated straight
+    # from the archive and the package is not fixed
+    if check_only:
+        pipeline.add(CheckStage("metadataFiles", TPChecker.validate_package, package, passed_msg="Package metadata files are valid",
+                                failed_msg="Package metadata files are not valid", error_code="tpe:invalidMetaDataFile",
+                                messages=True, **structure))
+
+    results: dict[str, bool | None] = pipeline.run()
+    if results["zipFormat"]:
+        ZIP_FORMAT = True
+    else:
+        report.finish(f"{os.path.basename(package)} could not be processed", success=False)
+        return False
+    if not results["memberPaths"] and not check_only:
+        report.finish(f"{os.path.basename(package)} could not be processed", success=False)
+        return False
+    if results["topLevelSingleDir"]:
+        SINGLE_DIR = True
+    if results["metaInfFolder"] or results["catalogXml"] or results["taxonomyPackageXml"]:
+        METAINF_DIR = True
+
+    if check_only:
+        is_valid: bool = bool(results["metadataFiles"])
+        report.finish(f"{os.path.basename(package)} is {'valid' if is_valid else 'not valid'}", success=is_valid)
+        return is_valid
+
+    # 2/2 fix package
+    # ---------------
+
+    # set certain variables for fixing the package
+    source_zip = get_archive_path(package)
+    source_zip_path = source_zip.replace(".zip","")
+    if destination_folder is None:
+        destination_folder = os.path.dirname(source_zip).replace("input","output")
+
+    # the fixer of the provider is imported only now (see TPProvider.py)
+    taxonomy_package_class: type[TaxonomyPackageFixerInterface] | None = get_provider(provider)
+    if taxonomy_package_class is None:
+        report.finish(f"Provider {provider} is not supported", success=False)
+        return False
+    report.section(f"\nFixing package...")
+
+    # by default the package is rewritten straight into the fixed
+    # zip archive, without extracting it to the disk
+    if not extract:
+        taxonomy_package: TaxonomyPackageFixerInterface = taxonomy_package_class(source_zip_path, destination_folder, report, False,
+                                                                                 compression, compression_level)
+        report.output = taxonomy_package.rewrite_package(SINGLE_DIR)
+        report.finish(f"{os.path.basename(package)} is fixed")
+        return True
+
+    # the input package is moved by the fixer, so remember its top-level entries
+    top_level_names: list[str] = [node.name for node in tp_checker.get_package_index(package).top_level_nodes()]
+    # and close its reader, a mapped file cannot be moved on Windows
+    tp_checker.close(package)
+    taxonomy_package = taxonomy_package_class(source_zip_path, destination_folder, report, True, compression, compression_level, store)
+    report.output = taxonomy_package.fix_package(ZIP_FORMAT, METAINF_DIR, SINGLE_DIR, top_level_names)
+    report.finish(f"{os.path.basename(package)} is fixed")
+    return True
+
+def open_cache(path: str | None = None) -> ResultCache | None:
+    """Open the result cache, runs without cache if it is not accessible."""
+    try:
+        return ResultCache(path)
+    except (OSError, sqlite3.Error) as e:
+        print_color_msg(f"    Result cache is not available ({e})",Fore.YELLOW)
+        return None
+
+def write_report(report_format: str, report_file: str | None, reports: list[dict]) -> None:
+    """Write the reports in the given format to a file or stdout."""
+    if report_file is None:
+        REPORT_WRITERS[report_format](reports, sys.stdout)
+    else:
+        with open(report_file, "w", encoding="utf-8") as report_stream:
+            REPORT_WRITERS[report_format](reports, report_stream)
+    return None
 
 def main() -> None:
     """driver code"""
     # intialize the colorama module
     init(autoreset=True)
-    
+
+    # the batch subcommand processes a whole directory or manifest of packages
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from TPBatch import main as batch_main
+        batch_main(sys.argv[2:])
+        return None
+
+    # the benchmark subcommand measures the checks and fixers on synthetic packages
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        from TPBenchmark import main as benchmark_main
+        benchmark_main(sys.argv[2:])
+        return None
+
+    # the serve subcommand keeps a process with warm caches running for many jobs
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from TPServe import main as serve_main
+        serve_main(sys.argv[2:])
+        return None
+
     # initialize argument parser and set arguments for the cmdl
-    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="A simple cmdl tool to fix XBRL Taxonomy Packages.")
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="A simple cmdl tool to fix XBRL Taxonomy Packages.",
+                                                              epilog=f"Use '{os.path.basename(__file__)} batch --help' to process many packages at once, "
+                                                                     f"'{os.path.basename(__file__)} serve --help' to run them as local service "
+                                                                     f"and '{os.path.basename(__file__)} benchmark --help' to measure the checks and fixers.")
     parser.add_argument("provider", help="Provide abbreveation of official provider (e.g. EBA, EDINET, etc.).")
     parser.add_argument("package", help="Full path to the taxonomy_package_name.zip.")
-    
+    parser.add_argument("--check-only", action="store_true", help="Only validate the package straight from the ZIP, without extracting or fixing it.")
+    parser.add_argument("--extract", action="store_true", help="Fix the package by moving and extracting it into the output folder (slower, the input is moved).")
+    parser.add_argument("--store", nargs="?", const="", metavar="DIR", help="Extract the package as links into a content-addressed member store shared by all versions, "
+                                                                          "so only changed members take disk space and are compressed (requires --extract, default DIR: the cache folder).")
+    parser.add_argument("--compression", choices=list(COMPRESSION_METHODS), default=DEFAULT_COMPRESSION, help=f"Compression method of the fixed package (default: {DEFAULT_COMPRESSION}).")
+    parser.add_argument("--compression-level", type=int, help="Compression level (deflate: 0-9, bzip2: 1-9).")
+    parser.add_argument("--verify-crc", action="store_true", help="Decompress all members and verify their CRC-32 (the central directory is always checked).")
+    parser.add_argument("--report", choices=sorted(REPORT_WRITERS), help="Write a machine-readable report as JSON or JSON Lines.")
+    parser.add_argument("--report-file", help="File for the report (default: stdout, which disables the colorized console output).")
+    parser.add_argument("--no-cache", action="store_true", help="Check and fix the package even if it did not change since the last run.")
+    parser.add_argument("--manifest", metavar="FILE", help="Member manifest of the previous version of the package: members which did not change inherit its check results, then the manifest is updated (implies --no-cache).")
+    parser.add_argument("--profile", metavar="FILE", help="Profile the whole run with cProfile, dump the stats to FILE and print a summary to stderr.")
+
     # catch exception if there are errors in parsed arguments
     try:
         args = parser.parse_args()
@@ -35,179 +261,47 @@ def main() -> None:
         error_message = f"""Please provide both: Abbreveation of provider (str.upper()) and full path to taxonomy package (zip):
 {os.path.basename(__file__)} EBA '..\\inputs\\articles-49999_recurso_1a.zip'"""
         raise SystemExit(print_color_msg(f"Error: {error_message}",Fore.RED))
-    
-    # start analyzation only if both arguments are parsed
-    if args.provider and args.package:
 
-        # print out provider and path to package to make
-        # user aware of what was passed to the tool
-        print_color_msg(f"Input information:",Fore.BLUE)
-        print_color_msg(f"-"*18,Fore.BLUE)
-        print_color_msg(f"    Provider -> {args.provider}",Fore.BLUE)
-        print_color_msg(f"    Package  -> {args.package}\n",Fore.BLUE)
-
-        print_color_msg(f"Analyzis results:",Fore.BLUE)
-        print_color_msg(f"-"*18,Fore.BLUE)
-        
-        # init Checker class to analyze the provided package
-        tp_checker = TPChecker()
-
-        # set vars forstatus checker
-        ZIP_FORMAT = False
-        SINGLE_DIR = False
-        METAINF_DIR = False
-
-        # 1/2 analyze the package
-        # -----------------------
-
-        # check if package is zip
-        if tp_checker.has_zip_format(args.package):
-            print_color_msg(f"    DONE: Package is ZIP",Fore.GREEN)
-            ZIP_FORMAT = True
-        else:
-            print_color_msg(f"    ERROR: Package is not ZIP",Fore.RED)
-            sys.exit()
-
-        # check if has toplevel single directory
-        if ZIP_FORMAT == True:
-            if tp_checker.has_top_level_single_dir(args.package):
-                print_color_msg(f"    DONE: Package has toplevel dir",Fore.GREEN)
-                SINGLE_DIR = True
-            else:
-                print_color_msg(f"    ERROR: Package has not single toplevel dir",Fore.RED)
-        else:
-            print_color_msg(f"    ERROR: Package is not of format ZIP",Fore.RED)
-
-        # check if pacvkage has META-INF folder
-        if tp_checker.has_meta_inf_folder(args.package):
-            print_color_msg(f"    DONE: Package has META-INF folder",Fore.GREEN)
-            METAINF_DIR = True
-        else:
-            print_color_msg(f"    ERROR: Package has no META-INF folder",Fore.RED)
-
-        # check if catalog.xml file exists
-        if tp_checker.has_catalog_xml(args.package):
-            print_color_msg(f"    DONE: Package has catalog.xml",Fore.GREEN)
-            METAINF_DIR = True
-        else:
-            print_color_msg(f"    ERROR: Package has no catalog.xml",Fore.RED)
-
-        # check if taxonomyPackage.xml file exists
-        if tp_checker.has_taxonomy_package_xml(args.package):
-            print_color_msg(f"    DONE: Package has taxonomy-package.xml",Fore.GREEN)
-            METAINF_DIR = True
-        else:
-            print_color_msg(f"    ERROR: Package has no taxonomy-package.xml",Fore.RED)
-
-        # 2/2 fix package
-        # ---------------
-
-        # set certain variables for fixing the package
-        provider_name = args.provider.upper()
-        source_zip = os.path.dirname(os.path.abspath(__file__)) + os.path.abspath(args.package.replace("\\", "/").replace("..",""))
-        source_zip_path = os.path.dirname(os.path.abspath(__file__)) + os.path.abspath(args.package.replace("\\", "/").replace("..","")).replace(".zip","")
-        destination_folder = os.path.dirname(source_zip).replace("input","output")
-
-        # fix taxyonomy package provided by the European Banking Authority
-        if provider_name == "EBA":
-            print_color_msg(f"\nFixing package...",Fore.YELLOW)
-
-            # initialize the EBA class
-            eba_taxonomy_package: EBATaxonomyPackage = EBATaxonomyPackage(source_zip_path, destination_folder)
-            
-            # if all three variables are true, there is nothig to fix and
-            # the package is moved as it is in the output-folder
-            if ZIP_FORMAT == True:
-                pass
-            else:
-                eba_taxonomy_package.convert_to_zip_archive()
-            
-            if METAINF_DIR == True:
-                pass
-            else:
-                eba_taxonomy_package.fix_meta_inf_folder()
-            
-            if SINGLE_DIR == True:
-                pass
-            else:
-                eba_taxonomy_package.fix_top_level_single_dir()
-
-            # remove the working folder in the output folder
-            target_dir = source_zip.replace("input", "output").replace(".zip","")
-            shutil.rmtree(target_dir)
-
-            print_color_msg(f"\nOutput result:",Fore.BLUE)
-            print_color_msg(f"-"*14,Fore.BLUE)
-            print_color_msg(f"    {os.path.basename(args.package)} is fixed",Fore.BLUE)
-
-        # fix taxonomy package provided by the FSA (EDINET system)
-        if provider_name == "EDINET":
-            print_color_msg(f"\nFixing package...",Fore.YELLOW)
-
-            # initialize the EDINET class
-            edinet_taxonomy_package: EDINETTaxonomyPackage = EDINETTaxonomyPackage(source_zip_path, destination_folder)
-
-            if ZIP_FORMAT == True:
-                pass
-            else:
-                edinet_taxonomy_package.convert_to_zip_archive()
-
-            if METAINF_DIR == True:
-                pass
-            else:
-                edinet_taxonomy_package.fix_meta_inf_folder()
-
-            if SINGLE_DIR == True:
-                pass
-            else:
-                edinet_taxonomy_package.fix_top_level_single_dir()
-
-            # prepare variables to work with
-            full_path_to_zip: str = source_zip.replace("input", "output")
-            target_output_dir: str = source_zip.replace("input", "output").replace(".zip","")
-
-            # restructure the folder strucutre in the package
-            # means moveing taxonomy/, samples/ and META-INF/ folder
-            # in the root directory
-            edinet_taxonomy_package.restructure_folder()
-
-            # generate and validate the catalog.xml file
-            edinet_taxonomy_package.fix_catalog_xml(target_output_dir)
-            
-            # generate and validate the taxonomyPackage.xml file
-            edinet_taxonomy_package.fix_taxonomy_package_xml(target_output_dir)
-
-            # compose zip archive
-            gen_zip_archive(target_output_dir, full_path_to_zip)
-
-            # remove the folder next to the fixed zip archive, because
-            # not needed anymore
-            shutil.rmtree(target_output_dir)
-
-            # print output result information
-            print_color_msg(f"\nOutput result:",Fore.BLUE)
-            print_color_msg(f"-"*14,Fore.BLUE)
-            print_color_msg(f'    {os.path.basename(args.package.replace("input","output"))} is fixed!\n',Fore.BLUE)
-
-        # TODO: This is just a first working template version. Fixes for more packages should be implemented.
-        # The following packages could be supported as well:
-        #     https://www.sec.gov/edgar/information-for-filers/standard-taxonomies
-        #     https://xbrl.us/xbrl-taxonomy/2021-acfr/
-        #     https://xbrl.us/xbrl-taxonomy/2023-mutual-fund-riskreturn/
-        #     https://www.ifrs.org/issued-standards/ifrs-taxonomy/
-        #     https://esurfi-assurance.banque-france.fr/
-        #     https://www.bundesbank.de/en/service/reporting-systems/banking-supervision/formats-xbrl-and-xml-/formats-xml-and-xbrl--619400
-        #     https://www.bde.es/wbe/en/entidades-profesionales/supervisadas/informacion-financiera-a-remitir-entidades-supervisadas/entidades-credito/taxonomias/
-        #     https://www.bportugal.pt/en/page/reporting-obligations-supervised-institutions
-        #     https://www.bankofengland.co.uk/prudential-regulation/regulatory-reporting/regulatory-reporting-banking-sector/banks-building-societies-and-investment-firms
-        #     https://www.centralbank.ie/regulation/industry-market-sectors/investment-firms
-        #     https://www.cipc.co.za/?page_id=4400
-        #     https://www.cmfchile.cl/portal/principal/613/w3-article-49999.html
-        #     https://www.dnb.nl/en/login/dlr/information-and-documentation/
-        #     https://www.esma.europa.eu/document/esma-esef-taxonomy-2021
-        #     ...
+    try:
+        get_compression(args.compression, args.compression_level)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.store is not None and not args.extract:
+        parser.error("--store requires --extract")
 
-        return None
+    # start analyzation only if both arguments are parsed
+    if args.provider and args.package:
+        # the console is just one renderer of the report, it is
+        # disabled if the machine-readable report goes to stdout
+        renderer: ConsoleRenderer | None = None if args.report and not args.report_file else ConsoleRenderer()
+        report: Report = Report(args.provider, args.package, renderer)
+        manifest: "MemberManifest | None" = None
+        if args.manifest:
+            from TPManifest import MemberManifest
+            manifest = MemberManifest.load(args.manifest)
+        cache: ResultCache | None = None if args.no_cache or manifest is not None else open_cache()
+        store: "MemberStore | None" = None
+        if args.store is not None:
+            from TPStore import MemberStore
+            store = MemberStore(args.store or None)
+        try:
+            with profile_run(args.profile):
+                success: bool = run_package(args.provider, args.package, check_only=args.check_only, report=report, extract=args.extract,
+                                              compression=args.compression, compression_level=args.compression_level, cache=cache, manifest=manifest,
+                                              verify_crc=args.verify_crc, store=store)
+        finally:
+            if cache is not None:
+                cache.close()
+            if store is not None:
+                store.close()
+        if manifest is not None:
+            manifest.save(args.manifest)
+        if args.report:
+            write_report(args.report, args.report_file, [report.to_dict()])
+        if not success:
+            sys.exit(1)
+
+    return None
 
 if __name__ == "__main__":
     main()
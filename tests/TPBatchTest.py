@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPBatch import BatchJob, BatchResult, read_jobs, run_batch
+
+"""BatchTest.py
+
+The class contains relevant functions to test the batch
+mode in TPBatch.py.
+"""
+
+EBA_PACKAGE = os.path.join(os.path.dirname(__file__), "..", "input", "EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata", "EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip")
+
+class BatchTest(unittest.TestCase):
+    """Methods for testing the module TPBatch.py"""
+    def setUp(self) -> None:
+        """Create an input folder with two packages and a manifest."""
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.input_folder: str = os.path.join(self.temp_dir.name, "packages")
+        self.output_folder: str = os.path.join(self.temp_dir.name, "fixed")
+        os.makedirs(os.path.join(self.input_folder, "nested"))
+        shutil.copy(EBA_PACKAGE, os.path.join(self.input_folder, "eba.zip"))
+        shutil.copy(EBA_PACKAGE, os.path.join(self.input_folder, "nested", "eba.zip"))
+        with open(os.path.join(self.input_folder, "notes.txt"), "w", encoding="utf-8") as notes_file:
+            notes_file.write("not a package")
+        self.manifest: str = os.path.join(self.temp_dir.name, "manifest.txt")
+        with open(self.manifest, "w", encoding="utf-8") as manifest_file:
+            manifest_file.write("# provider and package\nEBA packages/eba.zip\n\nEDINET 'packages/missing.zip'\n")
+        return None
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+        return None
+
+    # read_jobs()
+    def test_read_jobs_from_directory(self) -> None:
+        """Test that all zip files of a directory get their own destination folder."""
+        jobs: list[BatchJob] = read_jobs(self.input_folder, self.output_folder, "EBA")
+        self.assertEqual([os.path.relpath(job.package, self.input_folder) for job in jobs], ["eba.zip", os.path.join("nested", "eba.zip")])
+        self.assertEqual([os.path.basename(job.destination_folder) for job in jobs], ["eba", "eba_1"])
+        self.assertRaises(ValueError, read_jobs, self.input_folder, self.output_folder)
+        return None
+
+    def test_read_jobs_from_manifest(self) -> None:
+        """Test that manifest paths are resolved relative to the manifest."""
+        jobs: list[BatchJob] = read_jobs(self.manifest, self.output_folder)
+        self.assertEqual([job.provider for job in jobs], ["EBA", "EDINET"])
+        self.assertEqual(jobs[0].package, os.path.join(self.input_folder, "eba.zip"))
+        return None
+
+    # run_batch()
+    def test_run_batch(self) -> None:
+        """Test that results are aggregated in input order and failures are isolated."""
+        results: list[BatchResult] = run_batch(read_jobs(self.manifest, self.output_folder), workers=2, check_only=True)
+        self.assertEqual([result.success for result in results], [True, False])
+        self.assertIn("Package metadata files are valid", results[0].log)
+        self.assertIn("error", [entry["status"] for entry in results[1].report["entries"]])
+        # the inputs are left untouched
+        self.assertTrue(os.path.isfile(os.path.join(self.input_folder, "eba.zip")))
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
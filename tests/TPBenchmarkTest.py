@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import copy
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from typing import Any
+from TPBenchmark import DTS_DEFECTS, STRUCTURE_DEFECTS, compare_results, gen_package, get_cases, load_baseline, measure, save_baseline
+
+"""BenchmarkTest.py
+
+The class contains relevant functions to test the package
+generator and the benchmark harness in TPBenchmark.py.
+"""
+
+class BenchmarkTest(unittest.TestCase):
+    """Methods for testing the module TPBenchmark.py"""
+    def setUp(self) -> None:
+        """Create a folder for the generated packages."""
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        return None
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+        return None
+
+    # gen_package()
+    def test_gen_package(self) -> None:
+        """Test that generated packages have the requested size and are reproducible."""
+        package: str = gen_package(os.path.join(self.temp_dir.name, "deep.zip"), 200, "deep")
+        with zipfile.ZipFile(package) as zip_file:
+            names: list[str] = zip_file.namelist()
+        self.assertEqual(len(names), 200)
+        self.assertTrue(all(name.startswith("deep/") for name in names))
+        self.assertIn("deep/www.example.com/tax/tab/d0/d0/d3/d1/m13.xml", names)
+        with open(package, "rb") as package_file:
+            content: bytes = package_file.read()
+        with open(gen_package(package, 200, "deep"), "rb") as package_file:
+            self.assertEqual(package_file.read(), content)
+        with self.assertRaises(ValueError):
+            gen_package(package, 200, defects=("unknown",))
+        return None
+
+    # measure()
+    def test_measure_conformant(self) -> None:
+        """Test that conformant packages pass all checks and the stages are measured."""
+        package: str = gen_package(os.path.join(self.temp_dir.name, "conformant.zip"), 200, entry_points=3, catalog_entries=20)
+        result: dict[str, Any] = measure(package, "check", os.path.join(self.temp_dir.name, "output"))
+        self.assertTrue(result["success"])
+        self.assertEqual(result["failedChecks"], [])
+        self.assertEqual(result["members"], 200)
+        self.assertIn("TPChecker.check_dts", result["stages"])
+        result = measure(package, "pack", os.path.join(self.temp_dir.name, "output"))
+        self.assertEqual(list(result["stages"]), ["gen_zip_archive"])
+        return None
+
+    def test_measure_broken(self) -> None:
+        """Test that the defects of broken packages make the checks fail."""
+        package: str = gen_package(os.path.join(self.temp_dir.name, "structure.zip"), 200, defects=STRUCTURE_DEFECTS)
+        self.assertEqual(measure(package, "check", os.path.join(self.temp_dir.name, "output"))["failedChecks"],
+                         ["memberPaths", "topLevelSingleDir", "metadataFiles"])
+        package = gen_package(os.path.join(self.temp_dir.name, "dts.zip"), 200, defects=DTS_DEFECTS)
+        self.assertEqual(measure(package, "check", os.path.join(self.temp_dir.name, "output"))["failedChecks"],
+                         ["catalogRewriteUris", "dts", "metadataFiles"])
+        return None
+
+    # compare_results()
+    def test_compare_results(self) -> None:
+        """Test that slower runs and stages, memory growth and changed outcomes are regressions, but noise is not."""
+        baseline: dict[str, dict[str, Any]] = {
+            "conformant-wide-1k/check": {"success": True, "failedChecks": [], "wallTime": 1.0, "peakRss": 100 * 2**20,
+                                         "stages": {"TPChecker.check_dts": 0.5, "TPChecker.has_zip_format": 0.01}},
+        }
+        results: dict[str, dict[str, Any]] = copy.deepcopy(baseline)
+        results["conformant-wide-1k/check"]["wallTime"] = 1.2
+        results["conformant-wide-1k/check"]["stages"]["TPChecker.has_zip_format"] = 0.04
+        results["metadata-1k/check"] = results["conformant-wide-1k/check"]
+        self.assertEqual(compare_results(results, baseline), [])
+        results["conformant-wide-1k/check"] = copy.deepcopy(baseline["conformant-wide-1k/check"])
+        results["conformant-wide-1k/check"].update(wallTime=1.5, peakRss=200 * 2**20, success=False, failedChecks=["dts"])
+        results["conformant-wide-1k/check"]["stages"]["TPChecker.check_dts"] = 1.0
+        self.assertEqual(len(compare_results(results, baseline)), 4)
+        self.assertEqual(compare_results(results, baseline, threshold=1.0), ["conformant-wide-1k/check: failed checks changed from [] to ['dts']"])
+        return None
+
+    # save_baseline(), load_baseline()
+    def test_baseline(self) -> None:
+        """Test that the results are saved and loaded as baseline."""
+        baseline_file: str = os.path.join(self.temp_dir.name, "baseline.json")
+        results: dict[str, dict[str, Any]] = {"broken-dts-1k/fix": {"success": True, "failedChecks": ["dts"], "wallTime": 0.1, "peakRss": None, "stages": {}}}
+        save_baseline(baseline_file, results)
+        self.assertEqual(load_baseline(baseline_file), results)
+        self.assertEqual([case.name for case in get_cases(["1k"])],
+                         ["conformant-wide-1k", "conformant-deep-1k", "broken-structure-1k", "broken-dts-1k", "metadata-1k"])
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
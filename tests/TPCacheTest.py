@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import run_package
+from TPCache import ResultCache
+from TPReport import Report
+
+"""CacheTest.py
+
+The class contains relevant functions to test the result
+cache in TPCache.py.
+"""
+
+EBA_PACKAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "input", "EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata", "EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip")
+
+class CacheTest(unittest.TestCase):
+    """Methods for testing the class ResultCache"""
+    def setUp(self) -> None:
+        """Create an empty cache and a package to cache results for."""
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.cache: ResultCache = ResultCache(os.path.join(self.temp_dir.name, "cache", "results.sqlite"))
+        self.archive: str = os.path.join(self.temp_dir.name, "package.zip")
+        with open(self.archive, "wb") as archive_file:
+            archive_file.write(b"package")
+        return None
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self.temp_dir.cleanup()
+        return None
+
+    # get_key()
+    def test_get_key(self) -> None:
+        """Test that the key depends on the content and the options of a run."""
+        key: str = self.cache.get_key(self.archive, checkOnly=True)
+        self.assertEqual(self.cache.get_key(self.archive, checkOnly=True), key)
+        self.assertNotEqual(self.cache.get_key(self.archive, checkOnly=False), key)
+        with open(self.archive, "wb") as archive_file:
+            archive_file.write(b"changed")
+        self.assertNotEqual(self.cache.get_key(self.archive, checkOnly=True), key)
+        self.assertIsNone(self.cache.get_key(os.path.join(self.temp_dir.name, "missing.zip")))
+        return None
+
+    # get() and put()
+    def test_get_put(self) -> None:
+        """Test that a report is only returned as long as its output is unchanged."""
+        output: str = os.path.join(self.temp_dir.name, "output.zip")
+        with open(output, "wb") as output_file:
+            output_file.write(b"fixed")
+        key: str = self.cache.get_key(self.archive)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, {"success": True}, output)
+        self.assertEqual(self.cache.get(key), {"success": True})
+        self.assertEqual(len(self.cache.get_output_sha256(key)), 64)
+        os.remove(output)
+        self.assertIsNone(self.cache.get(key))
+        return None
+
+    def test_evict(self) -> None:
+        """Test that the least recently used reports are evicted beyond the size cap."""
+        self.cache.max_size = 150
+        self.cache.put("first", {"entries": "x" * 40})
+        self.cache.put("second", {"entries": "x" * 40})
+        self.cache.get("first")
+        self.cache.put("third", {"entries": "x" * 40})
+        self.assertIsNotNone(self.cache.get("first"))
+        self.assertIsNone(self.cache.get("second"))
+        self.assertIsNotNone(self.cache.get("third"))
+        return None
+
+    # run_package()
+    def test_run_package(self) -> None:
+        """Test that the results of an unchanged package are taken from the cache."""
+        reports: list[Report] = [Report("EBA", EBA_PACKAGE) for _ in range(2)]
+        report: Report
+        for report in reports:
+            self.assertTrue(run_package("EBA", EBA_PACKAGE, check_only=True, report=report, cache=self.cache))
+        self.assertEqual([report.cached for report in reports], [False, True])
+        self.assertEqual([entry.to_dict() for entry in reports[1].entries], [entry.to_dict() for entry in reports[0].entries])
+        self.assertEqual(reports[1].result, reports[0].result)
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPCatalog import CatalogResolver, normalize_uri
+from TPChecker import TPChecker
+
+"""CatalogTest.py
+
+The class contains relevant functions to test the catalog
+resolution in TPCatalog.py.
+"""
+
+EBA_PACKAGE = "../input/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip"
+
+CATALOG = b"""<?xml version="1.0" encoding="UTF-8"?>
+<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+    <rewriteURI uriStartString="http://www.example.com/" rewritePrefix="../www.example.com/"/>
+    <rewriteURI uriStartString="http://www.example.com/tax/2023/" rewritePrefix="../tax-2023/"/>
+    <rewriteURI uriStartString="http://www.example.com/a b/" rewritePrefix="http://mirror.example.com/"/>
+    <rewriteURI uriStartString="http://www.example.com/a%20b/" rewritePrefix="../duplicate/"/>
+</catalog>
+"""
+
+class CatalogTest(unittest.TestCase):
+    """Methods for testing the class CatalogResolver"""
+    # normalize_uri()
+    def test_normalize_uri(self) -> None:
+        """Test the URI normalization of the XML Catalogs specification."""
+        self.assertEqual(normalize_uri("http://www.example.com/tax.xsd"), "http://www.example.com/tax.xsd")
+        self.assertEqual(normalize_uri("http://www.example.com/a b/ä"), "http://www.example.com/a%20b/%C3%A4")
+        self.assertEqual(normalize_uri("http://www.example.com/%7e%2f"), "http://www.example.com/~%2F")
+        self.assertEqual(normalize_uri(normalize_uri("http://www.example.com/a b/")), "http://www.example.com/a%20b/")
+        return None
+
+    # resolve()
+    def test_resolve(self) -> None:
+        """Test that URLs are remapped with the longest matching start string."""
+        catalog_resolver: CatalogResolver = CatalogResolver.from_stream(io.BytesIO(CATALOG), "package/META-INF/catalog.xml")
+        self.assertEqual(len(catalog_resolver), 3)
+        self.assertEqual(catalog_resolver.duplicates, ["http://www.example.com/a%20b/"])
+        self.assertEqual(catalog_resolver.resolve("http://www.example.com/tax/2022/tax.xsd"), "package/www.example.com/tax/2022/tax.xsd")
+        self.assertEqual(catalog_resolver.resolve("http://www.example.com/tax/2023/tax.xsd"), "package/tax-2023/tax.xsd")
+        self.assertEqual(catalog_resolver.resolve("http://www.example.com/a b/tax.xsd"), "http://mirror.example.com/tax.xsd")
+        self.assertEqual(catalog_resolver.resolve("http://www.example.org/tax.xsd"), "http://www.example.org/tax.xsd")
+        return None
+
+    # has_unique_rewrite_uris()
+    def test_has_unique_rewrite_uris(self) -> None:
+        """Test that duplicate start strings are reported (tpe:multipleRewriteURIsForStartString)."""
+        tp_checker: TPChecker = TPChecker(quiet=True)
+        self.assertTrue(tp_checker.has_unique_rewrite_uris(EBA_PACKAGE))
+        self.assertEqual(len(tp_checker.get_catalog_resolver(EBA_PACKAGE)), 21)
+        temp_dir: tempfile.TemporaryDirectory
+        with tempfile.TemporaryDirectory() as temp_dir:
+            archive: str = os.path.join(temp_dir, "package.zip")
+            with zipfile.ZipFile(archive, "w") as zip_file:
+                zip_file.writestr("package/META-INF/catalog.xml", CATALOG)
+            self.assertFalse(tp_checker.has_unique_rewrite_uris(archive))
+            self.assertIn("http://www.example.com/a%20b/", tp_checker.messages[-1])
+        return None
+
+    def test_catalog_resolver_concurrent(self) -> None:
+        """Test that concurrent checks of forked checkers keep one resolver per catalog."""
+        tp_checker: TPChecker = TPChecker(quiet=True)
+        resolvers: list[CatalogResolver | None] = []
+        def run_checks() -> None:
+            forked_checker: TPChecker = tp_checker.fork()
+            forked_checker.has_unique_rewrite_uris(EBA_PACKAGE)
+            resolvers.append(forked_checker.get_catalog_resolver(EBA_PACKAGE))
+            return None
+        threads: list[threading.Thread] = [threading.Thread(target=run_checks) for _ in range(8)]
+        thread: threading.Thread
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(resolvers), 8)
+        self.assertTrue(all(resolver is tp_checker.get_catalog_resolver(EBA_PACKAGE) for resolver in resolvers))
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
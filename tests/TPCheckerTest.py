@@ -3,7 +3,10 @@
 
 import os
 import sys
+import tempfile
 import unittest
+import warnings
+import zipfile
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from TPChecker import TPChecker
 
@@ -18,12 +21,63 @@ class CheckerTest(unittest.TestCase):
     # has_zip_format()
     def test_has_zip_format(self) -> None:
         """Test has_zip_format() function."""
-        self.assertTrue(TPChecker().has_zip_format("data/example_0.zip"))
+        self.assertTrue(TPChecker().has_zip_format("data/archive_single_dir.zip"))
+        self.assertTrue(TPChecker().has_zip_format("../input/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip", verify_crc=True))
+        # an empty file with the extension of a zip archive is no zip archive
+        self.assertFalse(TPChecker().has_zip_format("data/example_0.zip"))
         self.assertFalse(TPChecker().has_zip_format("data/no_zip_0.txt"))
         self.assertFalse(TPChecker().has_zip_format("data/no_zip_1.tar.gz"))
         self.assertFalse(TPChecker().has_zip_format("data/no_extension"))
         return None
 
+    def test_has_zip_format_limits(self) -> None:
+        """Test that corrupt archives and archives exceeding the limits are rejected."""
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(__file__)) as temp_dir:
+            archive = os.path.join(temp_dir, "example.zip")
+            with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+                zip_file.writestr("example/bomb.xml", b"0" * 4 * 1024 * 1024)
+                zip_file.writestr("example/data.xml", b"<data/>" * 1000)
+            self.assertFalse(TPChecker(quiet=True).has_zip_format(archive))
+            self.assertTrue(TPChecker(quiet=True).has_zip_format(archive, max_compression_ratio=10000))
+            self.assertFalse(TPChecker(quiet=True).has_zip_format(archive, max_compression_ratio=10000, max_entry_count=1))
+            self.assertFalse(TPChecker(quiet=True).has_zip_format(archive, max_compression_ratio=10000, max_total_size=1024))
+            # corrupt the data of the last member, which is only noticed when the crc is verified
+            with open(archive, "r+b") as archive_file:
+                archive_file.seek(zipfile.ZipFile(archive).getinfo("example/data.xml").header_offset + 60)
+                archive_file.write(b"\xff\xff\xff\xff")
+            self.assertTrue(TPChecker(quiet=True).has_zip_format(archive, max_compression_ratio=10000))
+            tp_checker = TPChecker(quiet=True)
+            self.assertFalse(tp_checker.has_zip_format(archive, verify_crc=True, max_compression_ratio=10000))
+            self.assertIn("example/data.xml", tp_checker.messages[-1])
+            self.assertEqual(tp_checker.members, ["example/data.xml"])
+        return None
+
+    # check_member_paths()
+    def test_check_member_paths(self) -> None:
+        """Test check_member_paths function."""
+        # Positive test case with the members of the EBA package.
+        self.assertTrue(TPChecker().check_member_paths("../input/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip"))
+        # Negative test case with unsafe member paths, all of them are reported.
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(__file__)) as temp_dir:
+            archive = os.path.join(temp_dir, "example.zip")
+            with zipfile.ZipFile(archive, "w") as zip_file, warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                for name in ("example/tax.xsd", "example/TAX.xsd", "Example/readme.txt", "example/../tax.xsd", "example\\tax.xsd", "/example/tax.xsd", "example/tax.xsd"):
+                    zip_file.writestr(zipfile.ZipInfo(name), "")
+            tp_checker = TPChecker(quiet=True)
+            self.assertFalse(tp_checker.check_member_paths(archive))
+            self.assertEqual(tp_checker.messages, ["Member example/TAX.xsd differs from example/tax.xsd in case only",
+                                                   "Member Example differs from example in case only",
+                                                   "Member example/../tax.xsd refers to a parent directory ('..')",
+                                                   "Member example\\tax.xsd uses backslashes as path separator",
+                                                   "Member /example/tax.xsd has an absolute path",
+                                                   "Member example/tax.xsd is stored more than once"])
+            self.assertEqual(tp_checker.members, ["example/TAX.xsd", "Example", "example/../tax.xsd", "example\\tax.xsd", "/example/tax.xsd", "example/tax.xsd"])
+            tp_checker = TPChecker(quiet=True)
+            self.assertFalse(tp_checker.check_case_sensitivity(archive))
+            self.assertEqual(len(tp_checker.messages), 2)
+        return None
+
     # has_top_level_single_dir()
     def test_has_top_level_single_dir(self) -> None:
         """Test has_top_level_single_dir function."""
@@ -33,6 +87,48 @@ class CheckerTest(unittest.TestCase):
         self.assertFalse(TPChecker().has_top_level_single_dir("../input/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip"))
         return None
 
+    # has_meta_inf_folder()
+    def test_has_meta_inf_folder(self) -> None:
+        """Test has_meta_inf_folder function."""
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(__file__)) as temp_dir:
+            archives: dict[str, tuple[str, ...]] = {"root.zip": ("META-INF/", "samples/sample.xsd", "taxonomy/tax.xsd"),
+                                                    "nested.zip": ("example/META-INF/catalog.xml", "example/tax.xsd"),
+                                                    "missing.zip": ("samples/sample.xsd", "taxonomy/tax.xsd")}
+            name: str
+            members: tuple[str, ...]
+            for name, members in archives.items():
+                with zipfile.ZipFile(os.path.join(temp_dir, name), "w") as zip_file:
+                    member: str
+                    for member in members:
+                        zip_file.writestr(member, "")
+            # Positive test cases with a META-INF folder at the root and below the top-level directory.
+            self.assertTrue(TPChecker().has_meta_inf_folder(os.path.join(temp_dir, "root.zip")))
+            self.assertTrue(TPChecker().has_meta_inf_folder(os.path.join(temp_dir, "nested.zip")))
+            # Negative test case without a META-INF folder.
+            self.assertFalse(TPChecker().has_meta_inf_folder(os.path.join(temp_dir, "missing.zip")))
+        return None
+
+    # close()
+    def test_close(self) -> None:
+        """Test that the readers of an archive are closed and the archive can be moved afterwards."""
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(__file__)) as temp_dir:
+            archive: str = os.path.join(temp_dir, "example.zip")
+            with zipfile.ZipFile(archive, "w") as zip_file:
+                zip_file.writestr("example/META-INF/catalog.xml", "")
+            tp_checker: TPChecker = TPChecker(quiet=True)
+            self.assertTrue(tp_checker.has_meta_inf_folder(archive))
+            package_reader = tp_checker.get_package_reader(archive)
+            tp_checker.close(archive)
+            self.assertTrue(package_reader.closed)
+            self.assertEqual(tp_checker._package_readers, {})
+            self.assertEqual(tp_checker._package_indexes, {})
+            os.replace(archive, os.path.join(temp_dir, "moved.zip"))
+            # the next check reads the archive again
+            self.assertTrue(tp_checker.has_meta_inf_folder(os.path.join(temp_dir, "moved.zip")))
+            tp_checker.close()
+            self.assertEqual(tp_checker._package_readers, {})
+        return None
+
     # validate_xml()
     def test_validate_xml(self) -> None:
         """Test validate_xml function."""
@@ -46,6 +142,24 @@ class CheckerTest(unittest.TestCase):
         self.assertFalse(TPChecker().validate_xml(invalid_xsd_path, "https://github.com/FIWARE/test.Functional/blob/master/API.test/security.PDP/8.0.1/catalog.xml"))
         return None
 
+    # validate_package_member()
+    def test_validate_package_member(self) -> None:
+        """Test validate_package_member function."""
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(__file__)) as temp_dir:
+            schemafile = os.path.join(temp_dir, "example.xsd")
+            with open(schemafile, "w", encoding="utf-8") as xsd_file:
+                xsd_file.write('<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"><xs:element name="example" type="xs:int"/></xs:schema>')
+            archive = os.path.join(temp_dir, "example.zip")
+            with zipfile.ZipFile(archive, "w") as zip_file:
+                zip_file.writestr("example/valid.xml", "<example>1</example>")
+                zip_file.writestr("example/invalid.xml", "<example>one</example>")
+            archive = "../tests/" + os.path.basename(temp_dir) + "/example.zip"
+            # Positive test case with a valid member streamed from the archive.
+            self.assertTrue(TPChecker().validate_package_member(archive, "example/valid.xml", schemafile))
+            # Negative test case with an invalid member streamed from the archive.
+            self.assertFalse(TPChecker().validate_package_member(archive, "example/invalid.xml", schemafile))
+        return None
+
     # has_taxonomy_package_xml()
     def test_has_taxonomy_package_xml(self) -> None:
         """Test has_taxonomy_package_xml function."""
@@ -70,5 +184,29 @@ class CheckerTest(unittest.TestCase):
         self.assertFalse(TPChecker().has_catalog_xml(archive_without_catalog))
         return None
 
+    # check_entry_points()
+    def test_check_entry_points(self) -> None:
+        """Test check_entry_points function."""
+        # Positive test case with the entry points of the EBA package.
+        self.assertTrue(TPChecker().check_entry_points("../input/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip"))
+        # Negative test case with an entry point which is no taxonomy document and one outside of the package.
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(__file__)) as temp_dir:
+            archive = os.path.join(temp_dir, "example.zip")
+            with zipfile.ZipFile(archive, "w") as zip_file:
+                zip_file.writestr("example/META-INF/taxonomyPackage.xml", """<taxonomyPackage xmlns="http://xbrl.org/2016/taxonomy-package"><entryPoints>
+                    <entryPoint><entryPointDocument href="http://www.example.com/tax.xsd"/></entryPoint>
+                    <entryPoint><entryPointDocument href="../www.example.com/readme.xml"/></entryPoint>
+                    <entryPoint><entryPointDocument href="http://www.example.com/missing.xsd"/></entryPoint>
+                    </entryPoints></taxonomyPackage>""")
+                zip_file.writestr("example/META-INF/catalog.xml", """<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+                    <rewriteURI uriStartString="http://www.example.com/" rewritePrefix="../www.example.com/"/></catalog>""")
+                zip_file.writestr("example/www.example.com/tax.xsd", '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"/>')
+                zip_file.writestr("example/www.example.com/readme.xml", "<readme/>")
+            tp_checker = TPChecker(quiet=True)
+            self.assertFalse(tp_checker.check_entry_points(archive))
+            self.assertEqual(len(tp_checker.messages), 2)
+            self.assertEqual(tp_checker.members, ["example/META-INF/taxonomyPackage.xml", "example/www.example.com/readme.xml"])
+        return None
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPChecker import TPChecker
+from TPDTS import DTSGraph, IN_PACKAGE, INVALID, MISSING, OUTSIDE_PACKAGE
+
+"""DTSTest.py
+
+The class contains relevant functions to test the discovery of
+the DTS in TPDTS.py.
+"""
+
+EBA_PACKAGE = "../input/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip"
+
+TAXONOMY_PACKAGE = """<taxonomyPackage xmlns="http://xbrl.org/2016/taxonomy-package"><entryPoints>
+    <entryPoint><entryPointDocument href="http://www.example.com/tax.xsd"/></entryPoint>
+    <entryPoint><entryPointDocument href="http://www.example.com/other.xsd"/></entryPoint>
+    </entryPoints></taxonomyPackage>"""
+
+CATALOG = """<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">
+    <rewriteURI uriStartString="http://www.example.com/" rewritePrefix="../www.example.com/"/></catalog>"""
+
+TAX_XSD = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns:link="http://www.xbrl.org/2003/linkbase"
+    xmlns:xlink="http://www.w3.org/1999/xlink">
+    <xs:annotation><xs:appinfo>
+        <link:linkbaseRef xlink:type="simple" xlink:href="tax-lab.xml"/>
+    </xs:appinfo></xs:annotation>
+    <xs:import namespace="http://www.xbrl.org/2003/instance" schemaLocation="http://www.xbrl.org/2003/xbrl-instance-2003-12-31.xsd"/>
+    <xs:import namespace="http://www.example.com/dict" schemaLocation="dict/dict.xsd"/>
+</xs:schema>"""
+
+TAX_LAB_XML = """<link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase" xmlns:xlink="http://www.w3.org/1999/xlink">
+    <link:labelLink xlink:type="extended">
+        <link:loc xlink:type="locator" xlink:href="dict/dict.xsd#concept" xlink:label="concept"/>
+        <link:loc xlink:type="locator" xlink:href="http://www.example.com/missing.xsd#concept" xlink:label="missing"/>
+    </link:labelLink>
+</link:linkbase>"""
+
+class DTSTest(unittest.TestCase):
+    """Methods for testing the classes DTSWalker and DTSGraph"""
+    def setUp(self) -> None:
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.archive: str = os.path.join(self.temp_dir.name, "example.zip")
+        with zipfile.ZipFile(self.archive, "w") as zip_file:
+            zip_file.writestr("example/META-INF/taxonomyPackage.xml", TAXONOMY_PACKAGE)
+            zip_file.writestr("example/META-INF/catalog.xml", CATALOG)
+            zip_file.writestr("example/www.example.com/tax.xsd", TAX_XSD)
+            zip_file.writestr("example/www.example.com/tax-lab.xml", TAX_LAB_XML)
+            zip_file.writestr("example/www.example.com/dict/dict.xsd", '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"/>')
+            zip_file.writestr("example/www.example.com/other.xsd", """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+                <xs:include schemaLocation="dict/dict.xsd"/><xs:include schemaLocation="broken.xsd"/></xs:schema>""")
+            zip_file.writestr("example/www.example.com/broken.xsd", "<xs:schema")
+        return None
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+        return None
+
+    # get_dts_graph()
+    def test_get_dts_graph(self) -> None:
+        """Test that the references are resolved through the catalog and every document is added once."""
+        dts_graph: DTSGraph = TPChecker(quiet=True).get_dts_graph(self.archive)
+        status: dict[str, int] = {url: dts_graph.status[dts_graph.ids[url]] for url in dts_graph.urls}
+        self.assertEqual(status, {"http://www.example.com/tax.xsd": IN_PACKAGE,
+                                  "http://www.example.com/other.xsd": IN_PACKAGE,
+                                  "http://www.example.com/tax-lab.xml": IN_PACKAGE,
+                                  "http://www.example.com/dict/dict.xsd": IN_PACKAGE,
+                                  "http://www.example.com/broken.xsd": INVALID,
+                                  "http://www.example.com/missing.xsd": MISSING,
+                                  "http://www.xbrl.org/2003/xbrl-instance-2003-12-31.xsd": OUTSIDE_PACKAGE})
+        tax_id: int = dts_graph.ids["http://www.example.com/tax.xsd"]
+        self.assertEqual([dts_graph.urls[node_id] for node_id in dts_graph.references(tax_id)],
+                         ["http://www.example.com/tax-lab.xml", "http://www.xbrl.org/2003/xbrl-instance-2003-12-31.xsd",
+                          "http://www.example.com/dict/dict.xsd"])
+        self.assertEqual(len(list(dts_graph.reachable(tax_id))), 5)
+        self.assertEqual(dts_graph.members[dts_graph.ids["http://www.example.com/dict/dict.xsd"]], "example/www.example.com/dict/dict.xsd")
+        return None
+
+    # referrer()
+    def test_referrer(self) -> None:
+        """Test that the first referring document in id order is returned, and none for entry points."""
+        dts_graph: DTSGraph = TPChecker(quiet=True).get_dts_graph(self.archive)
+        self.assertEqual(dts_graph.referrer(dts_graph.ids["http://www.example.com/dict/dict.xsd"]), dts_graph.ids["http://www.example.com/tax.xsd"])
+        self.assertEqual(dts_graph.referrer(dts_graph.ids["http://www.example.com/missing.xsd"]), dts_graph.ids["http://www.example.com/tax-lab.xml"])
+        self.assertIsNone(dts_graph.referrer(dts_graph.ids["http://www.example.com/other.xsd"]))
+        # documents added later are taken into account
+        node_id: int = dts_graph.add_node("http://www.example.com/new.xsd", None, MISSING)
+        self.assertIsNone(dts_graph.referrer(node_id))
+        return None
+
+    # check_dts()
+    def test_check_dts(self) -> None:
+        """Test that missing and malformed documents of the DTS are reported."""
+        self.assertTrue(TPChecker(quiet=True).check_dts(EBA_PACKAGE))
+        tp_checker: TPChecker = TPChecker(quiet=True)
+        self.assertFalse(tp_checker.check_dts(self.archive))
+        self.assertEqual(tp_checker.messages, ["Document http://www.example.com/broken.xsd is not well-formed (referenced by http://www.example.com/other.xsd)",
+                                               "Document http://www.example.com/missing.xsd is not part of the package (referenced by http://www.example.com/tax-lab.xml)",
+                                               "DTS has 6 documents in the package, 1 outside of the package"])
+        self.assertEqual(tp_checker.members, ["example/www.example.com/broken.xsd", "example/www.example.com/tax-lab.xml"])
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import Callable, IO
+from xml.dom.minidom import parseString
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from lxml import etree
+from app import run_package
+from TPReport import Report
+from TPFixer import EDINETIndex, EDINETTaxonomyPackage, walk_folder
+from TPMisc import XmlWriter
+
+"""FixerTest.py
+
+The class contains relevant functions to test the generation
+of the EDINET metadata files in TPFixer.py and the XML writer
+in TPMisc.py.
+"""
+
+EDINET_MEMBERS: list[str] = [
+    "samples/2021-11-01/jppfs_rt_2021-11-01.xsd",
+    "samples/2022-11-01/jpcrp030000-asr-001_2022-11-01.xsd",
+    "samples/2022-11-01/jppfs_rt_2022-11-01.xsd",
+    "samples/2022-11-01/readme.txt",
+    "samples/2022-11-01/instances/sample.xml",
+    "samples/readme.txt",
+    "taxonomy/jpcrp/2022-11-01/jpcrp_cor_2022-11-01.xsd",
+    "taxonomy/jppfs/2021-11-01/jppfs_cor_2021-11-01.xsd",
+    "taxonomy/jppfs/2022-11-01/label/jppfs_2022-11-01_lab.xml",
+    "taxonomy/jppfs/2022-11-01/",
+]
+
+class FixerTest(unittest.TestCase):
+    """Methods for testing the EDINET metadata files"""
+    def setUp(self) -> None:
+        """Create the fixer without extracting a package."""
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.taxonomy_package: EDINETTaxonomyPackage = EDINETTaxonomyPackage(os.path.join(self.temp_dir.name, "ALL_20221101"), self.temp_dir.name,
+                                                                             extract=False)
+        return None
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+        return None
+
+    # EDINETIndex
+    def test_edinet_index(self) -> None:
+        """Test that the publication dates and taxonomy directories are collected in one pass."""
+        edinet_index: EDINETIndex = EDINETIndex(iter(EDINET_MEMBERS))
+        self.assertEqual(edinet_index.entry_points, {"2021-11-01": ["jppfs_rt_2021-11-01.xsd"],
+                                                     "2022-11-01": ["jpcrp030000-asr-001_2022-11-01.xsd", "jppfs_rt_2022-11-01.xsd"]})
+        self.assertEqual(list(edinet_index.sample_dirs), ["2021-11-01", "2022-11-01"])
+        self.assertEqual(list(edinet_index.taxonomy_dirs), ["jpcrp/2022-11-01", "jppfs/2021-11-01", "jppfs/2022-11-01"])
+        return None
+
+    def test_walk_folder(self) -> None:
+        """Test that an extracted package is indexed like its archive."""
+        member: str
+        for member in EDINET_MEMBERS:
+            os.makedirs(os.path.dirname(os.path.join(self.temp_dir.name, "package", member)), exist_ok=True)
+            if not member.endswith("/"):
+                with open(os.path.join(self.temp_dir.name, "package", member), "w", encoding="utf-8"):
+                    pass
+        self.assertEqual(sorted(walk_folder(os.path.join(self.temp_dir.name, "package"))), sorted(member for member in EDINET_MEMBERS if not member.endswith("/")))
+        return None
+
+    # EDINETTaxonomyPackage.fix_package()
+    def test_fix_package_with_root_meta_inf(self) -> None:
+        """Test that a package with a META-INF folder but without top-level directory is fixed in extract mode."""
+        package: str = os.path.join(self.temp_dir.name, "input", "ALL_20221101", "ALL_20221101.zip")
+        os.makedirs(os.path.dirname(package))
+        with zipfile.ZipFile(package, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("META-INF/", "")
+            zip_file.writestr("samples/2022-11-01/jppfs_rt_2022-11-01.xsd", "<schema/>")
+            zip_file.writestr("taxonomy/jppfs/2022-11-01/jppfs_cor_2022-11-01.xsd", "<schema/>")
+        report: Report = Report("EDINET", package, None)
+        self.assertTrue(run_package("EDINET", package, os.path.join(self.temp_dir.name, "output"), report=report, extract=True))
+        with zipfile.ZipFile(report.output, "r") as zip_file:
+            self.assertEqual(zip_file.namelist(), ["ALL_20221101/META-INF/catalog.xml", "ALL_20221101/META-INF/taxonomyPackage.xml",
+                                                   "ALL_20221101/samples/2022-11-01/jppfs_rt_2022-11-01.xsd",
+                                                   "ALL_20221101/taxonomy/jppfs/2022-11-01/jppfs_cor_2022-11-01.xsd"])
+        # the META-INF folder may exist already when it is generated
+        os.makedirs(os.path.join(self.temp_dir.name, "META-INF"))
+        self.taxonomy_package.fix_meta_inf_folder()
+        return None
+
+    # EDINETTaxonomyPackage.gen_metadata_files()
+    def test_gen_metadata_files(self) -> None:
+        """Test that every taxonomy directory and the entry points of all publication dates are generated."""
+        metadata_writers: dict[str, Callable[[IO[bytes]], None]] = self.taxonomy_package.gen_metadata_files(
+            iter(EDINET_MEMBERS + ["samples/2022-11-01/unknown.xsd"]))
+        metadata_files: dict[str, bytes] = {}
+        output: io.StringIO = io.StringIO()
+        metadata_path: str
+        write_metadata: Callable[[IO[bytes]], None]
+        with contextlib.redirect_stdout(output):
+            for metadata_path, write_metadata in metadata_writers.items():
+                metadata_file: io.BytesIO = io.BytesIO()
+                write_metadata(metadata_file)
+                metadata_files[metadata_path] = metadata_file.getvalue()
+        self.assertIn("unknown.xsd", output.getvalue())
+        catalog: etree._Element = etree.fromstring(metadata_files["META-INF/catalog.xml"])
+        self.assertEqual([element.get("rewritePrefix") for element in catalog],
+                         ["../samples/2021-11-01/", "../samples/2022-11-01/", "../taxonomy/jpcrp/2022-11-01/",
+                          "../taxonomy/jppfs/2021-11-01/", "../taxonomy/jppfs/2022-11-01/"])
+        taxonomy_package: etree._Element = etree.fromstring(metadata_files["META-INF/taxonomyPackage.xml"])
+        namespaces: dict[str, str] = {"tp": "http://xbrl.org/2016/taxonomy-package"}
+        self.assertEqual([(entry_point.findtext("tp:name", namespaces=namespaces), entry_point.find("tp:entryPointDocument", namespaces).get("href"))
+                          for entry_point in taxonomy_package.iterfind("tp:entryPoints/tp:entryPoint", namespaces)],
+                         [("JPPFS : Primary Financial Statments", "http://disclosure.edinet-fsa.go.jp/samples/2021-11-01/jppfs_rt_2021-11-01.xsd"),
+                          ("JPCRP : Disclosure of Corporate Information", "http://disclosure.edinet-fsa.go.jp/samples/2022-11-01/jpcrp030000-asr-001_2022-11-01.xsd"),
+                          ("JPPFS : Primary Financial Statments", "http://disclosure.edinet-fsa.go.jp/samples/2022-11-01/jppfs_rt_2022-11-01.xsd"),
+                          ("<missingEntry>", "http://disclosure.edinet-fsa.go.jp/samples/2022-11-01/unknown.xsd")])
+        return None
+
+    def test_gen_metadata_files_report(self) -> None:
+        """Test that unknown entry points are recorded in the report instead of being printed."""
+        report: Report = Report("EDINET", "ALL_20221101.zip", None)
+        self.taxonomy_package.report = report
+        output: io.StringIO = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.taxonomy_package.gen_taxonomy_package_xml(EDINETIndex(iter(["samples/2022-11-01/unknown.xsd"])), io.BytesIO())
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual([(entry.name, entry.member) for entry in report.entries], [("fixTaxonomyPackageXml", "samples/2022-11-01/unknown.xsd")])
+        return None
+
+    # XmlWriter
+    def test_xml_writer(self) -> None:
+        """Test that documents are written like minidom's toprettyxml() writes them."""
+        root: ET.Element = ET.Element("root", {"xmlns": "urn:test", "xml:lang": "en"})
+        root.append(ET.Comment("generated"))
+        ET.SubElement(root, "empty")
+        ET.SubElement(root, "text", {"a": "<&\">"}).text = "a & b < c > \"d\""
+        ET.SubElement(ET.SubElement(root, "parent"), "child", {"href": "x"})
+        ET.SubElement(root, "parent")
+        stream: io.BytesIO = io.BytesIO()
+        xml_writer: XmlWriter = XmlWriter(stream)
+        xml_writer.declaration()
+        with xml_writer.element("root", {"xmlns": "urn:test", "xml:lang": "en"}):
+            xml_writer.comment("generated")
+            xml_writer.text_element("empty")
+            xml_writer.text_element("text", "a & b < c > \"d\"", {"a": "<&\">"})
+            with xml_writer.element("parent"):
+                xml_writer.text_element("child", attributes={"href": "x"})
+            with xml_writer.element("parent"):
+                pass
+        self.assertEqual(stream.getvalue().decode("utf-8"), parseString(ET.tostring(root, "utf-8")).toprettyxml(indent="    "))
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from typing import IO
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPChecker import TPChecker
+from TPManifest import MemberManifest
+
+"""ManifestTest.py
+
+The class contains relevant functions to test the incremental
+re-validation with the member manifest in TPManifest.py.
+"""
+
+class ManifestTest(unittest.TestCase):
+    """Methods for testing the class MemberManifest"""
+    def setUp(self) -> None:
+        """Create two versions of a package, the second one changes a single member."""
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.archives: list[str] = []
+        version: str
+        catalog: str
+        for version, catalog in (("1.0", "<catalog/>"), ("1.0_errata", "<catalog></catalog>")):
+            archive: str = os.path.join(self.temp_dir.name, f"package_{version}.zip")
+            with zipfile.ZipFile(archive, "w") as zip_file:
+                zip_file.writestr(f"package_{version}/META-INF/catalog.xml", catalog)
+                zip_file.writestr(f"package_{version}/META-INF/taxonomyPackage.xml", "<taxonomyPackage/>")
+            self.archives.append(archive)
+        self.checked_members: list[bytes] = []
+        return None
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+        return None
+
+    def check(self, member_stream: IO[bytes]) -> bool:
+        """A document-level check remembering which members it was run on."""
+        self.checked_members.append(member_stream.read())
+        return True
+
+    def check_version(self, archive: str, manifest: MemberManifest, changed: int) -> None:
+        """Check both metadata files of a package version."""
+        tp_checker: TPChecker = TPChecker(quiet=True, manifest=manifest)
+        self.assertEqual(manifest.add_package(tp_checker.get_package_index(archive)), (changed, 2))
+        name: str
+        for name in ("META-INF/catalog.xml", "META-INF/taxonomyPackage.xml"):
+            self.assertTrue(tp_checker.check_member(archive, f"{os.path.basename(archive)[:-4]}/{name}", "check", self.check))
+        return None
+
+    # check_member()
+    def test_incremental_check(self) -> None:
+        """Test that only changed members are checked again and unchanged ones inherit their results."""
+        manifest_file: str = os.path.join(self.temp_dir.name, "manifest.json")
+        manifest: MemberManifest = MemberManifest.load(manifest_file)
+        self.check_version(self.archives[0], manifest, 2)
+        self.assertEqual(self.checked_members, [b"<catalog/>", b"<taxonomyPackage/>"])
+        manifest.save(manifest_file)
+
+        manifest = MemberManifest.load(manifest_file)
+        self.check_version(self.archives[1], manifest, 1)
+        self.assertEqual(self.checked_members[2:], [b"<catalog></catalog>"])
+        self.assertEqual((manifest.checked, manifest.inherited), (1, 1))
+        self.assertEqual(manifest.members["META-INF/taxonomyPackage.xml"]["checks"]["check"]["result"], True)
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+import warnings
+import zipfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPChecker import TPChecker
+from TPPackage import PackageIndex
+
+"""PackageTest.py
+
+The class contains relevant functions to test the package
+index in TPPackage.py.
+"""
+
+EBA_PACKAGE = "../input/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip"
+
+class PackageTest(unittest.TestCase):
+    """Methods for testing the class PackageIndex"""
+    def setUp(self) -> None:
+        """Create a small package with a single top-level directory."""
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.archive: str = os.path.join(self.temp_dir.name, "package.zip")
+        with zipfile.ZipFile(self.archive, "w") as zip_file:
+            zip_file.writestr("package/META-INF/catalog.xml", "<catalog/>")
+            zip_file.writestr("package/META-INF/taxonomyPackage.xml", "<taxonomyPackage/>")
+            zip_file.writestr("package/www.example.com/tax.xsd", "<schema/>")
+        return None
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+        return None
+
+    # PackageIndex
+    def test_package_index(self) -> None:
+        """Test lookups in the package index."""
+        package_index: PackageIndex = PackageIndex.from_archive(self.archive)
+        self.assertEqual(len(package_index), 3)
+        self.assertIn("package/META-INF/catalog.xml", package_index)
+        self.assertIn("package/www.example.com", package_index)
+        self.assertNotIn("package/www.example.com/missing.xsd", package_index)
+        self.assertEqual(package_index.find("package/META-INF").path(), "package/META-INF/")
+        self.assertEqual([node.path() for node in package_index.find_basename("tax.xsd")], ["package/www.example.com/tax.xsd"])
+        self.assertEqual(package_index.entries["package/META-INF/catalog.xml"].file_size, len("<catalog/>"))
+        self.assertEqual(package_index.top_level_dir().name, "package")
+        return None
+
+    def test_package_index_path_table(self) -> None:
+        """Test that directories, directory entries and duplicates are kept like in the archive."""
+        with zipfile.ZipFile(self.archive, "a") as zip_file, warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            zip_file.writestr("package/empty/", "")
+            zip_file.writestr("package/META-INF/catalog.xml", "<catalog></catalog>")
+        package_index: PackageIndex = PackageIndex.from_archive(self.archive)
+        self.assertEqual(package_index.duplicates, ["package/META-INF/catalog.xml"])
+        self.assertEqual(len(package_index), 4)
+        self.assertEqual(list(package_index.entries), ["package/META-INF/catalog.xml", "package/META-INF/taxonomyPackage.xml",
+                                                       "package/www.example.com/tax.xsd", "package/empty/"])
+        self.assertEqual(package_index.entries["package/META-INF/catalog.xml"].file_size, len("<catalog></catalog>"))
+        self.assertEqual(package_index.find("package").list_dir(), [("META-INF", True), ("www.example.com", True), ("empty", True)])
+        self.assertEqual(package_index.find("package/META-INF").list_dir(), [("catalog.xml", False), ("taxonomyPackage.xml", False)])
+        self.assertTrue(package_index.find("package/empty/").entry.is_dir)
+        self.assertIsNone(package_index.find("package/META-INF").entry)
+        self.assertEqual(package_index.root.child("package").child("META-INF").child("catalog.xml").parent.path(), "package/META-INF/")
+        self.assertIsNone(package_index.root.child("package").child("missing"))
+        self.assertEqual(package_index.find_basename("META-INF"), [package_index.find("package/META-INF")])
+        return None
+
+    def test_package_index_lookups(self) -> None:
+        """Test that children and basenames are found in archive order in a larger index."""
+        names: list[str] = [f"package/dir{index % 7}/sub{index % 3}/file{index % 11}_{index}.xml" for index in range(1000)]
+        names += [f"package/dir{index}/common.xml" for index in range(7)] + ["package/dir3/sub1/"]
+        infolist: list[zipfile.ZipInfo] = [zipfile.ZipInfo(name) for name in names]
+        info: zipfile.ZipInfo
+        for info in infolist:
+            info.CRC = 0
+        package_index: PackageIndex = PackageIndex.from_infolist(infolist)
+        self.assertEqual(list(package_index.find("package").children), [f"dir{index}" for index in range(7)])
+        self.assertEqual([node.path() for node in package_index.find_basename("common.xml")], [f"package/dir{index}/common.xml" for index in range(7)])
+        self.assertEqual([node.path() for node in package_index.find_basename("sub1")],
+                         list(dict.fromkeys(name[:name.index("/sub1/") + 6] for name in names if "/sub1/" in name)))
+        self.assertEqual(package_index.find("package/dir3/sub1").list_dir(),
+                         [(name.rpartition("/")[2], False) for name in names if name.startswith("package/dir3/sub1/") and not name.endswith("/")])
+        self.assertEqual(package_index.find_path_containing("sub2"), "package/dir2/sub2/file2_2.xml")
+        self.assertEqual(package_index.find("package/dir0/common.xml").children, {})
+        return None
+
+    def test_package_index_multiple_dirs(self) -> None:
+        """Test that packages with several top-level entries have no top-level dir."""
+        with zipfile.ZipFile(self.archive, "a") as zip_file:
+            zip_file.writestr("other/file.xml", "<file/>")
+        self.assertIsNone(PackageIndex.from_archive(self.archive).top_level_dir())
+        return None
+
+    # TPChecker.get_package_index()
+    def test_checker_reuses_index(self) -> None:
+        """Test that all structural checks share one index per archive."""
+        tp_checker: TPChecker = TPChecker()
+        package_index: PackageIndex = tp_checker.get_package_index(EBA_PACKAGE)
+        self.assertTrue(tp_checker.has_top_level_single_dir(EBA_PACKAGE))
+        self.assertTrue(tp_checker.has_meta_inf_folder(EBA_PACKAGE))
+        self.assertTrue(tp_checker.has_catalog_xml(EBA_PACKAGE))
+        self.assertTrue(tp_checker.has_taxonomy_package_xml(EBA_PACKAGE))
+        self.assertIs(tp_checker.get_package_index(EBA_PACKAGE), package_index)
+        self.assertEqual(len(package_index), 1354)
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import threading
+import time
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPChecker import TPChecker
+from TPPipeline import CheckPipeline, CheckStage
+from TPReport import Report
+
+"""PipelineTest.py
+
+The class contains relevant functions to test the check
+orchestrator in TPPipeline.py.
+"""
+
+class PipelineTest(unittest.TestCase):
+    """Methods for testing the class CheckPipeline"""
+    def setUp(self) -> None:
+        """Create a pipeline without console output."""
+        self.report: Report = Report("EBA", "package.zip")
+        self.pipeline: CheckPipeline = CheckPipeline(TPChecker(quiet=True), self.report, workers=2)
+        return None
+
+    def test_report_order(self) -> None:
+        """Test that stages are reported in declaration order, whichever finishes first."""
+        def slow_check(tp_checker: TPChecker, package: str) -> bool:
+            time.sleep(0.05)
+            return True
+        self.pipeline.add(CheckStage("slow", slow_check, "package.zip", passed_msg="slow", failed_msg="slow"))
+        self.pipeline.add(CheckStage("fast", lambda tp_checker, package: True, "package.zip", passed_msg="fast", failed_msg="fast"))
+        self.assertEqual(self.pipeline.run(), {"slow": True, "fast": True})
+        self.assertEqual([entry.name for entry in self.report.entries], ["slow", "fast"])
+        return None
+
+    def test_skip_stages(self) -> None:
+        """Test that stages are skipped if a required stage failed, but not if they only run after it."""
+        def failing_check(tp_checker: TPChecker, package: str) -> bool:
+            tp_checker.messages.append("Document Invalid")
+            return False
+        self.pipeline.add(CheckStage("zipFormat", failing_check, "package.zip", passed_msg="ZIP", failed_msg="not ZIP", messages=True))
+        self.pipeline.add(CheckStage("required", lambda tp_checker, package: True, "package.zip", passed_msg="ok", failed_msg="failed",
+                                     requires=("zipFormat",)))
+        self.pipeline.add(CheckStage("after", lambda tp_checker, package: True, "package.zip", passed_msg="ok", failed_msg="failed",
+                                     after=("zipFormat",)))
+        self.pipeline.add(CheckStage("broken", lambda tp_checker, package: 1 / 0, "package.zip", passed_msg="ok", failed_msg="broken"))
+        self.assertEqual(self.pipeline.run(), {"zipFormat": False, "required": None, "after": True, "broken": False})
+        self.assertEqual([(entry.name, entry.status) for entry in self.report.entries],
+                         [("zipFormat", "failed"), ("after", "passed"), ("broken", "error")])
+        self.assertEqual(self.report.entries[0].details, ["Document Invalid"])
+        self.assertEqual(self.pipeline.tp_checker.messages, [])
+        return None
+
+    def test_failed_member(self) -> None:
+        """Test that a failed check is recorded with the member it reported, and a passed one without."""
+        def failing_check(tp_checker: TPChecker, package: str) -> bool:
+            tp_checker.members.append("package/META-INF/catalog.xml")
+            return False
+        def passing_check(tp_checker: TPChecker, package: str) -> bool:
+            tp_checker.members.append("package/META-INF/catalog.xml")
+            return True
+        self.pipeline.add(CheckStage("failing", failing_check, "package.zip", passed_msg="ok", failed_msg="failed"))
+        self.pipeline.add(CheckStage("passing", passing_check, "package.zip", passed_msg="ok", failed_msg="failed"))
+        self.pipeline.add(CheckStage("package", lambda tp_checker, package: False, "package.zip", passed_msg="ok", failed_msg="failed"))
+        self.pipeline.run()
+        self.assertEqual([entry.member for entry in self.report.entries], ["package/META-INF/catalog.xml", None, None])
+        self.assertEqual(self.pipeline.tp_checker.members, [])
+        return None
+
+    def test_unknown_stage(self) -> None:
+        """Test that stages can only depend on stages added before."""
+        with self.assertRaises(ValueError):
+            self.pipeline.add(CheckStage("dts", lambda tp_checker: True, passed_msg="ok", failed_msg="failed", requires=("entryPoints",)))
+        return None
+
+    def test_workers(self) -> None:
+        """Test that independent stages run concurrently, but not more than workers at a time."""
+        lock: threading.Lock = threading.Lock()
+        running: list[int] = [0, 0]
+        def counting_check(tp_checker: TPChecker) -> bool:
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return True
+        index: int
+        for index in range(6):
+            self.pipeline.add(CheckStage(f"check{index}", counting_check, passed_msg="ok", failed_msg="failed"))
+        self.pipeline.run()
+        self.assertEqual(running[1], 2)
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
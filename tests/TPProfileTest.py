@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPChecker import TPChecker
+from TPProfile import StageRecord, collect_stages, instrument, profile_run, stage
+
+"""ProfileTest.py
+
+The class contains relevant functions to test the
+instrumentation layer in TPProfile.py.
+"""
+
+@instrument
+def instrumented_function(value: int) -> int:
+    """Helper function measured as stage."""
+    with stage("inner"):
+        return value * 2
+
+class ProfileTest(unittest.TestCase):
+    """Methods for testing the module TPProfile.py"""
+    # instrument(), stage()
+    def test_instrument_without_collection(self) -> None:
+        """Test that instrumented functions work unchanged without collection."""
+        self.assertEqual(instrumented_function(2), 4)
+        return None
+
+    def test_collect_stages(self) -> None:
+        """Test that nested stages are recorded with depth and measurements."""
+        stages: list[StageRecord] = []
+        with collect_stages(stages):
+            self.assertEqual(instrumented_function(3), 6)
+        self.assertEqual([(record.name, record.depth) for record in stages], [("instrumented_function", 0), ("inner", 1)])
+        self.assertGreaterEqual(stages[0].wall_time, stages[1].wall_time)
+        self.assertEqual(set(stages[0].to_dict()), {"name", "depth", "wallTime", "bytesRead", "bytesWritten", "rssGrowth"})
+        # nothing is recorded after the collection ended
+        instrumented_function(4)
+        self.assertEqual(len(stages), 2)
+        return None
+
+    def test_collect_stages_of_threads(self) -> None:
+        """Test that stages running on the thread pool of a check are recorded below the check."""
+        stages: list[StageRecord] = []
+        with collect_stages(stages):
+            TPChecker(quiet=True).check_entry_points("../input/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip")
+        depths: dict[str, set[int]] = {}
+        record: StageRecord
+        for record in stages:
+            depths.setdefault(record.name, set()).add(record.depth)
+        self.assertEqual(depths["TPChecker.check_entry_points"], {0})
+        self.assertEqual(depths["sniff_root_element"], {1})
+        return None
+
+    # profile_run()
+    def test_profile_run(self) -> None:
+        """Test that the cProfile stats are dumped to a file."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profile_file: str = os.path.join(temp_dir, "run.prof")
+            with open(os.devnull, "w") as devnull:
+                stderr = sys.stderr
+                sys.stderr = devnull
+                try:
+                    with profile_run(profile_file):
+                        instrumented_function(5)
+                finally:
+                    sys.stderr = stderr
+            self.assertGreater(os.path.getsize(profile_file), 0)
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
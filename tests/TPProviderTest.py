@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import TPProvider
+from TPProvider import get_provider, get_provider_path, register_provider
+
+"""ProviderTest.py
+
+The class contains relevant functions to test the provider
+registry in TPProvider.py.
+"""
+
+class ProviderTest(unittest.TestCase):
+    """Methods for testing the provider registry"""
+    def tearDown(self) -> None:
+        TPProvider.PROVIDERS.pop("TEST", None)
+        return None
+
+    def test_get_provider(self) -> None:
+        """Test that the fixers are found by provider abbreviation only, never by module path."""
+        from TPFixer import EBATaxonomyPackage, EDINETTaxonomyPackage
+        self.assertIs(get_provider("eba"), EBATaxonomyPackage)
+        self.assertIs(get_provider("EDINET"), EDINETTaxonomyPackage)
+        self.assertIsNone(get_provider("TPFixer:EDINETTaxonomyPackage"))
+        self.assertIsNone(get_provider("collections:OrderedDict"))
+        self.assertIsNone(get_provider("UNKNOWN"))
+        return None
+
+    def test_register_provider(self) -> None:
+        """Test that further fixers can be registered by module path."""
+        register_provider("test", "TPFixer:EBATaxonomyPackage")
+        self.assertEqual(get_provider_path("TEST"), "TPFixer:EBATaxonomyPackage")
+        with self.assertRaises(ValueError):
+            register_provider("test", "TPFixer.EBATaxonomyPackage")
+        return None
+
+    def test_lazy_imports(self) -> None:
+        """Test that the CLI does not import the checks and fixers before a package is processed."""
+        code: str = "import sys, app; print(sorted(name for name in ('TPChecker', 'TPFixer', 'lxml') if name in sys.modules))"
+        result: subprocess.CompletedProcess = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                                             cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+        self.assertEqual(result.stdout.strip(), "[]")
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
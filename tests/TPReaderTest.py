@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPReader import PackageReader
+
+"""ReaderTest.py
+
+The class contains relevant functions to test the memory-mapped
+package reader in TPReader.py.
+"""
+
+EBA_PACKAGE = "../input/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata/EBA_CRD_XBRL_3.3_Reporting_Frameworks_3.3.0.0_errata.zip"
+
+class ReaderTest(unittest.TestCase):
+    """Methods for testing the class PackageReader"""
+    def setUp(self) -> None:
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.archive: str = os.path.join(self.temp_dir.name, "example.zip")
+        with zipfile.ZipFile(self.archive, "w") as zip_file:
+            zip_file.writestr("example/", "")
+            zip_file.writestr("example/stored.xml", "<stored/>", zipfile.ZIP_STORED)
+            zip_file.writestr("example/deflated.xml", "<deflated>" + "data" * 10000 + "</deflated>", zipfile.ZIP_DEFLATED)
+            zip_file.writestr("example/bzip2.xml", "<bzip2/>", zipfile.ZIP_BZIP2)
+            zip_file.writestr("example/lzma.xml", "<lzma/>", zipfile.ZIP_LZMA)
+            zip_file.writestr("example/Müller.xml", "<name/>")
+        return None
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+        return None
+
+    # read()
+    def test_read(self) -> None:
+        """Test that all members are read like with zipfile, stored members without copying them."""
+        for archive in (self.archive, EBA_PACKAGE):
+            with PackageReader(archive) as package_reader, zipfile.ZipFile(archive) as zip_file:
+                self.assertEqual(package_reader.namelist(), zip_file.namelist())
+                for name in zip_file.namelist():
+                    self.assertEqual(bytes(package_reader.read(name)), zip_file.read(name))
+                    with package_reader.open(name) as member_stream:
+                        self.assertEqual(member_stream.read(), zip_file.read(name))
+        with PackageReader(self.archive) as package_reader:
+            self.assertIsInstance(package_reader.read("example/stored.xml").obj, type(package_reader._mmap))
+            self.assertEqual(package_reader.find("example/Müller.xml"), 5)
+            self.assertIsNone(package_reader.find("example/missing.xml"))
+            self.assertRaises(KeyError, package_reader.read, "example/missing.xml")
+        return None
+
+    # open()
+    def test_open_corrupt(self) -> None:
+        """Test that corrupt data and files which are no ZIP archives are rejected."""
+        with zipfile.ZipFile(self.archive) as zip_file:
+            info: zipfile.ZipInfo = zip_file.getinfo("example/deflated.xml")
+        with open(self.archive, "r+b") as archive_file:
+            archive_file.seek(info.header_offset + 60)
+            archive_file.write(b"\xff\xff\xff\xff")
+        with PackageReader(self.archive) as package_reader:
+            self.assertRaises(zipfile.BadZipFile, package_reader.read, "example/deflated.xml")
+            with package_reader.open("example/deflated.xml") as member_stream:
+                self.assertRaises(zipfile.BadZipFile, member_stream.read)
+        self.assertRaises(zipfile.BadZipFile, PackageReader, "data/example_0.zip")
+        self.assertRaises(zipfile.BadZipFile, PackageReader, "data/catalog.xml")
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
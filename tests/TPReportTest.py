@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPReport import Report, write_json, write_jsonl
+
+"""ReportTest.py
+
+The class contains relevant functions to test the result
+model in TPReport.py.
+"""
+
+class ReportTest(unittest.TestCase):
+    """Methods for testing the class Report"""
+    def setUp(self) -> None:
+        """Fill a report without console output."""
+        self.report: Report = Report("EBA", "package.zip")
+        self.report.check("zipFormat", lambda package: True, "package.zip", passed_msg="Package is ZIP", failed_msg="Package is not ZIP",
+                          error_code="tpe:invalidArchiveFormat")
+        messages: list[str] = []
+        def failing_check(package: str) -> bool:
+            messages.append("Document Invalid")
+            return False
+        self.report.check("metadataFiles", failing_check, "package.zip", passed_msg="valid", failed_msg="not valid",
+                          error_code="tpe:invalidMetaDataFile", member="META-INF/taxonomyPackage.xml", messages=messages)
+        self.report.check("broken", lambda package: 1 / 0, "package.zip", passed_msg="ok", failed_msg="broken")
+        self.report.step("genZipArchive", "Final zip generated")
+        self.report.finish("package.zip is fixed")
+        return None
+
+    # Report.check()
+    def test_check(self) -> None:
+        """Test that status, error code, member and messages are recorded."""
+        self.assertEqual([entry.status for entry in self.report.entries], ["passed", "failed", "error", "done"])
+        self.assertIsNone(self.report.entries[0].error_code)
+        self.assertEqual(self.report.entries[1].error_code, "tpe:invalidMetaDataFile")
+        self.assertEqual(self.report.entries[1].member, "META-INF/taxonomyPackage.xml")
+        self.assertEqual(self.report.entries[1].details, ["Document Invalid"])
+        self.assertIn("ZeroDivisionError", self.report.entries[2].message)
+        self.assertTrue(self.report.success)
+        return None
+
+    # write_json(), write_jsonl()
+    def test_write_reports(self) -> None:
+        """Test the JSON and JSON Lines renderers."""
+        stream: io.StringIO = io.StringIO()
+        write_json([self.report.to_dict()], stream)
+        self.assertEqual(json.loads(stream.getvalue())["result"], "package.zip is fixed")
+        stream = io.StringIO()
+        write_jsonl([self.report.to_dict()], stream)
+        lines: list[dict] = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[1]["errorCode"], "tpe:invalidMetaDataFile")
+        self.assertEqual(lines[-1]["stage"], "result")
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from lxml import etree
+from TPChecker import TPChecker, TAXONOMY_PACKAGE_XSD, TAXONOMY_PACKAGE_CATALOG_XSD
+import TPSchema
+from TPSchema import BUNDLED_SCHEMAS, get_bundled_schema_path, get_xml_schema
+
+"""SchemaTest.py
+
+The class contains relevant functions to test the bundled
+schemas and the schema cache in TPSchema.py.
+"""
+
+# SHA-256 of the official schema documents, the bundled copies must not differ by a byte
+OFFICIAL_SCHEMA_HASHES: dict[str, str] = {
+    "taxonomy-package.xsd": "f1d21f651f4eaebd11792db7d7cdb5863095943379fd7ef918e63ce437cdc47c",
+    "taxonomy-package-catalog.xsd": "c6b0d8118b49a9260dbe253e3901140f1a156f33fcad6b693869d2d1ab076f0e",
+    "xml.xsd": "61960fb3131e38022caad5360e2f33a3382578ab3c80cd58bd74320ede61b20c",
+    "xml-2001-03.xsd": "0ed94db44402526e7a683424d0bd4b65e5bc50e65d9b9a762b11b30bae06d0c8",
+}
+
+class SchemaTest(unittest.TestCase):
+    """Methods for testing the module TPSchema.py"""
+    # get_bundled_schema_path()
+    def test_get_bundled_schema_path(self) -> None:
+        """Test that the official schema locations are bundled."""
+        self.assertTrue(os.path.isfile(get_bundled_schema_path(TAXONOMY_PACKAGE_XSD)))
+        self.assertTrue(os.path.isfile(get_bundled_schema_path(TAXONOMY_PACKAGE_CATALOG_XSD)))
+        self.assertIsNone(get_bundled_schema_path("http://www.xbrl.org/2017/taxonomy-package-catalog.xsd"))
+        return None
+
+    def test_bundled_schema_hashes(self) -> None:
+        """Test that the bundled schemas are the official documents byte for byte."""
+        self.assertEqual(set(BUNDLED_SCHEMAS.values()), set(OFFICIAL_SCHEMA_HASHES))
+        schema_uri: str
+        for schema_uri in BUNDLED_SCHEMAS:
+            with open(get_bundled_schema_path(schema_uri), "rb") as schema_file:
+                self.assertEqual(hashlib.sha256(schema_file.read()).hexdigest(), OFFICIAL_SCHEMA_HASHES[BUNDLED_SCHEMAS[schema_uri]], schema_uri)
+        return None
+
+    # get_xml_schema()
+    def test_get_xml_schema(self) -> None:
+        """Test that schemas are compiled offline and only once."""
+        xml_schema: etree.XMLSchema = get_xml_schema(TAXONOMY_PACKAGE_XSD)
+        self.assertIs(get_xml_schema(TAXONOMY_PACKAGE_XSD), xml_schema)
+        self.assertTrue(xml_schema.validate(etree.fromstring(
+            '<taxonomyPackage xmlns="http://xbrl.org/2016/taxonomy-package" xml:lang="en">'
+            '<identifier>http://example.com/package.zip</identifier><name>Example</name>'
+            '<entryPoints><entryPoint><name>Example</name><entryPointDocument href="http://example.com/ep.xsd"/></entryPoint></entryPoints>'
+            '</taxonomyPackage>')))
+        self.assertFalse(xml_schema.validate(etree.fromstring('<taxonomyPackage xmlns="http://xbrl.org/2016/taxonomy-package"/>')))
+        # bundled schemas are cached by URI, so they are neither read nor hashed again
+        self.assertIs(TPSchema._schema_cache[(TAXONOMY_PACKAGE_XSD, "")], xml_schema)
+        return None
+
+    def test_validate_catalog_xml(self) -> None:
+        """Test that the restricted catalog schema only allows rewriteURI entries."""
+        catalog_xml: str = os.path.join(os.path.dirname(__file__), "data", "catalog.xml")
+        self.assertFalse(TPChecker().validate_xml(TAXONOMY_PACKAGE_CATALOG_XSD, catalog_xml))
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
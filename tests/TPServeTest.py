@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from typing import Any
+from TPBenchmark import gen_package
+from TPServe import ServiceClient, ServiceJob, ValidationService, create_server
+
+"""ServeTest.py
+
+The class contains relevant functions to test the service
+mode in TPServe.py with a local client.
+"""
+
+class BlockedService(ValidationService):
+    """Service whose jobs wait until they are released."""
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """class constructor"""
+        ValidationService.__init__(self, *args, **kwargs)
+        self.released: threading.Event = threading.Event()
+        return None
+
+    def run_job(self, job: ServiceJob) -> dict[str, Any]:
+        self.released.wait()
+        return {"package": job.package}
+
+class ServeTest(unittest.TestCase):
+    """Methods for testing the module TPServe.py"""
+    def setUp(self) -> None:
+        """Start the service on a Unix socket."""
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.package: str = gen_package(os.path.join(self.temp_dir.name, "conformant.zip"), 100, entry_points=2, catalog_entries=5)
+        self.service: ValidationService = ValidationService(os.path.join(self.temp_dir.name, "output"), workers=2, max_packages=1)
+        self.client: ServiceClient = self.start(self.service)
+        return None
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+        self.temp_dir.cleanup()
+        return None
+
+    def start(self, service: ValidationService) -> ServiceClient:
+        """Serve the service in a thread and return a client."""
+        socket_path: str = os.path.join(self.temp_dir.name, f"{id(service)}.sock")
+        self.server = create_server(service, socket_path=socket_path, quiet=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return ServiceClient(socket_path=socket_path, timeout=60)
+
+    def test_validate(self) -> None:
+        """Test that packages are validated with warm caches, least recently used packages are dropped."""
+        status: int
+        report: dict[str, Any]
+        for _ in range(2):
+            status, report = self.client.validate("EBA", self.package)
+            self.assertEqual(status, 200)
+            self.assertTrue(report["success"])
+            self.assertEqual(report["entries"][-1]["name"], "metadataFiles")
+        self.assertEqual(self.client.health()[1]["packages"], 1)
+        other_package: str = gen_package(os.path.join(self.temp_dir.name, "broken.zip"), 100, defects=("topLevelDirs",))
+        status, report = self.client.validate("EBA", other_package)
+        self.assertEqual(status, 200)
+        self.assertFalse(report["success"])
+        self.assertEqual(self.client.health()[1]["packages"], 1)
+        self.assertEqual(len(self.service.tp_checker._package_readers), 1)
+        return None
+
+    def test_fix(self) -> None:
+        """Test that packages are fixed into the output folder and the input is left in place."""
+        package: str = os.path.join(self.temp_dir.name, "ALL_20221101.zip")
+        with zipfile.ZipFile(package, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("samples/2022-11-01/jppfs_rt_2022-11-01.xsd", "<schema/>")
+            zip_file.writestr("taxonomy/jppfs/2022-11-01/jppfs_cor_2022-11-01.xsd", "<schema/>")
+        status: int
+        report: dict[str, Any]
+        status, report = self.client.fix("EDINET", package, compression="bzip2")
+        self.assertEqual(status, 200)
+        self.assertEqual(report["result"], "ALL_20221101.zip is fixed")
+        self.assertEqual(report["output"], os.path.join(self.temp_dir.name, "output", "ALL_20221101", "ALL_20221101.zip"))
+        self.assertTrue(os.path.isfile(package))
+        with zipfile.ZipFile(report["output"], "r") as zip_file:
+            self.assertIn("ALL_20221101/META-INF/catalog.xml", zip_file.namelist())
+        return None
+
+    def test_invalid_requests(self) -> None:
+        """Test that invalid requests are rejected."""
+        self.assertEqual(self.client.validate("EBA", "conformant.zip")[0], 400)
+        self.assertEqual(self.client.validate("EBA", self.package, compression="zstd")[0], 400)
+        self.assertEqual(self.client.validate("UNKNOWN", self.package)[0], 400)
+        self.assertEqual(self.client.fix("collections:OrderedDict", self.package)[0], 400)
+        self.assertEqual(self.client.validate("EBA", os.path.join(self.temp_dir.name, "missing.zip"))[0], 404)
+        self.assertEqual(self.client.request("POST", "/unknown", {})[0], 404)
+        self.assertEqual(self.client.request("POST", "/validate", None)[0], 400)
+        return None
+
+    def test_busy(self) -> None:
+        """Test that jobs are rejected while all workers are busy and the queue is full."""
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+        self.service = BlockedService(os.path.join(self.temp_dir.name, "output"), workers=1, queue_size=1)
+        self.client = self.start(self.service)
+        results: list[int] = []
+        threads: list[threading.Thread] = [threading.Thread(target=lambda: results.append(ServiceClient(socket_path=self.server.server_address).validate("EBA", self.package)[0]))
+                                           for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        while self.client.health()[1]["jobs"] < 2:
+            time.sleep(0.01)
+        self.assertEqual(self.client.validate("EBA", self.package)[0], 503)
+        self.service.released.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [200, 200])
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
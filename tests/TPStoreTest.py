@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPReader import PackageReader
+from TPStore import MemberStore
+from TPZip import pack_folder
+
+"""StoreTest.py
+
+The class contains relevant functions to test the extraction
+of taxonomy packages into the member store in TPStore.py and
+the packing of fixed packages from the store.
+"""
+
+class StoreTest(unittest.TestCase):
+    """Methods for testing the module TPStore.py"""
+    def setUp(self) -> None:
+        """Create two versions of a package, which share all but one member."""
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.store: MemberStore = MemberStore(os.path.join(self.temp_dir.name, "store"))
+        self.versions: list[str] = []
+        version: str
+        for version in ("2021-11-01", "2022-11-01"):
+            archive: str = os.path.join(self.temp_dir.name, f"{version}.zip")
+            with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+                zip_file.writestr("taxonomy/", "")
+                zip_file.writestr("taxonomy/common.xsd", "<schema/>" * 100)
+                zip_file.writestr("taxonomy/label.xml", "<linkbase/>" * 100)
+                zip_file.writestr("taxonomy/copy.xml", "<linkbase/>" * 100)
+                zip_file.writestr("taxonomy/image.png", "png", compress_type=zipfile.ZIP_STORED)
+                zip_file.writestr("taxonomy/version.xml", f"<version>{version}</version>" * 100)
+            self.versions.append(archive)
+        return None
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.temp_dir.cleanup()
+        return None
+
+    def extract(self, archive: str) -> tuple[str, tuple[int, int]]:
+        """Extract a package into a folder named like the archive."""
+        folder: str = archive.replace(".zip", "")
+        package_reader: PackageReader
+        with PackageReader(archive) as package_reader:
+            return folder, self.store.extract_package(package_reader, folder)
+
+    # MemberStore.extract_package()
+    def test_extract_package(self) -> None:
+        """Test that shared members are stored once and extracted as links into the store."""
+        folders: list[str] = []
+        counts: list[tuple[int, int]] = []
+        archive: str
+        for archive in self.versions:
+            folder: str
+            count: tuple[int, int]
+            folder, count = self.extract(archive)
+            folders.append(folder)
+            counts.append(count)
+        self.assertEqual(counts, [(4, 5), (1, 5)])
+        self.assertTrue(os.path.isdir(os.path.join(folders[0], "taxonomy")))
+        with open(os.path.join(folders[1], "taxonomy", "version.xml"), "r", encoding="utf-8") as version_file:
+            self.assertEqual(version_file.read(), "<version>2022-11-01</version>" * 100)
+        self.assertTrue(os.path.samefile(os.path.join(folders[0], "taxonomy", "label.xml"), os.path.join(folders[1], "taxonomy", "label.xml")))
+        self.assertTrue(os.path.samefile(os.path.join(folders[1], "taxonomy", "label.xml"), os.path.join(folders[1], "taxonomy", "copy.xml")))
+        self.assertFalse(os.path.samefile(os.path.join(folders[0], "taxonomy", "version.xml"), os.path.join(folders[1], "taxonomy", "version.xml")))
+        return None
+
+    def test_unsafe_member_paths(self) -> None:
+        """Test that members outside of the destination folder are rejected."""
+        archive: str = os.path.join(self.temp_dir.name, "unsafe.zip")
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            zip_file.writestr("../outside.xml", "<linkbase/>")
+        with self.assertRaises(zipfile.BadZipFile):
+            self.extract(archive)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, "outside.xml")))
+        return None
+
+    # MemberStore.read_and_compress_member()
+    def test_pack_folder(self) -> None:
+        """Test that packages packed from the store are identical to packages packed from copies, also if extracted files changed."""
+        folders: list[str] = []
+        archive: str
+        for archive in self.versions:
+            folders.append(self.extract(archive)[0])
+        # a changed file is written as new file and not through the link into the store
+        os.remove(os.path.join(folders[1], "taxonomy", "common.xsd"))
+        with open(os.path.join(folders[1], "taxonomy", "common.xsd"), "w", encoding="utf-8") as schema_file:
+            schema_file.write("<schema></schema>" * 100)
+        method: str
+        for method in ("deflate", "bzip2", "lzma"):
+            folder: str
+            for folder in folders:
+                packed_zip: str = f"{folder}-{method}-store.zip"
+                pack_folder(folder, packed_zip, method=method, store=self.store)
+                # the second time the members are taken from the store
+                pack_folder(folder, f"{packed_zip}.again", method=method, store=self.store)
+                pack_folder(folder, f"{folder}-{method}.zip", method=method)
+                with open(packed_zip, "rb") as packed_file, open(f"{packed_zip}.again", "rb") as again_file, open(f"{folder}-{method}.zip", "rb") as plain_file:
+                    plain_data: bytes = plain_file.read()
+                    self.assertEqual(packed_file.read(), plain_data)
+                    self.assertEqual(again_file.read(), plain_data)
+                with zipfile.ZipFile(packed_zip, "r") as zip_file:
+                    self.assertIsNone(zip_file.testzip())
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
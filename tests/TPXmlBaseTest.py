@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPChecker import TPChecker
+from TPXmlBase import UrlTable, XLINK_HREF, XmlBaseResolver
+
+"""XmlBaseTest.py
+
+The class contains relevant functions to test the XML Base
+resolution in TPXmlBase.py.
+"""
+
+# example of the XML Base specification (https://www.w3.org/TR/xmlbase/#syntax)
+DOCUMENT = b"""<?xml version="1.0"?>
+<doc xml:base="http://example.org/today/" xmlns:xlink="http://www.w3.org/1999/xlink">
+    <head>
+        <title>Virtual Library</title>
+    </head>
+    <body>
+        <paragraph>See <link xlink:type="simple" xlink:href="new.xml">what's
+        new</link>!</paragraph>
+        <paragraph>Check out the hot picks of the day!</paragraph>
+        <olist xml:base="/hotpicks/">
+            <item>
+                <link xlink:type="simple" xlink:href="pick1.xml">Hot Pick #1</link>
+            </item>
+            <item>
+                <link xlink:type="simple" xlink:href="pick2.xml#top">Hot Pick #2</link>
+            </item>
+            <item>
+                <link xlink:type="simple" xlink:href="pick3.xml">Hot Pick #3</link>
+            </item>
+        </olist>
+        <paragraph><link xlink:type="simple" xlink:href="pick1.xml">Yesterday's pick</link></paragraph>
+    </body>
+</doc>
+"""
+
+class XmlBaseTest(unittest.TestCase):
+    """Methods for testing the class XmlBaseResolver"""
+    # resolve_document()
+    def test_resolve_document(self) -> None:
+        """Test that nested xml:base attributes apply to the element and its descendants only."""
+        url_table: UrlTable = XmlBaseResolver().resolve_document(io.BytesIO(DOCUMENT), "package/doc.xml")
+        self.assertEqual(url_table.urls, ["http://example.org/today/new.xml", "http://example.org/hotpicks/pick1.xml",
+                                          "http://example.org/hotpicks/pick2.xml", "http://example.org/hotpicks/pick3.xml",
+                                          "http://example.org/today/pick1.xml"])
+        self.assertEqual(url_table.fragments, ["", "", "top", "", ""])
+        self.assertEqual(list(url_table.elements), [5, 9, 11, 13, 15])
+        self.assertEqual(list(url_table.rows(XLINK_HREF, frozenset({"olist"}))), [])
+        self.assertEqual(len(list(url_table.rows(XLINK_HREF, frozenset({"link"})))), 5)
+        return None
+
+    def test_resolve_document_comments(self) -> None:
+        """Test that documents with comments and processing instructions around the root element are resolved."""
+        document: bytes = b'<?xml version="1.0"?>\n<!-- generated -->\n<?pi data?>' + DOCUMENT.split(b"?>", 1)[1] + b"<!-- end -->"
+        url_table: UrlTable = XmlBaseResolver().resolve_document(io.BytesIO(document), "package/doc.xml")
+        self.assertEqual(len(url_table.urls), 5)
+        return None
+
+    # join()
+    def test_join(self) -> None:
+        """Test that resolved URLs are memoized per base and relative URL."""
+        xml_base_resolver: XmlBaseResolver = XmlBaseResolver()
+        self.assertEqual(xml_base_resolver.join("package/www.example.com/tax.xsd", "dict/dict.xsd#concept"),
+                         ("package/www.example.com/dict/dict.xsd", "concept"))
+        self.assertEqual(xml_base_resolver.join("package/www.example.com/tax.xsd", "dict/dict.xsd#other"),
+                         ("package/www.example.com/dict/dict.xsd", "other"))
+        self.assertEqual(len(xml_base_resolver._joined), 1)
+        return None
+
+    # check_rel_url_base_resolution()
+    def test_check_rel_url_base_resolution(self) -> None:
+        """Test check_rel_url_base_resolution function."""
+        tp_checker: TPChecker = TPChecker(quiet=True)
+        self.assertTrue(tp_checker.check_rel_url_base_resolution(DOCUMENT, "package/doc.xml"))
+        self.assertFalse(tp_checker.check_rel_url_base_resolution('<doc xml:base="http://[::1/"/>', "package/doc.xml"))
+        self.assertFalse(tp_checker.check_rel_url_base_resolution("<doc>", "package/doc.xml"))
+        self.assertEqual(len(tp_checker.messages), 2)
+        return None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import struct
+import sys
+import tempfile
+import unittest
+import zipfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from TPFixer import EDINETTaxonomyPackage
+from TPZip import compress_member, copy_member_raw, get_compression, pack_folder, write_member_stream, write_raw_member
+
+"""ZipTest.py
+
+The class contains relevant functions to test the ZIP-to-ZIP
+rewriting of taxonomy packages in TPZip.py and TPFixer.py.
+"""
+
+class ZipTest(unittest.TestCase):
+    """Methods for testing the module TPZip.py"""
+    def setUp(self) -> None:
+        """Create a small EDINET like package without top-level directory and META-INF."""
+        self.temp_dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.archive: str = os.path.join(self.temp_dir.name, "ALL_20221101.zip")
+        with zipfile.ZipFile(self.archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("samples/2022-11-01/jppfs_rt_2022-11-01.xsd", "<schema/>" * 100)
+            zip_file.writestr("taxonomy/jppfs/2022-11-01/jppfs_cor_2022-11-01.xsd", "<schema/>" * 100)
+            zip_file.writestr("taxonomy/jppfs/2022-11-01/readme.txt", "stored", compress_type=zipfile.ZIP_STORED)
+        return None
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+        return None
+
+    # copy_member_raw()
+    def test_copy_member_raw(self) -> None:
+        """Test that members are copied and renamed without recompression."""
+        target: str = os.path.join(self.temp_dir.name, "copy.zip")
+        with zipfile.ZipFile(self.archive, "r") as source_zip, zipfile.ZipFile(target, "w") as target_zip:
+            for info in source_zip.infolist():
+                copy_member_raw(source_zip, info, target_zip, f"top/{info.filename}")
+            # members can still be added the usual way afterwards
+            target_zip.writestr("top/new.txt", "new")
+        with zipfile.ZipFile(self.archive, "r") as source_zip, zipfile.ZipFile(target, "r") as target_zip:
+            self.assertIsNone(target_zip.testzip())
+            for info in source_zip.infolist():
+                copied_info: zipfile.ZipInfo = target_zip.getinfo(f"top/{info.filename}")
+                self.assertEqual(copied_info.compress_type, info.compress_type)
+                self.assertEqual(copied_info.compress_size, info.compress_size)
+                self.assertEqual(target_zip.read(copied_info), source_zip.read(info))
+            self.assertEqual(target_zip.read("top/new.txt"), b"new")
+        return None
+
+    def test_copy_member_raw_unicode_path(self) -> None:
+        """Test that the Info-ZIP unicode path of a renamed member is dropped, and kept otherwise."""
+        name: bytes = "タクソノミ.xsd".encode("utf-8")
+        unicode_path: bytes = struct.pack("<2HBL", 0x7075, 5 + len(name), 1, zipfile.crc32(b"old.xsd")) + name
+        timestamp: bytes = struct.pack("<2HBL", 0x5455, 5, 1, 0)
+        source: str = os.path.join(self.temp_dir.name, "unicode.zip")
+        with zipfile.ZipFile(source, "w") as source_zip:
+            info: zipfile.ZipInfo = zipfile.ZipInfo("old.xsd")
+            info.extra = unicode_path + timestamp
+            source_zip.writestr(info, "<schema/>")
+        target: str = os.path.join(self.temp_dir.name, "copy.zip")
+        # readers which support unicode paths (e.g. zipfile of Python 3.13) name the member after it
+        with zipfile.ZipFile(source, "r") as source_zip, zipfile.ZipFile(target, "w") as target_zip:
+            copy_member_raw(source_zip, source_zip.infolist()[0], target_zip, "top/new.xsd")
+            copy_member_raw(source_zip, source_zip.infolist()[0], target_zip)
+        with zipfile.ZipFile(target, "r") as target_zip:
+            self.assertIsNone(target_zip.testzip())
+            self.assertEqual(target_zip.namelist()[0], "top/new.xsd")
+            self.assertEqual([info.extra for info in target_zip.infolist()], [timestamp, unicode_path + timestamp])
+        with open(target, "rb") as target_file:
+            # the local header of the renamed member carries the same extra fields
+            header: tuple = struct.unpack("<4s5H3L2H", target_file.read(30))
+            self.assertEqual(target_file.read(header[-2] + header[-1])[header[-2]:], timestamp)
+        return None
+
+    # write_member_stream()
+    def test_write_member_stream(self) -> None:
+        """Test that members compressed from a stream in chunks equal members compressed at once."""
+        data: dict[str, bytes] = {"catalog.xml": b"<catalog/>" * 1000, "random.xml": os.urandom(1000), "logo.png": b"<png/>" * 1000}
+        target: str = os.path.join(self.temp_dir.name, "stream.zip")
+        reference: str = os.path.join(self.temp_dir.name, "reference.zip")
+        with zipfile.ZipFile(target, "w") as target_zip, zipfile.ZipFile(reference, "w") as reference_zip:
+            for arcname, content in data.items():
+                write_member_stream(target_zip, arcname, io.BytesIO(content), zipfile.ZIP_DEFLATED, 9, chunk_size=64)
+                info: zipfile.ZipInfo
+                compressed_data: bytes
+                info, compressed_data = compress_member(arcname, content, zipfile.ZIP_DEFLATED, 9)
+                write_raw_member(reference_zip, info, (compressed_data,))
+        with open(target, "rb") as target_file, open(reference, "rb") as reference_file:
+            self.assertEqual(target_file.read(), reference_file.read())
+        with zipfile.ZipFile(target, "r") as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual([info.compress_type for info in zip_file.infolist()], [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED, zipfile.ZIP_STORED])
+            self.assertEqual(zip_file.read("random.xml"), data["random.xml"])
+        return None
+
+    # pack_folder()
+    def test_pack_folder(self) -> None:
+        """Test that packing is reproducible and compressed files are stored."""
+        folder: str = os.path.join(self.temp_dir.name, "package")
+        os.makedirs(os.path.join(folder, "META-INF"))
+        with open(os.path.join(folder, "META-INF", "catalog.xml"), "w", encoding="utf-8") as catalog_file:
+            catalog_file.write("<catalog/>" * 100)
+        with open(os.path.join(folder, "logo.png"), "wb") as logo_file:
+            logo_file.write(b"<png/>" * 100)
+        packed_zips: list[bytes] = []
+        for workers in (1, 4):
+            packed_zip: str = os.path.join(self.temp_dir.name, f"packed_{workers}.zip")
+            pack_folder(folder, packed_zip, "package/", "deflate", 9, workers)
+            os.utime(os.path.join(folder, "logo.png"), (0, 0))
+            with open(packed_zip, "rb") as packed_file:
+                packed_zips.append(packed_file.read())
+        self.assertEqual(packed_zips[0], packed_zips[1])
+        with zipfile.ZipFile(os.path.join(self.temp_dir.name, "packed_1.zip"), "r") as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.namelist(), ["package/META-INF/catalog.xml", "package/logo.png"])
+            self.assertEqual([info.compress_type for info in zip_file.infolist()], [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+        return None
+
+    def test_pack_folder_empty_dirs(self) -> None:
+        """Test that empty directories are packed as directory members, other directories are not."""
+        folder: str = os.path.join(self.temp_dir.name, "package")
+        os.makedirs(os.path.join(folder, "META-INF"))
+        os.makedirs(os.path.join(folder, "empty", "nested"))
+        with open(os.path.join(folder, "META-INF", "catalog.xml"), "w", encoding="utf-8") as catalog_file:
+            catalog_file.write("<catalog/>")
+        packed_zip: str = os.path.join(self.temp_dir.name, "packed.zip")
+        pack_folder(folder, packed_zip, "package/")
+        with zipfile.ZipFile(packed_zip, "r") as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.namelist(), ["package/META-INF/catalog.xml", "package/empty/nested/"])
+            self.assertTrue(zip_file.getinfo("package/empty/nested/").is_dir())
+            zip_file.extractall(os.path.join(self.temp_dir.name, "extracted"))
+        self.assertTrue(os.path.isdir(os.path.join(self.temp_dir.name, "extracted", "package", "empty", "nested")))
+        return None
+
+    def test_get_compression(self) -> None:
+        """Test that invalid compression settings are rejected."""
+        self.assertEqual(get_compression("bzip2", 9), (zipfile.ZIP_BZIP2, 9))
+        self.assertRaises(ValueError, get_compression, "deflate", 10)
+        self.assertRaises(ValueError, get_compression, "lzma", 1)
+        self.assertRaises(ValueError, get_compression, "zstd")
+        return None
+
+    # rewrite_package()
+    def test_rewrite_package(self) -> None:
+        """Test that a package is fixed into a new archive and the input is left in place."""
+        destination_folder: str = os.path.join(self.temp_dir.name, "output")
+        taxonomy_package: EDINETTaxonomyPackage = EDINETTaxonomyPackage(self.archive.replace(".zip", ""), destination_folder, extract=False)
+        fixed_zip: str = taxonomy_package.rewrite_package(single_dir=False)
+        self.assertEqual(fixed_zip, os.path.join(destination_folder, "ALL_20221101.zip"))
+        self.assertTrue(os.path.isfile(self.archive))
+        self.assertEqual(os.listdir(destination_folder), ["ALL_20221101.zip"])
+        with zipfile.ZipFile(fixed_zip, "r") as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.namelist(), [
+                "ALL_20221101/META-INF/catalog.xml",
+                "ALL_20221101/META-INF/taxonomyPackage.xml",
+                "ALL_20221101/samples/2022-11-01/jppfs_rt_2022-11-01.xsd",
+                "ALL_20221101/taxonomy/jppfs/2022-11-01/jppfs_cor_2022-11-01.xsd",
+                "ALL_20221101/taxonomy/jppfs/2022-11-01/readme.txt",
+            ])
+            self.assertIn(b"../taxonomy/jppfs/2022-11-01/", zip_file.read("ALL_20221101/META-INF/catalog.xml"))
+            self.assertIn(b"jppfs_rt_2022-11-01.xsd", zip_file.read("ALL_20221101/META-INF/taxonomyPackage.xml"))
+        return None
+
+if __name__ == '__main__':
+    unittest.main()